@@ -1,5 +1,4 @@
 import streamlit as st
-import os
 
 # Sayfa ayarları
 st.set_page_config(
@@ -2,29 +2,63 @@ import streamlit as st
 import pandas as pd
 from io import BytesIO
 import datetime
+import itertools
+import os
+import sys
+import tempfile
+import warnings
+from pathlib import Path
 import numpy as np
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-import xlsxwriter
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
-from functools import lru_cache
-import re
-from difflib import SequenceMatcher
+
+# Paylaşılan modüller proje kökünde - sayfa doğrudan çalıştırıldığında da bulunabilsin
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from siparis.kodlar import clean_codes, compact_codes, schaeffler_codes, valeo_codes, zf_material_codes
+from siparis.bakiye import (
+    BOSCH_CAT4_TERMS, DEPO_NAMES, MATCH_BOTH, MATCH_DUZENLENMIS, ZF_CAT4_TERMS, build_delta_groups, apply_delta_groups
+)
+from siparis.kod_tablosu import MISSING, CodeTable, SheetCodes
+from siparis.marka import BrandMaskIndex
+from siparis.birikim import BalanceAccumulator
+from siparis.kod_sozlugu import CodeDictionary, METHOD_EXACT, sheet_version
+from siparis.bulanik import FUZZY_BRANDS, FUZZY_TAG_COLUMN, FUZZY_TIME_BUDGET, FuzzyMatcher
+from siparis.ikmal import DEMAND_SOURCES, ORDER_RULES, suggest_orders
+from siparis.sema import next_month_names, resolve_column_plan, resolve_output_layout, resolve_output_plan
+from siparis.siniflandirma import PO_BRANCHES, ZF_BRANCHES, DELPHI_BRANCHES, MANN_BRANCHES
+from siparis.parcali import DEFAULT_CHUNK_SIZE, iter_excel_chunks
+from siparis.cikti import OUTPUT_FORMATS, ConversionWarning, write_excel, write_table, write_table_stream
+from siparis.depo_ayirma import write_depot_zip
+from siparis.onbellek import BackgroundParser, clear_cache, content_key, file_bytes
+from siparis.dogrulama import FILE_SCHEMAS, validate_files
+from siparis.paket import HASH_FUNCS, open_bundle
+from siparis.hazirlik import load_index, load_prepared, todays_export
+from siparis.profil import PROFILE_MODES, ProfileCapture
+from siparis.kaynak import (
+    DEFAULT_MEMORY_BUDGET_MB, EVICTION_POLICIES, cache_entries, enforce_budget, format_bytes, process_usage,
+    session_artifacts, session_usage, touch
+)
+from siparis.tasma import as_frame, clear_spill, spill_frame
 
 # Cache temizleme fonksiyonu
 def clear_all_caches():
     """Tüm cache'leri temizle"""
     try:
-        # Cache temizleme
+        # Cache temizleme - süreç havuzu önbellekten düşmeden kapatılır, aksi halde süreçleri sızar
         st.cache_data.clear()
+        get_background_parser().shutdown()
         st.cache_resource.clear()
+        clear_cache()
+        clear_spill()
         
         # Session state temizleme
         if 'processed_data' in st.session_state:
             del st.session_state.processed_data
         if 'brand_data_cache' in st.session_state:
             del st.session_state.brand_data_cache
+        if 'profile_capture' in st.session_state:
+            del st.session_state.profile_capture
         
         return True
     except Exception as e:
@@ -32,96 +66,49 @@ def clear_all_caches():
         return False
 
 # Ürün kodu eşleştirme yardımcı fonksiyonları
-def clean_product_code(code):
-    """Ürün kodunu temizle ve standardize et"""
-    if pd.isna(code) or code == '':
-        return ''
-    
-    # String'e çevir
-    code_str = str(code).strip()
+def fuzzy_candidates(fuzzy, sheet, columns=MATCH_BOTH, mode='compact', scope=None, brand=None):
+    """Fuzzy aday indeksi - kapsam (marka maskesi) verilirse yalnızca o satırların kodları"""
+    def codes():
+        values = [sheet.values(col, mode) for col in columns]
+        if scope is not None:
+            values = [codes[scope] for codes in values]
+        return [code for codes in values for code in codes]
     
-    # Boşlukları kaldır
-    code_str = code_str.replace(' ', '').replace('-', '').replace('_', '')
-    
-    # Büyük harfe çevir
-    code_str = code_str.upper()
-    
-    # Özel karakterleri temizle (sadece harf, rakam ve nokta bırak)
-    import re
-    code_str = re.sub(r'[^A-Z0-9.]', '', code_str)
-    
-    return code_str
+    return fuzzy.index((columns, mode, brand if scope is not None else None), codes)
 
-def find_best_match(product_code, target_codes, threshold=0.8):
-    """En iyi eşleşmeyi bul (fuzzy matching)"""
-    from difflib import SequenceMatcher
-    
-    if not product_code:
-        return None, 0
-    
-    best_match = None
-    best_ratio = 0
-    
-    for target_code in target_codes:
-        if pd.isna(target_code):
-            continue
-            
-        target_str = str(target_code).strip()
-        
-        # Tam eşleşme kontrolü
-        if clean_product_code(product_code) == clean_product_code(target_str):
-            return target_code, 1.0
-        
-        # Fuzzy matching
-        ratio = SequenceMatcher(None, clean_product_code(product_code), clean_product_code(target_str)).ratio()
-        
-        if ratio > best_ratio and ratio >= threshold:
-            best_ratio = ratio
-            best_match = target_code
-    
-    return best_match, best_ratio
+def record_exact_matches(code_store, brand, exact_codes, sheet, columns=MATCH_BOTH, mode='compact'):
+    """Tam eşleşen kodları kalıcı sözlüğe yaz (sürüm, fuzzy aday indeksiyle aynı kod kümesinden)"""
+    if code_store is None or not exact_codes:
+        return
+    version = sheet_version(code for col in columns for code in sheet.values(col, mode) if code)
+    for code in exact_codes:
+        code_store.record(brand, code, code, METHOD_EXACT, 1.0, version)
 
-def process_schaeffler_codes(catalogue_number):
-    """Schaeffler ürün kodlarını işle"""
-    if pd.isna(catalogue_number):
-        return ''
-    
-    code_str = str(catalogue_number).strip()
-    
-    # Özel Schaeffler kuralları
-    # 1. Sondaki 0'ları kaldır (sadece belirli durumlarda)
-    if code_str.endswith('0') and len(code_str) > 1:
-        # Eğer sondaki 0'dan önceki karakter rakam değilse, 0'ı kaldır
-        if not code_str[-2].isdigit():
-            code_str = code_str[:-1]
-    
-    # 2. Özel Schaeffler formatları
-    # LUK formatı: LUK-XXXXX -> XXXXX
-    if code_str.startswith('LUK-'):
-        code_str = code_str[4:]
-    
-    # 3. Boşlukları ve özel karakterleri temizle
-    code_str = clean_product_code(code_str)
-    
-    return code_str
+def apply_fuzzy_matches(fuzzy, brand, pending, sheet, balances, columns=MATCH_BOTH, mode='compact', scope=None):
+    """Tam eşleşmeyen kodları toplu fuzzy ile çöz, bakiyeleri ekle ve satırları etiketle
 
-def process_valeo_codes(valeo_ref):
-    """Valeo ürün kodlarını işle"""
-    if pd.isna(valeo_ref):
-        return ''
+    pending: (normalize kod, bakiye kolonu, miktar) listesi - kolon None ise yalnızca eşleşme aranır
+    scope: eşleşmenin sınırlanacağı marka maskesi (bool dizi)
+    """
+    if not pending:
+        return {}
     
-    code_str = str(valeo_ref).strip()
-    
-    # Özel Valeo kuralları
-    # 1. Valeo özel formatları
-    # VALE-XXXXX -> XXXXX
-    if code_str.startswith('VALE-'):
-        code_str = code_str[5:]
-    
-    # 2. Boşlukları ve özel karakterleri temizle
-    code_str = clean_product_code(code_str)
-    
-    return code_str
+    candidates = fuzzy_candidates(fuzzy, sheet, columns, mode, scope, brand)
+    matches = fuzzy.resolve(brand, [code for code, _, _ in pending], candidates)
+    matched_rows = {}
+    for code, column, quantity in pending:
+        if code not in matches:
+            continue
+        if code not in matched_rows:
+            target_code, ratio = matches[code]
+            rows = sheet.rows(sheet.table.id(target_code), columns, mode)
+            if scope is not None:
+                rows = rows[scope[rows]]
+            matched_rows[code] = rows
+            fuzzy.tag(rows, brand, code, target_code, ratio)
+        if column is not None and len(matched_rows[code]) > 0:
+            balances.add(matched_rows[code], column, quantity)
+    return matches
 
 # Sayfa ayarları
 st.set_page_config(
@@ -145,306 +132,193 @@ if 'brand_data_cache' not in st.session_state:
 if 'app_restart_count' not in st.session_state:
     st.session_state.app_restart_count = 0
 
+# Marka-Excel eşleştirme sözlüğü
+BRAND_EXCEL_MAPPING = {
+    'SCHAEFFLER LUK': 'excel1',
+    'SCHAFLERR': 'excel1',  # Schaflerr için alternatif isim
+    'ZF İTHAL': 'excel2', 
+    'DELPHI': 'excel3',
+    'ZF YERLİ': 'excel4',
+    'VALEO': 'excel5',
+    'FILTRON': 'excel6',
+    'MANN': 'excel7',
+    'BOSCH': 'excel8'
+}
+
+# Arka plan okuma havuzu - tüm oturumlar aynı süreç havuzunu ve disk önbelleğini kullanır
+@st.cache_resource(show_spinner=False)
+def get_background_parser():
+    """Çekirdek sayısı kadar süreçli arka plan okuyucu"""
+    return BackgroundParser()
+
+def read_uploaded(source, kind):
+    """Yüklenen dosyayı disk önbelleğinden oku - arka plan işi sürüyorsa bekler"""
+    return get_background_parser().result(source, kind)
+
+def start_background_parsing(files):
+    """[(dosya, tür)] - yüklenen dosyaları hemen arka planda okumaya gönder, durumları döndür"""
+    parser = get_background_parser()
+    keys = [parser.submit(file, kind) for file, kind in files if file is not None]
+    return [parser.status(key) for key in keys]
+
+@st.cache_data(show_spinner=False, ttl=3600, hash_funcs=HASH_FUNCS)
+def validate_uploads(files):
+    """{anahtar: dosya} - başlık ve örnek satırlarla şema doğrulaması (dosyalar tamamen okunmaz)"""
+    return validate_files(files)
+
+def show_problems(problems):
+    """Doğrulama sorunlarını göster - hata varsa True"""
+    errors = [str(problem) for problem in problems if problem.level == 'hata']
+    warnings = [str(problem) for problem in problems if problem.level != 'hata']
+    if errors:
+        st.error("❌ Dosyalar işlenemez, şu sorunları düzeltip yeniden yükleyin:\n\n" +
+                 "\n".join(f"- {error}" for error in errors))
+    if warnings:
+        st.warning("⚠️ " + "\n".join(f"- {warning}" for warning in warnings))
+    return bool(errors)
+
+def bundle_upload(schemas, key):
+    """Paket yükleyici (zip veya çoklu dosya) - dosyalar başlıklarına göre tanınır, paket oturumda tek
+    birim olarak tutulur ve birlikte kaldırılır; paket yoksa None"""
+    generation = st.session_state.get(f"{key}_generation", 0)
+    uploads = st.file_uploader(
+        "Zip veya birden çok Excel dosyası seçin",
+        type=['zip', 'xlsx', 'xls'],
+        accept_multiple_files=True,
+        key=f"{key}_{generation}"
+    )
+    if not uploads:
+        st.session_state.pop(key, None)
+        return None
+
+    # Paket yalnızca yükleme değişince açılır, sonraki çalıştırmalarda oturumdan gelir
+    signature = tuple((upload.file_id, upload.size) for upload in uploads)
+    opened = st.session_state.get(key)
+    if opened is None or opened[0] != signature:
+        with st.spinner("📦 Paket açılıyor..."):
+            opened = (signature, open_bundle(uploads, schemas))
+        st.session_state[key] = opened
+    touch(st.session_state, key)
+    bundle = opened[1]
+
+    if bundle.files:
+        st.success("📦 Tanınan dosyalar: " + ", ".join(
+            f"{schemas[file_key]['label']} ({file.name})" for file_key, file in bundle.files.items()))
+    else:
+        st.warning("⚠️ Paketteki dosyaların hiçbiri tanınmadı")
+    if bundle.unknown:
+        st.caption("Kullanılmayan: " + "; ".join(f"{name} - {reason}" for name, reason in bundle.unknown))
+    if st.button("🗑️ Paketi kaldır", key=f"{key}_clear"):
+        st.session_state.pop(key, None)
+        st.session_state[f"{key}_generation"] = generation + 1
+        st.rerun()
+    return bundle
+
 # Ultra hızlı önbellek fonksiyonları
-@st.cache_data(max_entries=5, show_spinner="Dosya okunuyor...", ttl=3600)
+@st.cache_data(max_entries=5, show_spinner="Dosya okunuyor...", ttl=3600, hash_funcs=HASH_FUNCS)
 def load_data_ultra_fast(uploaded_file):
     """Maksimum hızlı dosya okuma"""
     try:
-        # Maksimum hız için minimal ayarlar
-        df = pd.read_excel(
-            uploaded_file,
-            engine='openpyxl',
-            # dtype belirtme - sadece kritik sütunlar
-            dtype={
-                'URUNKODU': 'string'
-            },
-            # NaN kontrolü tamamen devre dışı
-            na_filter=False,
-            keep_default_na=False,
-            # Ek hızlandırma
-            header=0,
-            skiprows=None,
-            nrows=None  # Tüm satırları oku
-        )
+        # URUNKODU metin, NaN kontrolü kapalı (ayarlar siparis.onbellek.READERS'ta)
+        df = read_uploaded(uploaded_file, 'ana')
         
         return df
     except Exception as e:
         st.error(f"Dosya okuma hatası: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data(show_spinner="Marka verisi okunuyor...", ttl=1800)
+@st.cache_data(show_spinner="Marka verisi okunuyor...", ttl=1800, hash_funcs=HASH_FUNCS)
 def load_brand_data_parallel(excel_file, brand_name):
     """Maksimum hızlı marka verisi okuma"""
     try:
-        # Maksimum hız için minimal ayarlar
-        df = pd.read_excel(
-            excel_file,
-            engine='openpyxl',
-            na_filter=False,
-            keep_default_na=False
-        )
+        # Yükleme anında arka planda okunmuşsa disk önbelleğinden gelir
+        df = read_uploaded(excel_file, 'marka')
         
         return brand_name, df
     except Exception as e:
         return brand_name, pd.DataFrame()
 
-@st.cache_data(show_spinner="Veri dönüştürülüyor...", ttl=3600)
-def transform_data_ultra_fast(df):
-    """Maksimum hızlı veri dönüştürme"""
+def transform_frame(df, quiet=False):
+    """Veri dönüştürme (önbelleksiz) - parçalı modda her blok için ayrı çağrılır"""
     try:
+        # Depo kolon planı başlıktan bir kez çıkarılır (aynı düzendeki dosyalar önbellekten)
+        plan = resolve_column_plan(tuple(df.columns))
+        
         # Sadece gerekli sütunları al - bellek tasarrufu
-        essential_cols = [
-            'URUNKODU', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD',
-            'TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)'
-        ] + [f'CAT{i}' for i in range(1, 8)]
-        
-        # Depo sütunları - sadece mevcut olanları al
-        depo_prefixes = ['02-', '04-', 'D01-', 'A01-', 'TD-E01-', 'E01-']
-        depo_cols = []
-        for prefix in depo_prefixes:
-            for col_type in ['DEVIR', 'ALIS', 'STOK', 'SATIS']:
-                col_name = f"{prefix}{col_type}"
-                if col_name in df.columns:
-                    depo_cols.append(col_name)
-        
-        # Mevcut sütunları filtrele
-        available_cols = [col for col in essential_cols + depo_cols if col in df.columns]
-        df_filtered = df[available_cols].copy()
-        
-        # Maksimum hızlı dönüşüm - vektörel işlemler
-        new_df = pd.DataFrame()
+        df_filtered = df[list(plan.source_columns)].copy()
+        
+        # Kolonlar önce sözlükte toplanır, tablo en sonda nihai sırayla tek seferde kurulur
+        columns = {}
         
         # 1. URUNKODU (ilk) - vektörel
-        new_df['URUNKODU'] = df_filtered['URUNKODU'].fillna(0)
+        urunkodu = df_filtered['URUNKODU'].fillna(0)
+        columns['URUNKODU'] = urunkodu
         
         # 2. Düzenlenmiş Ürün Kodu - vektörel (başında 0 olan kodlar için özel format)
-        new_df['Düzenlenmiş Ürün Kodu'] = df_filtered['URUNKODU'].fillna(0).str.replace(r'^[^-]*-', "", regex=True)
+        columns['Düzenlenmiş Ürün Kodu'] = urunkodu.str.replace(r'^[^-]*-', "", regex=True)
         
-        # 4-7. Temel sütunlar - vektörel
-        basic_cols = ['ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD']
+        # 4-8. Temel sütunlar ve kategoriler - vektörel
+        basic_cols = ['ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD'] + [f'CAT{i}' for i in range(1, 8)]
         for col in basic_cols:
             if col in df_filtered.columns:
-                new_df[col] = df_filtered[col].fillna(0)
-        
-        # 8. Kategoriler - vektörel
-        for i in range(1, 8):
-            cat_col = f'CAT{i}'
-            if cat_col in df_filtered.columns:
-                new_df[f'CAT{i}'] = df_filtered[cat_col].fillna(0)
-        
-        # 9. Depo verileri - vektörel işlem
-        depo_mapping = {
-            '02-': 'MASLAK',
-            'D01-': 'İMES',
-            'TD-E01-': 'İKİTELLİ',
-            'E01-': 'İKİTELLİ',
-            '04-': 'BOLU',
-            'A01-': 'ANKARA'
-        }
+                columns[col] = df_filtered[col].fillna(0)
         
-        # Debug: Show available columns for İKİTELLİ
-        ikitelli_related_cols = [col for col in df_filtered.columns if any(keyword in col.upper() for keyword in ['İKİTELLİ', 'IKITELLI', 'TD-E01', 'E01', 'IKI'])]
-        if ikitelli_related_cols:
-            pass
-        else:
+        # 9. Depo verileri - plandaki kaynak -> hedef eşleşmesi
+        if not plan.has_ikitelli_columns and not quiet:
             st.warning("⚠️ İKİTELLİ ile ilgili kolon bulunamadı!")
             st.info(f"🔍 Mevcut tüm kolonlar: {list(df_filtered.columns)}")
         
-        for old_prefix, new_name in depo_mapping.items():
-            for col_type, new_type in zip(['DEVIR', 'ALIS', 'SATIS', 'STOK'],
-                                         ['DEVIR', 'ALIŞ', 'SATIS', 'STOK']):
-                old_col = f"{old_prefix}{col_type}"
-                if old_col in df_filtered.columns:
-                    # Vektörel işlem - boş satırlara 0 değeri ata
-                    col_data = df_filtered[old_col].fillna(0)
-                    if pd.api.types.is_numeric_dtype(col_data):
-                        col_data = col_data.astype(float)
-                    else:
-                        col_data = col_data.astype(str)
-                    new_df[f"{new_name} {new_type}"] = col_data.astype('string')
+        for new_col, old_col in plan.depo_renames:
+            if old_col is not None:
+                # Vektörel işlem - boş satırlara 0 değeri ata
+                col_data = df_filtered[old_col].fillna(0)
+                if pd.api.types.is_numeric_dtype(col_data):
+                    col_data = col_data.astype(float)
                 else:
-                    # Eksik sütun için 0 değeri
-                    new_df[f"{new_name} {new_type}"] = '0'
-                    # Debug: Show which columns are missing
-                    if new_name == 'İKİTELLİ':
-                        st.warning(f"⚠️ İKİTELLİ kolonu bulunamadı: {old_col}")
-        
-        # İKİTELLİ için alternatif kolon arama - daha esnek yaklaşım
-        if 'İKİTELLİ DEVIR' in new_df.columns and new_df['İKİTELLİ DEVIR'].iloc[0] == '0':
-            st.info("🔍 İKİTELLİ kolonları için alternatif arama yapılıyor...")
+                    col_data = col_data.astype(str)
+                columns[new_col] = col_data.astype('string')
+            else:
+                # Eksik sütun için '0' değeri
+                columns[new_col] = pd.Series('0', index=df_filtered.index, dtype=object)
+        
+        if plan.missing_ikitelli and not quiet:
+            st.warning(f"⚠️ İKİTELLİ kolonları bulunamadı: {list(plan.missing_ikitelli)}")
+        
+        # İKİTELLİ için alternatif kolonlar - eşleşmeler planda hazır
+        if 'İKİTELLİ DEVIR' in columns and columns['İKİTELLİ DEVIR'].iloc[0] == '0':
+            for new_col, old_col in plan.ikitelli_fallbacks:
+                columns[new_col] = df_filtered[old_col].fillna(0).astype('string')
             
-            # Farklı kolon isimlendirme kalıplarını dene
-            alternative_patterns = [
-                'IKITELLI', 'IKI', 'IKIT', 'IKITELLI', 'IKITELLİ',
-                'TD-E01', 'E01', 'TD-E', 'E-', 'TD-', 'E-01'
-            ]
-            
-            for pattern in alternative_patterns:
-                pattern_cols = [col for col in df_filtered.columns if pattern.upper() in col.upper()]
-                if pattern_cols:
-                    # Pattern ile bulunan kolonlar - debug mesajları kaldırıldı
-                    
-                    # Bu kolonları İKİTELLİ kolonlarına eşleştirmeye çalış
-                    for col in pattern_cols:
-                        col_upper = col.upper()
-                        if 'DEVIR' in col_upper or 'DEVİR' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ DEVIR'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ DEVIR için {col} kullanıldı")
-                        elif 'ALIS' in col_upper or 'ALIŞ' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ ALIŞ'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ ALIŞ için {col} kullanıldı")
-                        elif 'SATIS' in col_upper or 'SATIŞ' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ SATIS'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ SATIS için {col} kullanıldı")
-                        elif 'STOK' in col_upper:
-                            col_data = df_filtered[col].fillna(0)
-                            new_df['İKİTELLİ STOK'] = col_data.astype('string')
-                            st.success(f"✅ İKİTELLİ STOK için {col} kullanıldı")
-        
-        # 10. Tedarikçi bakiye kolonları - vektörel
-        tedarikci_cols = [
-            'İmes Tedarikçi Bakiye', 'Ankara Tedarikçi Bakiye', 
-            'Bolu Tedarikçi Bakiye', 'Maslak Tedarikçi Bakiye', 'İkitelli Tedarikçi Bakiye'
-        ]
-        
-        for col in tedarikci_cols:
-            new_df[col] = '0'
-        
-        # 11. Dinamik ay başlıkları - önümüzdeki 2 ay
-        current_month = datetime.datetime.now().month
-        months = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
-                 'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık']
-        
-        # Önümüzdeki 2 ay hesaplama
-        first_next_month_name = months[current_month % 12]      # Gelecek ay (bir sonraki ay)
-        second_next_month_name = months[(current_month + 1) % 12]  # İkinci gelecek ay
-        
-        # Ay bilgilerini hesapla - debug mesajları kaldırıldı
-        
-        # Vektörel ay başlıkları - önümüzdeki 2 ay
-        for i in range(5):
-            new_df[f'{first_next_month_name}_{i+1}'] = 0
-            new_df[f'{second_next_month_name}_{i+1}'] = 0
-        
-        # 12. Diğer sütunlar - vektörel
-        other_cols = {
-            'TOPL.FAT.ADT': 'TOPL.FAT.ADT',
-            'MÜŞT.SAY.': 'MÜŞT.SAY.',
-            'SATıŞ FIYATı': 'SATıŞ FIYATı',
-            'DÖVIZ CINSI (S)': 'DÖVIZ CINSI (S)'
-        }
+            if plan.ikitelli_fallbacks and not quiet:
+                used = ', '.join(f"{new_col} ← {old_col}" for new_col, old_col in plan.ikitelli_fallbacks)
+                st.success(f"✅ İKİTELLİ için alternatif kolonlar kullanıldı: {used}")
         
-        for old, new in other_cols.items():
-            if old in df_filtered.columns:
-                new_df[new] = df_filtered[old].fillna(0)
-        
-        # 13. URUNKODU (DÖVIZ CINSI'den sonra)
-        new_df['URUNKODU_3'] = df_filtered['URUNKODU'].fillna(0)
-        
-        # 14. Eksik başlıkları geri getir - vektörel
-        # not, İSK, PRİM, BÜTÇE, liste, TD SF, Net Fiyat Kampanyası
-        new_df['not'] = 0
-        new_df['İSK'] = 0
-        new_df['PRİM'] = 0
-        new_df['BÜTÇE'] = 0
-        new_df['liste'] = 0
-        new_df['TD SF'] = 0
-        new_df['Net Fiyat Kampanyası'] = 0
-        
-        # Kampanya Tipi
-        new_df['Kampanya Tipi'] = 0
-        
-        # Toplam İsk
-        new_df['Toplam İsk'] = 0
-        
-        # Depo Bakiye kolonları
-        new_df['Maslak Depo Bakiye'] = 0
-        new_df['Bolu Depo Bakiye'] = 0
-        new_df['İmes Depo Bakiye'] = 0
-        new_df['Ankara Depo Bakiye'] = 0
-        new_df['İkitelli Depo Bakiye'] = 0
-        
-        # Toplam Depo Bakiye - otomatik hesaplama
-        new_df['Toplam Depo Bakiye'] = 0
-        
-        # Tedarikçi bakiye kolonları - İkitelli Tedarikçi Bakiye eklendi
-        tedarikci_cols = [
-            'İmes Tedarikçi Bakiye', 'Ankara Tedarikçi Bakiye', 
-            'Bolu Tedarikçi Bakiye', 'Maslak Tedarikçi Bakiye', 'İkitelli Tedarikçi Bakiye'
-        ]
-        
-        for col in tedarikci_cols:
-            new_df[col] = 0
-        
-        # Paket Adetleri
-        new_df['Paket Adetleri'] = 0
-        
-        # Sipariş kolonları
-        new_df['Maslak Sipariş'] = 0
-        new_df['Bolu Sipariş'] = 0
-        new_df['İmes Sipariş'] = 0
-        new_df['Ankara Sipariş'] = 0
-        new_df['İkitelli Sipariş'] = 0
-        
-        # Sütun sıralamasını düzelt - verilen sıraya göre (64 adet)
-        # Dinamik ay başlıkları oluştur
-        dynamic_month_cols = []
-        for i in range(1, 6):  # 1'den 5'e kadar
-            dynamic_month_cols.append(f'{first_next_month_name}_{i}')
-            dynamic_month_cols.append(f'{second_next_month_name}_{i}')
-        
-        desired_order = [
-            'URUNKODU', 'Düzenlenmiş Ürün Kodu', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD',
-            'CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7',
-            # Depo kolonları (sıralama: İMES, İKİTELLİ, ANKARA, MASLAK, BOLU)
-            'İMES DEVIR', 'İMES ALIŞ', 'İMES SATIS', 'İMES STOK',
-            'İKİTELLİ DEVIR', 'İKİTELLİ ALIŞ', 'İKİTELLİ SATIS', 'İKİTELLİ STOK',
-            'ANKARA DEVIR', 'ANKARA ALIŞ', 'ANKARA SATIS', 'ANKARA STOK',
-            'MASLAK DEVIR', 'MASLAK ALIŞ', 'MASLAK SATIS', 'MASLAK STOK',
-            'BOLU DEVIR', 'BOLU ALIŞ', 'BOLU SATIS', 'BOLU STOK',
-            # not
-            'not',
-            # Depo Bakiye kolonları (sıralama: İmes, İkitelli, Ankara, Maslak, Bolu)
-            'İmes Depo Bakiye', 'İkitelli Depo Bakiye', 'Ankara Depo Bakiye', 'Maslak Depo Bakiye', 'Bolu Depo Bakiye',
-            # Kampanya Tipi
-            'Kampanya Tipi',
-            # Toplam İsk
-            'Toplam İsk',
-            # Toplam Depo Bakiye
-            'Toplam Depo Bakiye',
-            # Tedarikçi bakiye kolonları (sıralama: İmes, İkitelli, Ankara, Maslak, Bolu)
-            'İmes Tedarikçi Bakiye', 'İkitelli Tedarikçi Bakiye', 'Ankara Tedarikçi Bakiye', 'Maslak Tedarikçi Bakiye', 'Bolu Tedarikçi Bakiye',
-            # Paket Adetleri
-            'Paket Adetleri',
-            # Sipariş kolonları (sıralama: İmes, İkitelli, Ankara, Maslak, Bolu)
-            'İmes Sipariş', 'İkitelli Sipariş', 'Ankara Sipariş', 'Maslak Sipariş', 'Bolu Sipariş',
-            # Dinamik ay başlıkları
-        ] + dynamic_month_cols + [
-            # Diğer sütunlar
-            'TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)', 'URUNKODU_3',
-            # Son başlıklar
-            'Kampanya Tipi', 'not', 'İSK', 'PRİM', 'BÜTÇE', 'liste', 'TD SF', 'Toplam İsk', 'Net Fiyat Kampanyası'
-        ]
-        
-        # Mevcut sütunları filtrele ve sırala
-        available_cols = [col for col in desired_order if col in new_df.columns]
-        if len(available_cols) > 0:
-            new_df = new_df[available_cols]
-        
-        # Toplam Depo Bakiye hesaplama
-        depo_bakiye_cols = ['İmes Depo Bakiye', 'İkitelli Depo Bakiye', 'Ankara Depo Bakiye', 'Maslak Depo Bakiye', 'Bolu Depo Bakiye']
-        available_depo_cols = [col for col in depo_bakiye_cols if col in new_df.columns]
-        
-        if available_depo_cols and 'Toplam Depo Bakiye' in new_df.columns:
-            # Sayısal değerlere çevir ve topla
-            for col in available_depo_cols:
-                new_df[col] = pd.to_numeric(new_df[col], errors='coerce').fillna(0)
-            
-            # Toplam hesapla
-            new_df['Toplam Depo Bakiye'] = new_df[available_depo_cols].sum(axis=1)
+        # 12-13. Diğer sütunlar ve URUNKODU (DÖVIZ CINSI'den sonra)
+        for col in ['TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)']:
+            if col in df_filtered.columns:
+                columns[col] = df_filtered[col].fillna(0)
+        columns['URUNKODU_3'] = urunkodu.copy()
+        
+        # 10-11, 14. Sabit 0 kolonları (bakiye, sipariş, dinamik ay başlıkları, kampanya) - tek int64 blok
+        layout = resolve_output_layout(next_month_names(datetime.datetime.now().month))
+        # Satır başına bir kolon - her kolon tek ayırımın bitişik bir dilimi
+        zeros = np.zeros((len(layout.zero_columns), len(df_filtered)), dtype=np.int64)
+        for i, col in enumerate(layout.zero_columns):
+            columns[col] = zeros[i]
+        
+        # Nihai sıra. Sözlük anahtarı tekrar edemeyeceği için tablo konum anahtarlarıyla kurulup adlandırılır;
+        # tekrarlanan kolonlar (Kampanya Tipi, not, Toplam İsk) ilk kopyayla bellek paylaşmasın diye kopyalanır.
+        # copy=False: kolonlar yeniden kopyalanmaz. Toplam Depo Bakiye, depo bakiyeleri henüz 0 olduğundan 0 başlar.
+        names = [col for col in layout.columns if col in columns]
+        arrays = {}
+        seen = set()
+        for position, col in enumerate(names):
+            arrays[position] = columns[col].copy() if col in seen else columns[col]
+            seen.add(col)
+        
+        new_df = pd.DataFrame(arrays, index=df_filtered.index, copy=False)
+        new_df.columns = names
+        del columns, arrays, zeros
         
         # İKİTELLİ kolonlarının son durumunu kontrol et
         ikitelli_cols = ['İKİTELLİ DEVIR', 'İKİTELLİ ALIŞ', 'İKİTELLİ SATIS', 'İKİTELLİ STOK']
@@ -455,10 +329,12 @@ def transform_data_ultra_fast(df):
                     empty_ikitelli_cols.append(col)
         
         if empty_ikitelli_cols:
-            st.warning(f"⚠️ Boş kalan İKİTELLİ kolonları: {empty_ikitelli_cols}")
+            if not quiet:
+                st.warning(f"⚠️ Boş kalan İKİTELLİ kolonları: {empty_ikitelli_cols}")
 
         else:
-            st.success("✅ İKİTELLİ kolonları başarıyla dolduruldu!")
+            if not quiet:
+                st.success("✅ İKİTELLİ kolonları başarıyla dolduruldu!")
         
         return new_df
     
@@ -466,15 +342,104 @@ def transform_data_ultra_fast(df):
         st.error(f"Dönüşüm hatası: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data(show_spinner="Inbound verisi işleniyor...", ttl=3600)
-def process_inbound_data(main_df, inbound_file):
-    """Inbound Excel dosyasını işle ve depo bakiye kolonlarına ekle"""
+def sheet_codes(frame):
+    """Ana tablonun kod indeksi - tablo gece hazırlığından geliyorsa hazır indeksle başlar"""
+    try:
+        state = load_index(frame)
+    except Exception:
+        state = None
+    sheet = SheetCodes.from_state(frame, state) if state else None
+    return sheet or SheetCodes(CodeTable(), frame)
+
+def spill_stage(df, stage):
+    """Aşama çıktısını diske taşı - taşınamazsa tabloyu bellekte bırak"""
+    try:
+        return spill_frame(df, stage)
+    except Exception as e:
+        st.warning(f"⚠️ '{stage}' çıktısı diske taşınamadı, bellekte tutulacak: {str(e)}")
+        return df
+
+@st.cache_data(show_spinner="Veri dönüştürülüyor...", ttl=3600)
+def transform_data_ultra_fast(df, spill=False):
+    """Maksimum hızlı veri dönüştürme - spill=True ise sonuç diske taşınır"""
+    result = transform_frame(df)
+    return spill_stage(result, 'donusum') if spill and len(result) > 0 else result
+
+@st.cache_data(max_entries=2, show_spinner="Hazır tablo yükleniyor...", ttl=3600)
+def load_prepared_sheet(source_key, spill=False):
+    """Gece hazırlanmış dönüşüm tablosu (siparis.hazirlik) - yoksa None"""
+    frame = load_prepared(source_key)
+    return spill_stage(frame, 'donusum') if frame is not None and spill else frame
+
+@st.cache_data(show_spinner="Inbound verisi işleniyor...", ttl=3600, hash_funcs=HASH_FUNCS)
+def process_inbound_data(main_df, inbound_file, spill=False):
+    """Inbound işleme - girdi DataFrame veya diske taşınmış tablo olabilir"""
+    result = process_inbound_frame(as_frame(main_df), inbound_file)
+    return spill_stage(result, 'inbound') if spill else result
+
+def process_inbound_ledger(main_df, inbound_file, spill=False):
+    """Defterli inbound işleme - önbelleğe alınmaz: sonuç ortak defterin o anki haline (sıfırlama,
+    diğer oturumların yüklemeleri, dönem) bağlıdır ve her çağrı yeni satırları deftere yazar"""
+    result = process_inbound_frame(as_frame(main_df), inbound_file, use_ledger=True)
+    return spill_stage(result, 'inbound') if spill else result
+
+def update_inbound_ledger(inbound_df):
+    """Yeni irsaliye satırlarını deftere işle - dönemin (key, depo, quantity) toplamlarını döndür"""
+    from siparis.irsaliye_defteri import InboundLedger, current_period
+
+    ledger = InboundLedger()
+    try:
+        new_count, known_count, removed_count = ledger.ingest(inbound_df)
+        contributions = ledger.contributions()
+    finally:
+        ledger.close()
+    st.info(f"📒 Inbound defteri ({current_period()}): {new_count:,} yeni/değişen satır işlendi, "
+            f"{known_count:,} satır önceki yüklemelerden" +
+            (f", belgelerden çıkarılan {removed_count:,} satır silindi" if removed_count else ""))
+    return contributions
+
+def update_total_depo(result_df):
+    """Toplam Depo Bakiye kolonunu depo bakiyelerinden yeniden hesapla"""
+    if 'Toplam Depo Bakiye' in result_df.columns:
+        available_depo_cols = list(resolve_output_plan(tuple(result_df.columns)).depo_balance_columns)
+        for col in available_depo_cols:
+            result_df[col] = pd.to_numeric(result_df[col], errors='coerce').fillna(0)
+        result_df['Toplam Depo Bakiye'] = result_df[available_depo_cols].sum(axis=1)
+
+def apply_inbound_contributions(main_df, contributions):
+    """Defterdeki (kod, depo) toplamlarını depo bakiye kolonlarına ekle"""
+    result_df = main_df.copy()
+    for depo in DEPO_NAMES:
+        if f"{depo} Depo Bakiye" not in result_df.columns:
+            result_df[f"{depo} Depo Bakiye"] = 0
+
+    sheet = sheet_codes(result_df)
+    codes = sheet.table
+    code_ids = codes.encode(contributions['key'])
+    balances = BalanceAccumulator(len(result_df))
+    matched = 0
+    for code_id, depo_adi, quantity in zip(code_ids, contributions['depo'], contributions['quantity']):
+        match_rows = sheet.rows(code_id, MATCH_BOTH)
+        if len(match_rows) > 0:
+            balances.add(match_rows, f"{depo_adi} Depo Bakiye", quantity)
+            matched += 1
+    balances.apply(result_df)
+    update_total_depo(result_df)
+
+    st.success(f"✅ Inbound defteri uygulandı: {matched:,}/{len(contributions):,} kod/depo toplamı eşleşti")
+    return result_df
+
+def process_inbound_frame(main_df, inbound_file, use_ledger=False):
+    """Inbound Excel dosyasını işle ve depo bakiye kolonlarına ekle
+
+    use_ledger: yalnızca defterde olmayan irsaliye satırları işlenir, bakiyeler defter toplamlarından gelir
+    """
     try:
         if inbound_file is None:
             return main_df
         
         # Inbound dosyasını oku
-        inbound_df = pd.read_excel(inbound_file, engine='openpyxl')
+        inbound_df = read_uploaded(inbound_file, 'inbound')
         
         # Gerekli kolonları kontrol et
         required_cols = ['Depo', 'Ürün Kodu', 'İrsaliye Miktarı']
@@ -489,6 +454,11 @@ def process_inbound_data(main_df, inbound_file):
         if not belge_no_2_exists:
             st.warning("⚠️ 'Belge No 2' kolonu bulunamadı - GE- ürünleri işlenemeyecek")
         
+        if use_ledger:
+            if belge_no_2_exists:
+                return apply_inbound_contributions(main_df, update_inbound_ledger(inbound_df))
+            st.warning("⚠️ Inbound defteri 'Belge No 2' olmadan kullanılamaz - dosyanın tamamı işleniyor")
+        
         # Inbound verilerini filtrele
         st.info("🔍 Inbound verileri filtreleniyor...")
         
@@ -557,10 +527,15 @@ def process_inbound_data(main_df, inbound_file):
         total_rows = len(inbound_df)
         processed_rows = 0
         
-        for _, row in inbound_df.iterrows():
-            depo_kodu = str(row['Depo']).strip().upper()
-            urun_kodu = str(row['Ürün Kodu']).strip()
-            irsaliye_miktari = pd.to_numeric(row['İrsaliye Miktarı'], errors='coerce')
+        # Ana tablo ve inbound kodları ortak tabloda int32 kimliklere çevrilir; katkılar biriktirilip en sonda yazılır
+        sheet = sheet_codes(result_df)
+        codes = sheet.table
+        inbound_ids = codes.encode(compact_codes(inbound_df['Ürün Kodu']))
+        balances = BalanceAccumulator(len(result_df))
+        
+        for depo_value, code_id, irsaliye_value in zip(inbound_df['Depo'], inbound_ids, inbound_df['İrsaliye Miktarı']):
+            depo_kodu = str(depo_value).strip().upper()
+            irsaliye_miktari = pd.to_numeric(irsaliye_value, errors='coerce')
             
             if pd.isna(irsaliye_miktari) or irsaliye_miktari <= 0:
                 continue
@@ -587,29 +562,20 @@ def process_inbound_data(main_df, inbound_file):
             # Eşleşen depo kodunu kaydet
             matched_depos.add(f"{depo_kodu} → {depo_adi}")
             
-            # Ürün kodu ile eşleştir (hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile)
-            urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-            duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-            urun_kodu_clean = urun_kodu.replace(' ', '').upper()
-            
-            # Tam eşleştirme yap
-            match_mask_urun = urunkodu_clean == urun_kodu_clean
-            match_mask_duzen = duzenlenmis_clean == urun_kodu_clean
-            match_mask = match_mask_urun | match_mask_duzen
+            # Ürün kodu ile tam eşleştir (hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile)
+            match_rows = sheet.rows(code_id, MATCH_BOTH)
             
-            if match_mask.sum() > 0:
+            if len(match_rows) > 0:
                 # İlgili depo bakiye kolonunu güncelle (toplama ile)
                 depo_bakiye_col = f"{depo_adi} Depo Bakiye"
                 if depo_bakiye_col in result_df.columns:
-                    result_df.loc[match_mask, depo_bakiye_col] += irsaliye_miktari
+                    balances.add(match_rows, depo_bakiye_col, irsaliye_miktari)
                     processed_rows += 1
         
+        balances.apply(result_df)
+        
         # Toplam Depo Bakiye hesapla
-        if 'Toplam Depo Bakiye' in result_df.columns:
-            available_depo_cols = [col for col in depo_bakiye_cols if col in result_df.columns]
-            for col in available_depo_cols:
-                result_df[col] = pd.to_numeric(result_df[col], errors='coerce').fillna(0)
-            result_df['Toplam Depo Bakiye'] = result_df[available_depo_cols].sum(axis=1)
+        update_total_depo(result_df)
         
         # Debug bilgilerini göster
         st.success(f"✅ Inbound verisi işlendi: {processed_rows}/{total_rows} satır işlendi")
@@ -623,38 +589,63 @@ def process_inbound_data(main_df, inbound_file):
         st.error(f"❌ Inbound veri işleme hatası: {str(e)}")
         return main_df
 
-@st.cache_data(show_spinner="Marka eşleştirme yapılıyor...", ttl=3600)
-def match_brands_parallel(main_df, uploaded_files):
-    """Paralel marka eşleştirme"""
+@st.cache_data(show_spinner="Marka eşleştirme yapılıyor...", ttl=3600, hash_funcs=HASH_FUNCS)
+def match_brands_parallel(main_df, uploaded_files, spill=False, fuzzy_config=None):
+    """Marka eşleştirme - girdi DataFrame veya diske taşınmış tablo olabilir (fuzzy süre sınırı yok)"""
+    result = match_brands_frame(as_frame(main_df), uploaded_files, fuzzy_config)
+    return spill_stage(result, 'eslestirme') if spill else result
+
+def match_brands_budgeted(main_df, uploaded_files, spill=False, fuzzy_config=None, fuzzy_budget=FUZZY_TIME_BUDGET):
+    """Fuzzy süre bütçeli marka eşleştirme - önbelleğe alınmaz: bütçe dolunca aranmayan kodlar
+    saate bağlıdır, kısmi sonuç aynı anahtarla önbellekte kalmamalı"""
+    result = match_brands_frame(as_frame(main_df), uploaded_files, fuzzy_config, fuzzy_budget)
+    return spill_stage(result, 'eslestirme') if spill else result
+
+def match_brands_frame(main_df, uploaded_files, fuzzy_config=None, fuzzy_budget=FUZZY_TIME_BUDGET):
+    """Paralel marka eşleştirme
+
+    fuzzy_config: marka -> {'enabled', 'threshold'} (verilmeyen markalar FUZZY_BRANDS varsayılanıyla)
+    """
+    code_store = None
     try:
-        # Marka-Excel eşleştirme sözlüğü
-        brand_excel_mapping = {
-            'SCHAEFFLER LUK': 'excel1',
-            'SCHAFLERR': 'excel1',  # Schaflerr için alternatif isim
-            'ZF İTHAL': 'excel2', 
-            'DELPHI': 'excel3',
-            'ZF YERLİ': 'excel4',
-            'VALEO': 'excel5',
-            'FILTRON': 'excel6',
-            'MANN': 'excel7',
-            'BOSCH': 'excel8'
-        }
-        
         # Ana DataFrame'i kopyala
         result_df = main_df.copy()
         
+        # Marka katkıları satır konumlarıyla biriktirilir, tabloya en sonda bir kez yazılır
+        balances = BalanceAccumulator(len(result_df))
+        
+        # Kalıcı kod sözlüğü - önceki çalıştırmaların fuzzy sonuçları tekrar hesaplanmaz
+        try:
+            code_store = CodeDictionary()
+        except Exception as e:
+            code_store = None
+            st.warning(f"⚠️ Kod sözlüğü açılamadı, fuzzy eşleştirme sözlüksüz yapılacak: {str(e)}")
+        
+        # Tam eşleşmeyen kodlar marka sonunda toplu fuzzy ile çözülür (süre bütçesi tüm çalıştırma için)
+        fuzzy = FuzzyMatcher(fuzzy_config, code_store, time_budget=fuzzy_budget)
+        
+        # Ana tablo ve tüm marka dosyalarının kodları ortak tabloda int32 kimliklere çevrilir
+        sheet = sheet_codes(result_df)
+        codes = sheet.table
+        
         # CAT4 kolonunu kontrol et
         if 'CAT4' not in main_df.columns:
             st.warning("CAT4 kolonu bulunamadı!")
             return main_df
         
+        # CAT4 bir kez factorize edilir - tüm marka maskeleri bu indeksten gelir
+        cat4_index = BrandMaskIndex(main_df['CAT4'])
+        zf_scope = cat4_index.mask(ZF_CAT4_TERMS).to_numpy()
+        
         # Paralel işleme için marka verilerini topla
         brand_tasks = []
-        for brand, excel_key in brand_excel_mapping.items():
+        for brand, excel_key in BRAND_EXCEL_MAPPING.items():
             if excel_key in uploaded_files and uploaded_files[excel_key] is not None:
                 brand_tasks.append((brand, uploaded_files[excel_key]))
         
         # Paralel marka verisi okuma
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
         brand_data = {}
         with ThreadPoolExecutor(max_workers=4) as executor:
             future_to_brand = {
@@ -701,23 +692,17 @@ def match_brands_parallel(main_df, uploaded_files):
                 st.info(f"🔍 {brand} için arama terimleri: {search_terms}")
                 
                 # Tüm arama terimlerini dene
-                brand_mask = pd.Series([False] * len(main_df))
-                for search_term in search_terms:
-                    temp_mask = main_df['CAT4'].str.contains(search_term, case=False, na=False)
-                    brand_mask = brand_mask | temp_mask
+                brand_mask = cat4_index.mask(search_terms)
                 
                 brand_count = brand_mask.sum()
                 
                 # CAT4 kontrolü - debug mesajları kaldırıldı
                 if brand_count == 0:
-                    unique_cat4 = main_df['CAT4'].dropna().unique()
-
-                    
                     # CAT4'te tam eşleşme ara
-                    exact_matches = main_df[main_df['CAT4'] == search_terms[0]]
-                    if len(exact_matches) > 0:
-                        st.success(f"✅ Tam eşleşme bulundu: {search_terms[0]} - {len(exact_matches)} satır")
-                        brand_mask = main_df['CAT4'] == search_terms[0]
+                    exact_mask = cat4_index.exact(search_terms[0])
+                    if exact_mask.any():
+                        st.success(f"✅ Tam eşleşme bulundu: {search_terms[0]} - {int(exact_mask.sum())} satır")
+                        brand_mask = exact_mask
                         brand_count = brand_mask.sum()
                 else:
                     st.success(f"✅ {brand} markası {brand_count} ürün için bulundu")
@@ -761,19 +746,12 @@ def match_brands_parallel(main_df, uploaded_files):
                             # PO Number(L) kolonunu kontrol et
                             if 'PO Number(L)' in schaeffler_df.columns:
                                 # Tedarikçi kodlarını belirle
-                                schaeffler_df['Tedarikçi'] = schaeffler_df['PO Number(L)'].astype(str).apply(
-                                    lambda x: 'İmes' if 'IME' in x or '285' in x
-                                    else 'Ankara' if 'ANK' in x or '321' in x
-                                    else 'Bolu' if '322' in x
-                                    else 'Maslak' if '323' in x
-                                    else 'İkitelli' if 'IKI' in x or '324' in x
-                                    else 'Diğer'
-                                )
+                                schaeffler_df['Tedarikçi'] = PO_BRANCHES(schaeffler_df['PO Number(L)'])
                                 
                                 # Catalogue Number işleme - Geliştirilmiş
                                 if 'Catalogue number' in schaeffler_df.columns:
                                     # Geliştirilmiş Schaeffler kod işleme
-                                    schaeffler_df['Catalogue_clean'] = schaeffler_df['Catalogue number'].apply(process_schaeffler_codes)
+                                    schaeffler_df['Catalogue_clean'] = schaeffler_codes(schaeffler_df['Catalogue number'])
                                     
                                     # Catalogue number kodlarını temizle - debug mesajları kaldırıldı
                                     total_codes = len(schaeffler_df['Catalogue_clean'])
@@ -781,57 +759,38 @@ def match_brands_parallel(main_df, uploaded_files):
                                 
                                 # Ordered Quantity kontrolü
                                 if 'Ordered quantity' in schaeffler_df.columns:
+                                    # Catalogue kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir
+                                    schaeffler_df['Catalogue_id'] = codes.encode(clean_codes(schaeffler_df['Catalogue_clean']))
+                                    exact_codes = []
+                                    fuzzy_pending = []
+                                    
                                     # Tedarikçi bazında grupla ve topla
                                     for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
                                         tedarikci_data = schaeffler_df[schaeffler_df['Tedarikçi'] == tedarikci]
                                         
                                         if len(tedarikci_data) > 0:
-                                            # Catalogue number bazında topla
-                                            grouped = tedarikci_data.groupby('Catalogue_clean')['Ordered quantity'].sum().reset_index()
+                                            # Catalogue kimliği bazında topla
+                                            grouped = tedarikci_data.groupby('Catalogue_id')['Ordered quantity'].sum()
                                             
-                                            # Ana DataFrame ile eşleştir - Geliştirilmiş
-                                            for _, row in grouped.iterrows():
-                                                catalogue_num = row['Catalogue_clean']
-                                                quantity = row['Ordered quantity']
-                                                
-                                                # Geliştirilmiş eşleştirme: Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile
-                                                urunkodu_codes = result_df['URUNKODU'].astype(str).tolist()
-                                                duzenlenmis_codes = result_df['Düzenlenmiş Ürün Kodu'].astype(str).tolist()
-                                                
-                                                # Tam eşleşme kontrolü
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).apply(clean_product_code)
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).apply(clean_product_code)
-                                                catalogue_clean = clean_product_code(catalogue_num)
+                                            # Ana DataFrame ile eşleştir (URUNKODU ve Düzenlenmiş Ürün Kodu ile)
+                                            for code_id, quantity in zip(grouped.index, grouped.to_numpy()):
+                                                if code_id == MISSING:
+                                                    continue
                                                 
                                                 # Tam eşleşme
-                                                match_mask_urun = urunkodu_clean == catalogue_clean
-                                                match_mask_duzen = duzenlenmis_clean == catalogue_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
+                                                match_rows = sheet.rows(code_id, MATCH_BOTH, 'clean')
                                                 
-                                                # Eğer tam eşleşme yoksa, fuzzy matching dene
-                                                if not match_mask.any():
-                                                    best_match, best_ratio = find_best_match(catalogue_num, urunkodu_codes + duzenlenmis_codes, threshold=0.85)
-                                                    if best_match and best_ratio >= 0.85:
-                                                        # Fuzzy match bulundu, en yakın eşleşmeyi bul
-                                                        fuzzy_match_mask = (urunkodu_clean == clean_product_code(best_match)) | (duzenlenmis_clean == clean_product_code(best_match))
-                                                        if fuzzy_match_mask.any():
-                                                            match_mask = fuzzy_match_mask
-                                
-                                                # Eşleştirme işlemi - debug mesajları kaldırıldı
-                                
-                                                if match_mask.sum() > 0:
+                                                # Tam eşleşme yoksa marka sonunda toplu fuzzy eşleştirmeye bırak
+                                                if len(match_rows) == 0:
+                                                    if fuzzy.enabled('SCHAEFFLER LUK'):
+                                                        fuzzy_pending.append((codes.codes[code_id], f"{tedarikci} Tedarikçi Bakiye", quantity))
+                                                else:
+                                                    exact_codes.append(codes.codes[code_id])
                                                     # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-                                                # Eşleşme bulunamadı - sessiz devam
+                                                    balances.add(match_rows, f"{tedarikci} Tedarikçi Bakiye", quantity)
+                                    
+                                    record_exact_matches(code_store, 'SCHAEFFLER LUK', exact_codes, sheet, mode='clean')
+                                    apply_fuzzy_matches(fuzzy, 'SCHAEFFLER LUK', fuzzy_pending, sheet, balances, mode='clean')
                                 
 
                             else:
@@ -861,90 +820,55 @@ def match_brands_parallel(main_df, uploaded_files):
                             # Material kolonunu kontrol et
                             if 'Material' in zf_ithal_df.columns:
                                 # Material kodunu işle - düzeltilmiş kural
-                                zf_ithal_df['Material_clean'] = zf_ithal_df['Material'].astype(str).apply(
-                                    lambda x: x.split(':')[1].replace(' ', '') if ':' in x and (x.startswith('LF:') or x.startswith('SX:'))  # LF: veya SX: ile başlıyorsa : sonrasını al
-                                    else x.split(':')[0].strip() if ':' in x and not (x.startswith('LF:') or x.startswith('SX:'))  # Diğerlerinde : öncesini al
-                                    else x.replace(' ', '')  # : yoksa boşlukları sil
-                                )
+                                zf_ithal_df['Material_clean'] = zf_material_codes(zf_ithal_df['Material'])
                                 
                                 # Material kodlarını temizle - debug mesajları kaldırıldı
                                 
                                 # Purchase order no. kolonunu kontrol et
                                 if 'Purchase order no.' in zf_ithal_df.columns:
                                     # Tedarikçi kodlarını belirle
-                                    zf_ithal_df['Tedarikçi'] = zf_ithal_df['Purchase order no.'].astype(str).apply(
-                                        lambda x: 'İmes' if 'IME' in x or '285' in x or 'İST' in x or 'IST' in x
-                                        else 'Ankara' if 'ANK' in x or '321' in x
-                                        else 'Bolu' if '322' in x
-                                        else 'Maslak' if '323' in x
-                                        else 'İkitelli' if 'IKI' in x or '324' in x
-                                        else 'Diğer'
-                                    )
+                                    zf_ithal_df['Tedarikçi'] = ZF_BRANCHES(zf_ithal_df['Purchase order no.'])
                                     
                                     # Tedarikçi dağılımı hesapla - debug mesajları kaldırıldı
                                     tedarikci_counts = zf_ithal_df['Tedarikçi'].value_counts()
                                 
                                 # Qty.in Del. ve Open quantity kolonlarını kontrol et
                                 if 'Qty.in Del.' in zf_ithal_df.columns and 'Open quantity' in zf_ithal_df.columns:
+                                    # Material kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir (boşluksuz, büyük harf)
+                                    zf_ithal_df['Material_id'] = codes.encode(compact_codes(zf_ithal_df['Material_clean']))
+                                    fuzzy_pending = []
+                                    
                                     # Tedarikçi bazında grupla ve topla
                                     for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
                                         tedarikci_data = zf_ithal_df[zf_ithal_df['Tedarikçi'] == tedarikci]
                                         
                                         if len(tedarikci_data) > 0:
-                                            # Material_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Material_clean').agg({
+                                            # Material kimliği bazında topla
+                                            grouped = tedarikci_data.groupby('Material_id').agg({
                                                 'Qty.in Del.': 'sum',
                                                 'Open quantity': 'sum'
-                                            }).reset_index()
+                                            })
+                                            total_qty = grouped['Qty.in Del.'] + grouped['Open quantity']
                                             
                                             # Ana DataFrame ile eşleştir (LPR, Lemforder, TRW markaları)
-                                            for _, row in grouped.iterrows():
-                                                material_num = row['Material_clean']
-                                                qty_del = row['Qty.in Del.']
-                                                open_qty = row['Open quantity']
-                                                total_qty = qty_del + open_qty
-                                                
-                                                # LEMFÖRDER, TRW, SACHS markalarını ara
-                                                lemforder_mask = result_df['CAT4'].str.contains('LEMFÖRDER', case=False, na=False)
-                                                trw_mask = result_df['CAT4'].str.contains('TRW', case=False, na=False)
-                                                sachs_mask = result_df['CAT4'].str.contains('SACHS', case=False, na=False)
+                                            for code_id, quantity in zip(total_qty.index, total_qty.to_numpy()):
+                                                if code_id == MISSING:
+                                                    continue
                                                 
                                                 # Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile tam eşleştir (case-insensitive)
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.replace(' ', '', regex=False).str.upper()
-                                                material_clean = material_num.replace(' ', '').upper()
-                                                
-                                                # Tam eşleştirme yap (case-insensitive)
-                                                match_mask_urun = urunkodu_clean == material_clean
-                                                match_mask_duzen = duzenlenmis_clean == material_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
+                                                match_rows = sheet.rows(code_id, MATCH_BOTH)
                                                 
                                                 # LEMFÖRDER, TRW, SACHS markaları ile birleştir
-                                                final_mask = match_mask & (lemforder_mask | trw_mask | sachs_mask)
+                                                match_rows = match_rows[zf_scope[match_rows]]
                                                 
-                                                if final_mask.sum() > 0:
+                                                if len(match_rows) > 0:
                                                     # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[final_mask, 'İmes Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[final_mask, 'Ankara Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[final_mask, 'Bolu Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[final_mask, 'Maslak Tedarikçi Bakiye'] += total_qty
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[final_mask, 'İkitelli Tedarikçi Bakiye'] += total_qty
-
-                                                    
-
-                                                else:
-                                                    # Eşleşme bulunamadığında detaylı debug bilgisi
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
+                                                    balances.add(match_rows, f"{tedarikci} Tedarikçi Bakiye", quantity)
+                                                elif fuzzy.enabled('ZF İTHAL'):
+                                                    # Eşleşme bulunamadı - marka sonunda fuzzy denenir
+                                                    fuzzy_pending.append((codes.codes[code_id], f"{tedarikci} Tedarikçi Bakiye", quantity))
+                                    
+                                    apply_fuzzy_matches(fuzzy, 'ZF İTHAL', fuzzy_pending, sheet, balances, scope=zf_scope)
                                 
 
                             else:
@@ -979,65 +903,45 @@ def match_brands_parallel(main_df, uploaded_files):
                                 # Ship-to Name kolonunu kontrol et
                                 if 'Ship-to Name' in zf_yerli_df.columns:
                                     # Tedarikçi kodlarını belirle
-                                    zf_yerli_df['Tedarikçi'] = zf_yerli_df['Ship-to Name'].astype(str).apply(
-                                        lambda x: 'İmes' if 'IME' in x or '285' in x or 'IST' in x or 'İST' in x
-                                        else 'Ankara' if 'ANK' in x or '321' in x
-                                        else 'Bolu' if '322' in x
-                                        else 'Maslak' if '323' in x
-                                        else 'İkitelli' if 'IKI' in x or '324' in x
-                                        else 'Diğer'
-                                    )
+                                    zf_yerli_df['Tedarikçi'] = ZF_BRANCHES(zf_yerli_df['Ship-to Name'])
                                     
                                     # Tedarikçi dağılımı hesapla - debug mesajları kaldırıldı
                                     tedarikci_counts = zf_yerli_df['Tedarikçi'].value_counts()
                                 
                                 # Outstanding Quantity kolonunu kontrol et
                                 if 'Outstanding Quantity' in zf_yerli_df.columns:
+                                    # Basic No. kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir (boşluksuz, büyük harf)
+                                    zf_yerli_df['Basic_id'] = codes.encode(compact_codes(zf_yerli_df['Basic_clean']))
+                                    fuzzy_pending = []
+                                    
                                     # Tedarikçi bazında grupla ve topla
                                     for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
                                         tedarikci_data = zf_yerli_df[zf_yerli_df['Tedarikçi'] == tedarikci]
                                         
                                         if len(tedarikci_data) > 0:
-                                            # Basic_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Basic_clean')['Outstanding Quantity'].sum().reset_index()
+                                            # Basic kimliği bazında topla
+                                            grouped = tedarikci_data.groupby('Basic_id')['Outstanding Quantity'].sum()
                                             
                                             # Ana DataFrame ile eşleştir (Düzenlenmiş Ürün Kodu ile)
-                                            for _, row in grouped.iterrows():
-                                                basic_num = row['Basic_clean']
-                                                quantity = row['Outstanding Quantity']
-                                                
-                                                # LEMFÖRDER, TRW, SACHS markalarını ara
-                                                lemforder_mask = result_df['CAT4'].str.contains('LEMFÖRDER', case=False, na=False)
-                                                trw_mask = result_df['CAT4'].str.contains('TRW', case=False, na=False)
-                                                sachs_mask = result_df['CAT4'].str.contains('SACHS', case=False, na=False)
+                                            for code_id, quantity in zip(grouped.index, grouped.to_numpy()):
+                                                if code_id == MISSING:
+                                                    continue
                                                 
                                                 # Düzenlenmiş Ürün Kodu ile tam eşleştir (case-insensitive, boşlukları temizle)
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                basic_clean = basic_num.replace(' ', '').upper()
-                                                match_mask = duzenlenmis_clean == basic_clean
+                                                match_rows = sheet.rows(code_id, MATCH_DUZENLENMIS)
                                                 
                                                 # LEMFÖRDER, TRW, SACHS markaları ile birleştir
-                                                final_mask = match_mask & (lemforder_mask | trw_mask | sachs_mask)
+                                                match_rows = match_rows[zf_scope[match_rows]]
                                                 
-                                                if final_mask.sum() > 0:
+                                                if len(match_rows) > 0:
                                                     # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[final_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[final_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[final_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[final_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[final_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
+                                                    balances.add(match_rows, f"{tedarikci} Tedarikçi Bakiye", quantity)
+                                                elif fuzzy.enabled('ZF YERLİ'):
+                                                    fuzzy_pending.append((codes.codes[code_id], f"{tedarikci} Tedarikçi Bakiye", quantity))
+                                    
+                                    apply_fuzzy_matches(fuzzy, 'ZF YERLİ', fuzzy_pending, sheet, balances,
+                                                        columns=MATCH_DUZENLENMIS, scope=zf_scope)
                                 
-
                             else:
                                 st.warning("⚠️ ZF Yerli dosyasında 'Basic No.' kolonu bulunamadı")
                                 
@@ -1065,19 +969,12 @@ def match_brands_parallel(main_df, uploaded_files):
                             # Müşteri P/O No. kolonunu kontrol et
                             if 'Müşteri P/O No.' in valeo_df.columns:
                                 # Tedarikçi kodlarını belirle
-                                valeo_df['Tedarikçi'] = valeo_df['Müşteri P/O No.'].astype(str).apply(
-                                    lambda x: 'İmes' if 'IME' in x or '285' in x
-                                    else 'Ankara' if 'ANK' in x or '321' in x
-                                    else 'Bolu' if '322' in x
-                                    else 'Maslak' if '323' in x
-                                    else 'İkitelli' if 'IKI' in x or '324' in x
-                                    else 'Diğer'
-                                )
+                                valeo_df['Tedarikçi'] = PO_BRANCHES(valeo_df['Müşteri P/O No.'])
                                 
                                 # Valeo Ref. kolonunu kontrol et - Geliştirilmiş
                                 if 'Valeo Ref.' in valeo_df.columns:
                                     # Geliştirilmiş Valeo kod işleme
-                                    valeo_df['Valeo_clean'] = valeo_df['Valeo Ref.'].apply(process_valeo_codes)
+                                    valeo_df['Valeo_clean'] = valeo_codes(valeo_df['Valeo Ref.'])
                                     
                                     # Valeo Ref. kodlarını temizle - debug mesajları kaldırıldı
                                     total_codes = len(valeo_df['Valeo_clean'])
@@ -1085,66 +982,38 @@ def match_brands_parallel(main_df, uploaded_files):
                                 
                                 # Sipariş Adeti kolonunu kontrol et
                                 if 'Sipariş Adeti' in valeo_df.columns:
+                                    # Valeo kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir
+                                    valeo_df['Valeo_id'] = codes.encode(clean_codes(valeo_df['Valeo_clean']))
+                                    exact_codes = []
+                                    fuzzy_pending = []
+                                    
                                     # Tedarikçi bazında grupla ve topla
                                     for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
                                         tedarikci_data = valeo_df[valeo_df['Tedarikçi'] == tedarikci]
                                         
                                         if len(tedarikci_data) > 0:
-                                            # Valeo_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Valeo_clean')['Sipariş Adeti'].sum().reset_index()
+                                            # Valeo kimliği bazında topla
+                                            grouped = tedarikci_data.groupby('Valeo_id')['Sipariş Adeti'].sum()
                                             
-                                            # Ana DataFrame ile eşleştir - Geliştirilmiş
-                                            for _, row in grouped.iterrows():
-                                                valeo_ref = row['Valeo_clean']
-                                                quantity = row['Sipariş Adeti']
-                                                
-                                                # Geliştirilmiş eşleştirme: Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile
-                                                urunkodu_codes = result_df['URUNKODU'].astype(str).tolist()
-                                                duzenlenmis_codes = result_df['Düzenlenmiş Ürün Kodu'].astype(str).tolist()
-                                                
-                                                # Tam eşleşme kontrolü
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).apply(clean_product_code)
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).apply(clean_product_code)
-                                                valeo_clean = clean_product_code(valeo_ref)
+                                            # Ana DataFrame ile eşleştir (URUNKODU ve Düzenlenmiş Ürün Kodu ile)
+                                            for code_id, quantity in zip(grouped.index, grouped.to_numpy()):
+                                                if code_id == MISSING:
+                                                    continue
                                                 
                                                 # Tam eşleşme
-                                                match_mask_urun = urunkodu_clean == valeo_clean
-                                                match_mask_duzen = duzenlenmis_clean == valeo_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
+                                                match_rows = sheet.rows(code_id, MATCH_BOTH, 'clean')
                                                 
-                                                # Eğer tam eşleşme yoksa, fuzzy matching dene
-                                                if not match_mask.any():
-                                                    best_match, best_ratio = find_best_match(valeo_ref, urunkodu_codes + duzenlenmis_codes, threshold=0.85)
-                                                    if best_match and best_ratio >= 0.85:
-                                                        # Fuzzy match bulundu, en yakın eşleşmeyi bul
-                                                        fuzzy_match_mask = (urunkodu_clean == clean_product_code(best_match)) | (duzenlenmis_clean == clean_product_code(best_match))
-                                                        if fuzzy_match_mask.any():
-                                                            match_mask = fuzzy_match_mask
-
-                                
-                                                # Eşleştirme işlemi - debug mesajları kaldırıldı
-                                
-                                                if match_mask.sum() > 0:
-                                                    # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
+                                                # Tam eşleşme yoksa marka sonunda toplu fuzzy eşleştirmeye bırak
+                                                if len(match_rows) == 0:
+                                                    if fuzzy.enabled('VALEO'):
+                                                        fuzzy_pending.append((codes.codes[code_id], f"{tedarikci} Tedarikçi Bakiye", quantity))
                                                 else:
-                                                    # Eşleşme bulunamadığında detaylı debug bilgisi
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
+                                                    exact_codes.append(codes.codes[code_id])
+                                                    # Tedarikçi kolonunu güncelle (toplama ile)
+                                                    balances.add(match_rows, f"{tedarikci} Tedarikçi Bakiye", quantity)
+                                    
+                                    record_exact_matches(code_store, 'VALEO', exact_codes, sheet, mode='clean')
+                                    apply_fuzzy_matches(fuzzy, 'VALEO', fuzzy_pending, sheet, balances, mode='clean')
                                 
 
                             else:
@@ -1174,14 +1043,7 @@ def match_brands_parallel(main_df, uploaded_files):
                             # Şube kolonunu kontrol et
                             if 'Şube' in delphi_df.columns:
                                 # Tedarikçi kodlarını belirle
-                                delphi_df['Tedarikçi'] = delphi_df['Şube'].astype(str).apply(
-                                    lambda x: 'Bolu' if 'Teknik Dizel-Bolu' in x
-                                    else 'İmes' if 'Teknik Dizel-Ümraniye' in x
-                                    else 'Maslak' if 'Teknik Dizel-Maslak' in x
-                                    else 'Ankara' if 'Teknik Dizel-Ankara' in x
-                                    else 'İkitelli' if 'Teknik Dizel-İkitelli' in x
-                                    else 'Diğer'
-                                )
+                                delphi_df['Tedarikçi'] = DELPHI_BRANCHES(delphi_df['Şube'])
                                 
                                 # Material kolonunu kontrol et
                                 if 'Material' in delphi_df.columns:
@@ -1193,57 +1055,40 @@ def match_brands_parallel(main_df, uploaded_files):
                                 
                                 # Cum.qty kolonunu kontrol et
                                 if 'Cum.qty' in delphi_df.columns:
+                                    # Material kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir (boşluksuz, büyük harf)
+                                    delphi_df['Material_id'] = codes.encode(compact_codes(delphi_df['Material_clean']))
+                                    fuzzy_pending = []
+                                    
                                     # Tedarikçi bazında grupla ve topla
                                     for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
                                         tedarikci_data = delphi_df[delphi_df['Tedarikçi'] == tedarikci]
                                         
                                         if len(tedarikci_data) > 0:
-                                            # Material_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Material_clean')['Cum.qty'].sum().reset_index()
+                                            # Material kimliği bazında topla
+                                            grouped = tedarikci_data.groupby('Material_id')['Cum.qty'].sum()
                                             
                                             # Ana DataFrame ile eşleştir
-                                            for _, row in grouped.iterrows():
-                                                material_num = row['Material_clean']
-                                                quantity = row['Cum.qty']
+                                            for i, (code_id, quantity) in enumerate(zip(grouped.index, grouped.to_numpy())):
+                                                if code_id == MISSING:
+                                                    continue
                                                 
                                                 # Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile eşleştir
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                material_clean = material_num.replace(' ', '').upper()
-                                                
-                                                # Her iki kolonla da eşleştir
-                                                match_mask_urun = urunkodu_clean == material_clean
-                                                match_mask_duzen = duzenlenmis_clean == material_clean
-                                                match_mask = match_mask_urun | match_mask_duzen
+                                                match_rows = sheet.rows(code_id, MATCH_BOTH)
                                                 
                                                 # Debug: İlk 5 eşleştirme örneği göster
-                                                if _ < 5:
-                                                    match_count = match_mask.sum()
-                                                    match_count_urun = match_mask_urun.sum()
-                                                    match_count_duzen = match_mask_duzen.sum()
-                                                    st.info(f"🔍 Delphi eşleştirme: {material_num} → {match_count} eşleşme (URUNKODU: {match_count_urun}, Düzenlenmiş: {match_count_duzen})")
+                                                if i < 5:
+                                                    match_count_urun = len(sheet.rows(code_id, ('URUNKODU',)))
+                                                    match_count_duzen = len(sheet.rows(code_id, MATCH_DUZENLENMIS))
+                                                    st.info(f"🔍 Delphi eşleştirme: {codes.codes[code_id]} → {len(match_rows)} eşleşme (URUNKODU: {match_count_urun}, Düzenlenmiş: {match_count_duzen})")
                                                 
-                                                if match_mask.sum() > 0:
+                                                if len(match_rows) > 0:
                                                     # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
-                                                else:
-                                                    # Eşleşme bulunamadığında debug bilgisi
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
+                                                    balances.add(match_rows, f"{tedarikci} Tedarikçi Bakiye", quantity)
+                                                elif fuzzy.enabled('DELPHI'):
+                                                    # Eşleşme bulunamadı - marka sonunda fuzzy denenir
+                                                    fuzzy_pending.append((codes.codes[code_id], f"{tedarikci} Tedarikçi Bakiye", quantity))
+                                    
+                                    apply_fuzzy_matches(fuzzy, 'DELPHI', fuzzy_pending, sheet, balances, scope=brand_mask.to_numpy())
                                 
 
                             else:
@@ -1302,59 +1147,57 @@ def match_brands_parallel(main_df, uploaded_files):
                                 # Fatura ve Sevk Edilmemiş Toplam kolonunu sayısal yap
                                 bosch_df['Toplam_Adet'] = pd.to_numeric(bosch_df['Fatura ve Sevk Edilmemiş Toplam'], errors='coerce').fillna(0)
                                 
+                                # Bosch No kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir (boşluksuz, büyük harf)
+                                bosch_df['Bosch_No_Id'] = codes.encode(compact_codes(bosch_df['Bosch_No_Clean']))
+                                
                                 # Aynı Ürün Grubu ve Depo Koduna sahip aynı Bosch No lu ürünlerde adetleri topla
-                                grouped_bosch = bosch_df.groupby(['Bosch_No_Clean', 'Depo_Adi', 'Bakiye_Tipi'])['Toplam_Adet'].sum().reset_index()
+                                grouped_bosch = bosch_df.groupby(['Bosch_No_Id', 'Depo_Adi', 'Bakiye_Tipi'])['Toplam_Adet'].sum().reset_index()
+                                
+                                # CAT4 kolonunda BOSCH markası ile eşleşen ürünler (indeksten)
+                                bosch_scope = cat4_index.mask(BOSCH_CAT4_TERMS).to_numpy()
+                                
+                                fuzzy_pending = []
+                                fuzzy_codes = []
                                 
                                 # Ana DataFrame ile eşleştir
-                                for _, row in grouped_bosch.iterrows():
-                                    bosch_no = row['Bosch_No_Clean']
-                                    depo_adi = row['Depo_Adi']
-                                    bakiye_tipi = row['Bakiye_Tipi']
-                                    toplam_adet = row['Toplam_Adet']
-                                    
-                                    # CAT4 kolonunda BOSCH markası ile eşleşen ürünleri bul
-                                    bosch_mask = result_df['CAT4'].str.contains('BOSCH', case=False, na=False)
+                                for code_id, depo_adi, bakiye_tipi, toplam_adet in zip(
+                                    grouped_bosch['Bosch_No_Id'], grouped_bosch['Depo_Adi'],
+                                    grouped_bosch['Bakiye_Tipi'], grouped_bosch['Toplam_Adet']
+                                ):
+                                    if code_id == MISSING:
+                                        continue
+                                    bosch_no = codes.codes[code_id]
                                     
-                                    # Bosch No ile eşleştir (hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile)
-                                    urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                    duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                    bosch_no_clean = bosch_no.replace(' ', '').upper()
+                                    # Bosch No ile tam eşleştir (hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile)
+                                    match_rows = sheet.rows(code_id, MATCH_BOTH)
+                                    match_rows = match_rows[bosch_scope[match_rows]]
                                     
-                                    # Tam eşleştirme yap
-                                    match_mask_urun = urunkodu_clean == bosch_no_clean
-                                    match_mask_duzen = duzenlenmis_clean == bosch_no_clean
-                                    match_mask = (match_mask_urun | match_mask_duzen) & bosch_mask
-                                    
-                                    if match_mask.sum() > 0:
+                                    if len(match_rows) > 0:
                                         # Depo Bakiye veya Tedarikçi Bakiye kolonunu güncelle
-                                        if bakiye_tipi == 'Depo':
-                                            if depo_adi == 'İmes':
-                                                result_df.loc[match_mask, 'İmes Depo Bakiye'] += toplam_adet
-                                            elif depo_adi == 'Ankara':
-                                                result_df.loc[match_mask, 'Ankara Depo Bakiye'] += toplam_adet
-                                            elif depo_adi == 'Bolu':
-                                                result_df.loc[match_mask, 'Bolu Depo Bakiye'] += toplam_adet
-                                            elif depo_adi == 'Maslak':
-                                                result_df.loc[match_mask, 'Maslak Depo Bakiye'] += toplam_adet
-                                            elif depo_adi == 'İkitelli':
-                                                result_df.loc[match_mask, 'İkitelli Depo Bakiye'] += toplam_adet
-                                        
-                                        elif bakiye_tipi == 'Tedarikçi':
-                                            if depo_adi == 'İmes':
-                                                result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += toplam_adet
-                                            elif depo_adi == 'Ankara':
-                                                result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += toplam_adet
-                                            elif depo_adi == 'Bolu':
-                                                result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += toplam_adet
-                                            elif depo_adi == 'Maslak':
-                                                result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += toplam_adet
-                                            elif depo_adi == 'İkitelli':
-                                                result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += toplam_adet
+                                        if bakiye_tipi in ('Depo', 'Tedarikçi') and depo_adi in DEPO_NAMES:
+                                            balances.add(match_rows, f"{depo_adi} {bakiye_tipi} Bakiye", toplam_adet)
                                         
                                         st.success(f"✅ Bosch eşleştirme: {bosch_no} → {depo_adi} {bakiye_tipi} → {toplam_adet} adet")
+                                    elif fuzzy.enabled('BOSCH'):
+                                        # Eşleşme bulunamadı - marka sonunda fuzzy denenir, uyarı sonra verilir
+                                        if bosch_no not in fuzzy_codes:
+                                            fuzzy_codes.append(bosch_no)
+                                        if bakiye_tipi in ('Depo', 'Tedarikçi') and depo_adi in DEPO_NAMES:
+                                            fuzzy_pending.append((bosch_no, f"{depo_adi} {bakiye_tipi} Bakiye", toplam_adet))
+                                        else:
+                                            fuzzy_pending.append((bosch_no, None, 0))
                                     else:
                                         st.warning(f"⚠️ Bosch eşleştirme bulunamadı: {bosch_no}")
                                 
+                                if fuzzy_pending:
+                                    fuzzy_matches = apply_fuzzy_matches(fuzzy, 'BOSCH', fuzzy_pending, sheet, balances, scope=bosch_scope)
+                                    for bosch_no in fuzzy_codes:
+                                        if bosch_no in fuzzy_matches:
+                                            target_code, ratio = fuzzy_matches[bosch_no]
+                                            st.success(f"✅ Bosch fuzzy eşleştirme: {bosch_no} → {target_code} ({ratio:.2f})")
+                                        else:
+                                            st.warning(f"⚠️ Bosch eşleştirme bulunamadı: {bosch_no}")
+                                
                                 # Bosch işleme özeti
                                 total_bosch_products = len(grouped_bosch)
                                 st.info(f"🔍 Bosch işleme tamamlandı: {total_bosch_products} ürün grubu işlendi")
@@ -1410,69 +1253,49 @@ def match_brands_parallel(main_df, uploaded_files):
                                     sample_codes = brand_df_processed['Müşteri SatınAlma No'].head(10).tolist()
                                     
                                     # Tedarikçi kodlarını belirle
-                                    brand_df_processed['Tedarikçi'] = brand_df_processed['Müşteri SatınAlma No'].astype(str).apply(
-                                        lambda x: 'Ankara' if 'AAS' in x
-                                        else 'İmes' if 'DAS' in x
-                                        else 'Bolu' if 'BAS' in x
-                                        else 'Maslak' if 'MAS' in x
-                                        else 'İkitelli' if 'EAS' in x
-                                        else 'Diğer'
-                                    )
+                                    brand_df_processed['Tedarikçi'] = MANN_BRANCHES(brand_df_processed['Müşteri SatınAlma No'])
                                     
                                     # Tedarikçi dağılımı hesapla - debug mesajları kaldırıldı
                                     tedarikci_dist = brand_df_processed['Tedarikçi'].value_counts()
                                 
                                 # Açık Sipariş Adedi kolonunu kontrol et
                                 if 'Açık Sipariş Adedi' in brand_df_processed.columns:
+                                    fuzzy_brand = 'MANN' if 'MANN' in brand else 'FILTRON'
+                                    # Material kodları ana tabloyla ortak kod tablosunda kimliklere çevrilir (boşluksuz, büyük harf)
+                                    brand_df_processed['Material_id'] = codes.encode(compact_codes(brand_df_processed['Material_clean']))
+                                    fuzzy_pending = []
+                                    
                                     # Tedarikçi bazında grupla ve topla
                                     for tedarikci in ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']:
                                         tedarikci_data = brand_df_processed[brand_df_processed['Tedarikçi'] == tedarikci]
                                         
                                         if len(tedarikci_data) > 0:
-                                            # Material_clean bazında topla
-                                            grouped = tedarikci_data.groupby('Material_clean')['Açık Sipariş Adedi'].sum().reset_index()
+                                            # Material kimliği bazında topla
+                                            grouped = tedarikci_data.groupby('Material_id')['Açık Sipariş Adedi'].sum()
                                             
                                             # Ana DataFrame ile eşleştir
-                                            for _, row in grouped.iterrows():
-                                                material_num = row['Material_clean']
-                                                quantity = row['Açık Sipariş Adedi']
+                                            for code_id, quantity in zip(grouped.index, grouped.to_numpy()):
+                                                if code_id == MISSING:
+                                                    continue
+                                                material_code = codes.codes[code_id]
                                                 
                                                 # Hem URUNKODU hem de Düzenlenmiş Ürün Kodu ile tam eşleştir (case-insensitive)
-                                                urunkodu_clean = result_df['URUNKODU'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                duzenlenmis_clean = result_df['Düzenlenmiş Ürün Kodu'].astype(str).str.strip().str.replace(' ', '', regex=False).str.upper()
-                                                material_clean_no_space = material_num.replace(' ', '').upper()
-                                                
-                                                # Tam eşleştirme yap (case-insensitive)
-                                                match_mask_urun = urunkodu_clean == material_clean_no_space
-                                                match_mask_duzen = duzenlenmis_clean == material_clean_no_space
-                                                match_mask = match_mask_urun | match_mask_duzen
+                                                match_rows = sheet.rows(code_id, MATCH_BOTH)
                                                 
                                                 # Debug: Eşleştirme detayları
-                                                st.info(f"🔍 {brand} tam eşleştirme (case-insensitive): {material_num} → {material_clean_no_space}")
-                                                st.info(f"  URUNKODU tam eşleşme: {match_mask_urun.sum()} adet")
-                                                st.info(f"  Düzenlenmiş Ürün Kodu tam eşleşme: {match_mask_duzen.sum()} adet")
-                                                st.info(f"  Toplam tam eşleşme: {match_mask.sum()} adet")
+                                                st.info(f"🔍 {brand} tam eşleştirme (case-insensitive): {material_code}")
+                                                st.info(f"  URUNKODU tam eşleşme: {len(sheet.rows(code_id, ('URUNKODU',)))} adet")
+                                                st.info(f"  Düzenlenmiş Ürün Kodu tam eşleşme: {len(sheet.rows(code_id, MATCH_DUZENLENMIS))} adet")
+                                                st.info(f"  Toplam tam eşleşme: {len(match_rows)} adet")
                                                 
-                                                if match_mask.sum() > 0:
+                                                if len(match_rows) > 0:
                                                     # Tedarikçi kolonunu güncelle (toplama ile)
-                                                    if tedarikci == 'İmes':
-                                                        result_df.loc[match_mask, 'İmes Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Ankara':
-                                                        result_df.loc[match_mask, 'Ankara Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Bolu':
-                                                        result_df.loc[match_mask, 'Bolu Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'Maslak':
-                                                        result_df.loc[match_mask, 'Maslak Tedarikçi Bakiye'] += quantity
-
-                                                    elif tedarikci == 'İkitelli':
-                                                        result_df.loc[match_mask, 'İkitelli Tedarikçi Bakiye'] += quantity
-
-                                                else:
-                                                    # Eşleşme bulunamadı - sessiz devam
-                                                    pass
+                                                    balances.add(match_rows, f"{tedarikci} Tedarikçi Bakiye", quantity)
+                                                elif fuzzy.enabled(fuzzy_brand):
+                                                    # Eşleşme bulunamadı - marka sonunda fuzzy denenir
+                                                    fuzzy_pending.append((material_code, f"{tedarikci} Tedarikçi Bakiye", quantity))
+                                    
+                                    apply_fuzzy_matches(fuzzy, fuzzy_brand, fuzzy_pending, sheet, balances, scope=brand_mask.to_numpy())
 
                                 
                                 # Sonuç kontrolü - debug mesajları kaldırıldı
@@ -1485,9 +1308,22 @@ def match_brands_parallel(main_df, uploaded_files):
                 if brand_count == 0:
                     st.warning(f"⚠️ {brand} markası CAT4 kolonunda bulunamadı")
         
+        # Biriken marka katkılarını tabloya yaz
+        balances.apply(result_df)
+        
+        # Fuzzy eşleşen satırlar ayrı kolonda işaretlenir
+        fuzzy_tags = fuzzy.tag_column(len(result_df))
+        if fuzzy_tags is not None:
+            result_df[FUZZY_TAG_COLUMN] = fuzzy_tags
+            st.info(f"🔎 Fuzzy eşleştirme: {fuzzy.matched} kod eşleşti, satırlar '{FUZZY_TAG_COLUMN}' kolonunda işaretlendi")
+        if fuzzy.skipped:
+            st.warning(f"⏱️ Fuzzy süre bütçesi ({fuzzy_budget:g} sn) doldu: {fuzzy.skipped} kod aranmadı")
+        
+        if code_store is not None and code_store.hits:
+            st.info(f"📒 Kod sözlüğü: {code_store.hits} fuzzy eşleşme önceki çalıştırmalardan kullanıldı")
+        
         # Marka eşleştirme sonrası toplam depo bakiyesi güncelleme
-        depo_bakiye_cols = ['Maslak Depo Bakiye', 'Bolu Depo Bakiye', 'İmes Depo Bakiye', 'Ankara Depo Bakiye', 'İkitelli Depo Bakiye']
-        available_depo_cols = [col for col in depo_bakiye_cols if col in result_df.columns]
+        available_depo_cols = list(resolve_output_plan(tuple(result_df.columns)).depo_balance_columns)
         
         if available_depo_cols and 'Toplam Depo Bakiye' in result_df.columns:
             # Sayısal değerlere çevir ve topla
@@ -1514,30 +1350,54 @@ def match_brands_parallel(main_df, uploaded_files):
     except Exception as e:
         st.error(f"Marka eşleştirme hatası: {str(e)}")
         return main_df
+    finally:
+        # Erken dönüşte ve hatada da tamponlanmış sözlük kayıtları yazılır, bağlantı kapanır
+        if code_store is not None:
+            code_store.close()
+
+def clean_depo_columns(df_clean):
+    """Depo ve tedarikçi bakiye kolonlarında "-" değerlerini 0'a çevir ve sayısal yap"""
+    depo_cols = list(resolve_output_plan(tuple(df_clean.columns)).numeric_columns)
+    
+    for col in depo_cols:
+        if col in df_clean.columns:
+            # Önce string'e çevir, sonra temizlik yap
+            df_clean[col] = df_clean[col].astype(str)
+            df_clean[col] = df_clean[col].replace('-', '0')
+            df_clean[col] = df_clean[col].replace('nan', '0')
+            df_clean[col] = df_clean[col].replace('None', '0')
+            
+            # Sayısal değerlere çevir
+            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+    
+    return df_clean, depo_cols
+
+def export_totals(df_clean):
+    """Toplam Depo Bakiye'yi temizlenmiş depo bakiyelerinden hesapla (yerinde) - (çıktı planı, toplam kolonları)"""
+    output_plan = resolve_output_plan(tuple(df_clean.columns))
+    sum_columns = {}
+    if output_plan.total_column and output_plan.depo_balance_columns:
+        depo_bakiye_cols = list(output_plan.depo_balance_columns)
+        df_clean[output_plan.total_column] = df_clean[depo_bakiye_cols].sum(axis=1)
+        sum_columns[output_plan.total_column] = depo_bakiye_cols
+    return output_plan, sum_columns
+
+def prepare_export_frame(df):
+    """Dışa aktarım öncesi temizlik - (temiz tablo, temizlenen kolonlar, çıktı planı, toplam kolonları)"""
+    # DataFrame'i kopyala ve "-" değerlerini 0'a çevir
+    df_clean, depo_cols = clean_depo_columns(df.copy())
+    
+    # Toplam Depo Bakiye temizlenmiş değerlerden bir kez hesaplanır - kolonlar plandan
+    output_plan, sum_columns = export_totals(df_clean)
+    return df_clean, depo_cols, output_plan, sum_columns
 
 @st.cache_data(show_spinner="Excel oluşturuluyor...", ttl=1800)
-def format_excel_ultra_fast(df):
-    """Excel oluşturma - performans odaklı"""
+def format_excel_ultra_fast(df, total_mode='values'):
+    """Excel oluşturma - performans odaklı (total_mode: 'values' veya 'formula')"""
     try:
         output = BytesIO()
         
-        # DataFrame'i kopyala ve "-" değerlerini 0'a çevir
-        df_clean = df.copy()
-        
-        # Depo ve tedarikçi bakiye kolonlarında "-" değerlerini 0'a çevir
-        depo_cols = [col for col in df_clean.columns if any(keyword in col for keyword in 
-                   ['DEVIR', 'ALIŞ', 'SATIS', 'STOK', 'Depo Bakiye', 'Tedarikçi Bakiye'])]
-        
-        for col in depo_cols:
-            if col in df_clean.columns:
-                # Önce string'e çevir, sonra temizlik yap
-                df_clean[col] = df_clean[col].astype(str)
-                df_clean[col] = df_clean[col].replace('-', '0')
-                df_clean[col] = df_clean[col].replace('nan', '0')
-                df_clean[col] = df_clean[col].replace('None', '0')
-                
-                # Sayısal değerlere çevir
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0)
+        df_clean, depo_cols, output_plan, sum_columns = prepare_export_frame(df)
         
         # Debug: Temizlenen kolonları göster
         st.info(f"🔧 Temizlenen kolonlar: {len(depo_cols)} adet")
@@ -1546,113 +1406,164 @@ def format_excel_ultra_fast(df):
         if len(depo_cols) > 5:
             st.write(f"  ... ve {len(depo_cols)-5} kolon daha")
         
-        # Her zaman performans modu kullan - hız için
-        # Excel oluşturma ve özel format uygulama
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_clean.to_excel(writer, index=False, sheet_name='Sheet1')
-            
-            # Excel workbook ve worksheet'i al
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            
-            # Düzenlenmiş Ürün Kodu kolonuna özel format uygula
-            for col_num, col_name in enumerate(df_clean.columns, 1):
-                if col_name == 'Düzenlenmiş Ürün Kodu':
-                    # Bu kolon için özel format: metin formatı
-                    for row_num in range(2, len(df_clean) + 2):  # Excel'de satır 1 başlık
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell.number_format = '@'  # Metin formatı
-                    break
-            
-            # Toplam Depo Bakiye kolonuna formül ekle
-            toplam_depo_col = None
-            depo_bakiye_cols = []
-            
-            # Depo bakiye kolonlarını bul
-            for col_num, col_name in enumerate(df_clean.columns, 1):
-                if 'Depo Bakiye' in col_name and col_name != 'Toplam Depo Bakiye':
-                    depo_bakiye_cols.append(col_name)
-                elif col_name == 'Toplam Depo Bakiye':
-                    toplam_depo_col = col_num
-            
-            # Formül ekle
-            if toplam_depo_col and depo_bakiye_cols:
-                for row_num in range(2, len(df_clean) + 2):  # Excel'de satır 1 başlık
-                    cell = worksheet.cell(row=row_num, column=toplam_depo_col)
-                    
-                    # Formül oluştur: =SUM(Maslak Depo Bakiye:Bolu Depo Bakiye:İmes Depo Bakiye:Ankara Depo Bakiye:İkitelli Depo Bakiye)
-                    formula_parts = []
-                    for depo_col in depo_bakiye_cols:
-                        # Kolon harfini bul
-                        for col_idx, col_name in enumerate(df_clean.columns, 1):
-                            if col_name == depo_col:
-                                col_letter = chr(64 + col_idx)  # A=65, B=66, etc.
-                                if col_idx > 26:
-                                    col_letter = chr(64 + (col_idx // 26)) + chr(64 + (col_idx % 26))
-                                formula_parts.append(f"{col_letter}{row_num}")
-                                break
-                    
-                    if formula_parts:
-                        formula = f"=SUM({','.join(formula_parts)})"
-                        cell.value = formula
+        write_excel(
+            df_clean, output,
+            text_columns=output_plan.text_columns,
+            sum_columns=sum_columns,
+            total_mode=total_mode
+        )
         
         output.seek(0)
         return output.getvalue()
     
     except Exception as e:
-        # Hata durumunda da Excel oluştur
+        # Hata durumunda biçimlendirme olmadan sade Excel oluştur
+        st.warning(f"⚠️ Excel biçimlendirme hatası, sade çıktı oluşturuluyor: {str(e)}")
         output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-            
-            # Excel workbook ve worksheet'i al
-            workbook = writer.book
-            worksheet = writer.sheets['Sheet1']
-            
-            # Düzenlenmiş Ürün Kodu kolonuna özel format uygula
-            for col_num, col_name in enumerate(df.columns, 1):
-                if col_name == 'Düzenlenmiş Ürün Kodu':
-                    # Bu kolon için özel format: metin formatı
-                    for row_num in range(2, len(df) + 2):  # Excel'de satır 1 başlık
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell.number_format = '@'  # Metin formatı
-                    break
-            
-            # Toplam Depo Bakiye kolonuna formül ekle (hata durumunda)
-            toplam_depo_col = None
-            depo_bakiye_cols = []
-            
-            # Depo bakiye kolonlarını bul
-            for col_num, col_name in enumerate(df.columns, 1):
-                if 'Depo Bakiye' in col_name and col_name != 'Toplam Depo Bakiye':
-                    depo_bakiye_cols.append(col_name)
-                elif col_name == 'Toplam Depo Bakiye':
-                    toplam_depo_col = col_num
-            
-            # Formül ekle
-            if toplam_depo_col and depo_bakiye_cols:
-                for row_num in range(2, len(df) + 2):  # Excel'de satır 1 başlık
-                    cell = worksheet.cell(row=row_num, column=toplam_depo_col)
-                    
-                    # Formül oluştur
-                    formula_parts = []
-                    for depo_col in depo_bakiye_cols:
-                        # Kolon harfini bul
-                        for col_idx, col_name in enumerate(df.columns, 1):
-                            if col_name == depo_col:
-                                col_letter = chr(64 + col_idx)  # A=65, B=66, etc.
-                                if col_idx > 26:
-                                    col_letter = chr(64 + (col_idx // 26)) + chr(64 + (col_idx % 26))
-                                formula_parts.append(f"{col_letter}{row_num}")
-                                break
-                    
-                    if formula_parts:
-                        formula = f"=SUM({','.join(formula_parts)})"
-                        cell.value = formula
-        
+        write_excel(df, output)
         output.seek(0)
         return output.getvalue()
 
+@st.cache_data(show_spinner="Çıktı dosyası oluşturuluyor...", ttl=1800)
+def format_table_ultra_fast(df, output_format='parquet'):
+    """Sütunsal/CSV çıktı oluşturma (Parquet, Feather, gzip CSV)"""
+    output = BytesIO()
+    df_clean, _, _, _ = prepare_export_frame(df)
+    write_table(df_clean, output, output_format)
+    return output.getvalue()
+
+def export_data(df, output_format='xlsx', total_mode='values'):
+    """Seçilen çıktı formatında dosya içeriği"""
+    if output_format == 'xlsx':
+        return format_excel_ultra_fast(df, total_mode)
+    return format_table_ultra_fast(df, output_format)
+
+@st.cache_data(show_spinner="Depo dosyaları oluşturuluyor...", ttl=1800)
+def format_depot_zip(df, output_format='xlsx', prefix='siparis'):
+    """Depo bazında ayrı dosyalar (zip) - (zip içeriği, {depo: satır sayısı})
+
+    Süreç havuzu çağrı boyunca açılır ve kapanır (önbellekte tutulan havuz temizlemede sızar,
+    bozulursa kalıcı olarak bozuk kalırdı).
+    """
+    df_clean, _, _, _ = prepare_export_frame(df)
+    return write_depot_zip(df_clean, output_format, prefix=prefix)
+
+def depot_download(df, output_format, prefix):
+    """Depo dosyaları zip'inin indirme butonu"""
+    try:
+        zip_data, counts = format_depot_zip(df, output_format, prefix)
+        st.download_button(
+            label="🏬 Depo Dosyalarını İndir (" + ", ".join(f"{depo} {rows:,}" for depo, rows in counts.items()) + ")",
+            data=zip_data,
+            file_name=f"{prefix}_depolar_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.zip",
+            mime="application/zip"
+        )
+    except Exception as e:
+        st.error(f"Depo dosyaları oluşturma hatası: {str(e)}")
+
+def process_chunked(main_file, uploaded_files, chunk_size=DEFAULT_CHUNK_SIZE, total_mode='values', output_format='xlsx',
+                    order_rules=None, use_ledger=False):
+    """Parçalı işleme - ana dosya satır blokları halinde dönüştürülür, bakiyeler uygulanır ve diske yazılır
+
+    order_rules: verilirse Sipariş kolonları her blokta ikmal kurallarıyla hesaplanır
+    use_ledger: inbound bakiyeleri irsaliye defterinden okunur (yalnızca yeni satırlar işlenir)
+    """
+    try:
+        # Marka dosyaları küçük - tamamı okunup (kod, kolon, adet) deltalarına çevrilir
+        brand_tasks = {}
+        for brand, excel_key in BRAND_EXCEL_MAPPING.items():
+            # Aynı dosya iki marka adıyla eşlenmişse (SCHAFLERR) bir kez işlenir
+            if uploaded_files.get(excel_key) is not None and excel_key not in brand_tasks.values():
+                brand_tasks[brand] = excel_key
+        
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        brand_frames = {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(load_brand_data_parallel, uploaded_files[excel_key], brand)
+                for brand, excel_key in brand_tasks.items()
+            ]
+            for future in as_completed(futures):
+                brand_name, brand_df = future.result()
+                brand_frames[brand_name] = brand_df
+        
+        inbound_df = None
+        if uploaded_files.get('inbound_excel') is not None:
+            inbound_df = read_uploaded(uploaded_files['inbound_excel'], 'inbound')
+        
+        inbound_totals = None
+        if use_ledger and inbound_df is not None and 'Belge No 2' in inbound_df.columns:
+            inbound_totals = update_inbound_ledger(inbound_df)
+        
+        delta_groups, notes = build_delta_groups(brand_frames, inbound_df, inbound_totals=inbound_totals)
+        for note in notes:
+            st.warning(f"⚠️ {note}")
+        
+        delta_count = sum(len(group['deltas']) for group in delta_groups)
+        st.info(f"🔍 {len(delta_groups)} bakiye kaynağından {delta_count:,} kod/depo deltası hazırlandı")
+        
+        status = st.empty()
+        export_plan = {}
+        
+        def transformed_chunks():
+            processed_rows = 0
+            for chunk_no, chunk in enumerate(iter_excel_chunks(main_file, chunk_size)):
+                # Mesajlar yalnızca ilk blokta gösterilir
+                transformed = transform_frame(chunk, quiet=chunk_no > 0)
+                if len(transformed) == 0:
+                    raise ValueError(f"{chunk_no + 1}. blok dönüştürülemedi")
+                
+                apply_delta_groups(transformed, delta_groups)
+                transformed, _ = clean_depo_columns(transformed)
+                if order_rules is not None:
+                    suggest_orders(transformed, order_rules)
+                
+                # Tam tablodaki dışa aktarımla aynı plan ve toplam (prepare_export_frame)
+                output_plan, sum_columns = export_totals(transformed)
+                export_plan.setdefault('plan', (output_plan, sum_columns))
+                
+                processed_rows += len(transformed)
+                status.info(f"⚡ {chunk_no + 1}. blok yazılıyor - toplam {processed_rows:,} satır")
+                yield transformed
+        
+        # Sonuç bellek yerine geçici dosyaya satır satır yazılır
+        fd, output_path = tempfile.mkstemp(suffix=f".{OUTPUT_FORMATS[output_format]['extension']}")
+        os.close(fd)
+        try:
+            # Çıktı planı ilk bloğun başlığından - xlsx seçenekleri blok yazılmadan önce gerekir
+            chunks = transformed_chunks()
+            first = next(chunks, None)
+            if first is None:
+                raise ValueError("Ana dosyada satır yok")
+            chunks = itertools.chain([first], chunks)
+            excel_options = {}
+            if output_format == 'xlsx':
+                output_plan, sum_columns = export_plan['plan']
+                excel_options = {
+                    'text_columns': list(output_plan.text_columns),
+                    'sum_columns': sum_columns,
+                    'total_mode': total_mode
+                }
+            # Şema ilk bloktan - sonraki bloklarda sayıya çevrilemeyip boş yazılan değerler gösterilir
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always', ConversionWarning)
+                row_count = write_table_stream(chunks, output_path, output_format, **excel_options)
+            for warning in caught:
+                if issubclass(warning.category, ConversionWarning):
+                    st.warning(f"⚠️ {warning.message}")
+            with open(output_path, 'rb') as f:
+                excel_data = f.read()
+        finally:
+            os.remove(output_path)
+        
+        status.success(f"✅ Parçalı işleme tamamlandı: {row_count:,} satır")
+        return excel_data, row_count
+    
+    except Exception as e:
+        st.error(f"❌ Parçalı işleme hatası: {str(e)}")
+        return None, 0
+
 # Ana uygulama
 def main():
     # Hata yakalama ve yeniden başlatma kontrolü
@@ -1664,37 +1575,229 @@ def main():
         st.success("✅ Sayfa başarıyla yeniden başlatıldı!")
         st.session_state.kerim_restarted = False
     
+    # Paket yükleme - tüm dosyalar tek seferde, yükleyici yuvası yerine başlıklarına göre tanınır
+    with st.expander("📦 PAKET YÜKLEME (zip veya çoklu dosya)"):
+        bundle = bundle_upload(FILE_SCHEMAS, 'siparis_bundle')
+    
+    # Paketteki tüm dosyalar (ana dosya dahil) birlikte arka planda okunmaya başlar
+    if bundle is not None:
+        try:
+            start_background_parsing([
+                (file, 'ana' if file_key == 'main_file' else 'inbound' if file_key == 'inbound_excel' else 'marka')
+                for file_key, file in bundle.files.items()
+            ])
+        except Exception as e:
+            st.warning(f"⚠️ Arka plan okuma başlatılamadı, dosyalar işlem sırasında okunacak: {str(e)}")
+    
     # Dosya yükleme alanı
     with st.expander("📤 ANA EXCEL DOSYASINI YÜKLEYİN", expanded=True):
-        uploaded_file = st.file_uploader(
-            "Excel dosyasını seçin (XLSX/XLS)",
-            type=['xlsx', 'xls'],
-            key="main_file"
+        if bundle is not None and bundle.get('main_file') is not None:
+            uploaded_file = bundle.get('main_file')
+            st.caption(f"📦 Paketten: {uploaded_file.name}")
+        else:
+            uploaded_file = st.file_uploader(
+                "Excel dosyasını seçin (XLSX/XLS)",
+                type=['xlsx', 'xls'],
+                key="main_file"
+            )
+        
+        # Çok büyük dosyalar için bellek sınırlı mod
+        chunked_mode = st.checkbox(
+            "🧱 Parçalı işleme (bellek sınırlı mod)",
+            key="chunked_mode",
+            help="Ana dosya satır blokları halinde okunur, dönüştürülür ve diske yazılır. "
+                 "Bellek kullanımı dosya boyutuna değil blok boyutuna bağlıdır."
         )
+        # Gece hazırlanan dışa aktarım - dosya yüklemeden hazır tablodan başlanır
+        try:
+            prepared_export = todays_export()
+        except Exception:
+            prepared_export = None
+        use_prepared = False
+        if prepared_export and not uploaded_file:
+            use_prepared = st.checkbox(
+                f"📅 Bugünün dışa aktarımını kullan ({prepared_export['ad']}, {prepared_export['satır']:,} satır, "
+                f"{prepared_export['hazırlandı'][11:16]} hazırlandı)",
+                key="use_prepared_export"
+            )
+        
+        # Başlık doğrulaması - hatalı dosya okunup dönüştürülmeden reddedilir
+        main_blocked = False
+        if uploaded_file:
+            try:
+                main_blocked = show_problems(validate_uploads({'main_file': uploaded_file}))
+            except Exception as e:
+                st.warning(f"⚠️ Dosya doğrulanamadı: {str(e)}")
+
+        chunk_size = DEFAULT_CHUNK_SIZE
+        if chunked_mode:
+            chunk_size = st.number_input(
+                "Blok boyutu (satır)",
+                min_value=1000,
+                max_value=500000,
+                value=DEFAULT_CHUNK_SIZE,
+                step=10000,
+                key="chunk_size"
+            )
+        
+        # Toplam Depo Bakiye varsayılan olarak hesaplanmış sayı yazılır
+        total_formula = st.checkbox(
+            "🧮 Toplam Depo Bakiye'yi Excel formülü olarak yaz",
+            key="total_formula",
+            help="Açıkken toplam kolonu Excel'de depo bakiyelerinden hesaplanır. "
+                 "Kapalıyken hesaplanmış değerler yazılır; dosya daha küçük olur ve daha hızlı açılır."
+        )
+        total_mode = 'formula' if total_formula else 'values'
+        
+        # Çıktı formatı - sütunsal formatlar sonraki araçlarda xlsx'e göre çok daha hızlı okunur
+        output_format = st.selectbox(
+            "📦 Çıktı formatı",
+            options=list(OUTPUT_FORMATS),
+            format_func=lambda fmt: OUTPUT_FORMATS[fmt]['label'],
+            key="output_format"
+        )
+        output_info = OUTPUT_FORMATS[output_format]
+        
+        # Her depo için yalnızca kendi kolonları ve satırlarıyla ayrı dosya (paralel yazılır)
+        split_depots = st.checkbox(
+            "🏬 Depo bazında ayrı dosyalar (zip)",
+            key="split_depots",
+            disabled=chunked_mode,
+            help="Ana çıktıya ek olarak İmes, İkitelli, Ankara, Maslak ve Bolu için ayrı dosyalar oluşturulur. "
+                 "Her dosyada ortak kolonlar ve yalnızca o deponun kolonları bulunur; deposunda hareketi, "
+                 "bakiyesi veya siparişi olmayan satırlar atlanır. Parçalı modda kullanılamaz."
+        ) and not chunked_mode
+        
+        # Ara tablolar bellekte değil bellek eşlemeli Arrow dosyalarında tutulur
+        spill_mode = st.checkbox(
+            "💾 Ara tabloları diske taşı (bellek tasarruflu mod)",
+            key="spill_mode",
+            help="Dönüşüm, inbound ve eşleştirme çıktıları geçici Arrow dosyalarına yazılır ve "
+                 "sonraki aşamada bellek eşlemeli açılır. Büyük dosyalarda ve çok oturumlu sunucularda "
+                 "bellek kullanımını düşürür; işlem biraz yavaşlar."
+        )
+        
+        # İşlenmiş irsaliye satırları kalıcı defterde tutulur, yeni yüklemede yalnızca yeni satırlar işlenir
+        ledger_mode = st.checkbox(
+            "📒 Inbound defteri (yalnızca yeni irsaliye satırları)",
+            key="ledger_mode",
+            help="Inbound satırları Belge No 2 ve satır bazında deftere yazılır. Aynı ay içindeki sonraki "
+                 "yüklemelerde yalnızca defterde olmayan satırlar sınıflandırılır; depo bakiyeleri defterdeki "
+                 "aylık toplamlardan gelir."
+        )
+        if ledger_mode and st.button("🗑️ Bu ayın inbound defterini sıfırla"):
+            try:
+                from siparis.irsaliye_defteri import InboundLedger
+                ledger = InboundLedger()
+                try:
+                    removed = ledger.reset()
+                finally:
+                    ledger.close()
+                # Defterli inbound sonucu önbellekte değil - ortak önbelleğe dokunmaya gerek yok
+                st.success(f"✅ Defterden {removed:,} satır silindi")
+            except Exception as e:
+                st.error(f"Defter sıfırlama hatası: {str(e)}")
     
-    if uploaded_file:
+    # Tam eşleşmeyen tedarikçi kodları için marka bazında fuzzy eşleştirme
+    with st.expander("🔎 Fuzzy eşleştirme ayarları"):
+        fuzzy_config = {}
+        for fuzzy_brand, defaults in FUZZY_BRANDS.items():
+            brand_col, threshold_col = st.columns([1, 2])
+            enabled = brand_col.checkbox(fuzzy_brand, value=defaults['enabled'], key=f"fuzzy_{fuzzy_brand}")
+            threshold = threshold_col.slider(
+                "Eşik",
+                min_value=0.5,
+                max_value=1.0,
+                value=defaults['threshold'],
+                step=0.01,
+                key=f"fuzzy_threshold_{fuzzy_brand}",
+                disabled=not enabled,
+                label_visibility="collapsed"
+            )
+            fuzzy_config[fuzzy_brand] = {'enabled': enabled, 'threshold': threshold}
+        fuzzy_budget = st.number_input(
+            "Süre bütçesi (sn, 0 = sınırsız)",
+            min_value=0.0,
+            max_value=600.0,
+            value=float(FUZZY_TIME_BUDGET),
+            step=5.0,
+            key="fuzzy_budget",
+            help="Çalıştırma başına toplam fuzzy arama süresi. Dolunca kalan kodlar aranmaz; "
+                 "kod sözlüğündeki önceki sonuçlar yine kullanılır. Bütçeli sonuç önbelleğe alınmaz."
+        )
+    
+    # Depo bazında sipariş önerisi - kapalıyken Sipariş kolonları 0 kalır
+    with st.expander("🧮 Sipariş önerisi"):
+        order_rules = None
+        if st.checkbox("Sipariş kolonlarını hesapla", key="order_enabled",
+                       help="Sipariş = aylık talep x (kapsama + emniyet) - (STOK + depo bakiye + tedarikçi bakiye), "
+                            "Paket Adetleri'nin katına yukarı yuvarlanır."):
+            rule_col1, rule_col2 = st.columns(2)
+            order_rules = {
+                'talep': rule_col1.selectbox(
+                    "Talep kaynağı",
+                    options=list(DEMAND_SOURCES),
+                    format_func=lambda source: DEMAND_SOURCES[source],
+                    key="order_demand"
+                ),
+                'satis_donemi': rule_col2.number_input(
+                    "Satış dönemi (ay)", min_value=0.5, max_value=24.0,
+                    value=float(ORDER_RULES['satis_donemi']), step=0.5, key="order_sales_months"
+                ),
+                'kapsama': rule_col1.number_input(
+                    "Kapsama (ay)", min_value=0.0, max_value=12.0,
+                    value=float(ORDER_RULES['kapsama']), step=0.5, key="order_coverage"
+                ),
+                'emniyet': rule_col2.number_input(
+                    "Emniyet stoğu (ay)", min_value=0.0, max_value=12.0,
+                    value=float(ORDER_RULES['emniyet']), step=0.5, key="order_safety"
+                ),
+                'min_siparis': rule_col1.number_input(
+                    "Minimum sipariş (adet)", min_value=0, max_value=100000,
+                    value=int(ORDER_RULES['min_siparis']), step=1, key="order_min"
+                ),
+                'tahmin': rule_col2.checkbox(
+                    "Ay kolonlarını tahmin olarak kullan", value=ORDER_RULES['tahmin'], key="order_forecast"
+                ),
+                'tedarikci_dahil': rule_col2.checkbox(
+                    "Tedarikçi bakiyesini eldeki stoğa say", value=ORDER_RULES['tedarikci_dahil'], key="order_supplier"
+                )
+            }
+    
+    if (uploaded_file or use_prepared) and not chunked_mode and not main_blocked:
         try:
             # Hızlı işlem akışı
             with st.spinner("⚡ Dosya işleniyor..."):
-                # 1. Hızlı okuma
-                df = load_data_ultra_fast(uploaded_file)
+                # Gece hazırlığı varsa okuma ve dönüşüm atlanır, kod indeksi de hazır gelir
+                source_key = content_key(file_bytes(uploaded_file), 'ana') if uploaded_file else prepared_export['anahtar']
+                transformed_df = load_prepared_sheet(source_key, spill_mode)
+                if transformed_df is not None:
+                    st.caption("📅 Gece hazırlanmış tablo kullanıldı")
+                elif not uploaded_file:
+                    st.warning("Hazır tablo artık önbellekte değil, ana Excel dosyasını yükleyin.")
+                    transformed_df = pd.DataFrame()
+                else:
+                    # 1. Hızlı okuma
+                    df = load_data_ultra_fast(uploaded_file)
 
-                
-                # 2. Hızlı dönüşüm
-                transformed_df = transform_data_ultra_fast(df)
+                    # 2. Hızlı dönüşüm
+                    transformed_df = transform_data_ultra_fast(df, spill_mode)
                 st.session_state.processed_data = transformed_df
+                touch(st.session_state, 'processed_data')
                 
                 # 3. Hızlı Excel oluşturma
                 if transformed_df is not None and len(transformed_df) > 0:
                     try:
-                        excel_data = format_excel_ultra_fast(transformed_df)
+                        excel_data = export_data(as_frame(transformed_df), output_format, total_mode)
                         st.download_button(
                             label=f"📥 Dönüştürülmüş Veriyi İndir ({len(transformed_df):,} satır)",
                             data=excel_data,
-                            file_name=f"donusturulmus_veri_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            file_name=f"donusturulmus_veri_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.{output_info['extension']}",
+                            mime=output_info['mime'],
                             type="primary"
                         )
+                        if split_depots:
+                            depot_download(as_frame(transformed_df), output_format, 'donusturulmus_veri')
                     except Exception as e:
                         st.error(f"Excel oluşturma hatası: {str(e)}")
                 else:
@@ -1724,61 +1827,145 @@ def main():
     
     # 9 Excel dosyası yükleme - yan yana düzen
     st.header("📂 Ek Excel Dosyalarını Yükleme")
-    st.write("Aşağıdaki 9 Excel dosyasını yükleyin:")
     
-    # 3 sütunlu düzen - daha kompakt tasarım
-    col1, col2, col3 = st.columns(3)
+    if bundle is not None:
+        # Paket modunda yükleyiciler gösterilmez
+        uploaded_files = {file_key: bundle.get(file_key) for file_key in ['inbound_excel'] + [f'excel{i}' for i in range(1, 9)]}
+    else:
+        st.write("Aşağıdaki 9 Excel dosyasını yükleyin:")
+        
+        # 3 sütunlu düzen - daha kompakt tasarım
+        col1, col2, col3 = st.columns(3)
     
-    with col1:
-        inbound_excel = st.file_uploader("📦 Inbound", type=['xlsx', 'xls'], key="inbound_excel")
-        excel1 = st.file_uploader("🔧 Schaeffler Luk", type=['xlsx', 'xls'], key="excel1")
-        excel2 = st.file_uploader("⚙️ ZF İthal Bakiye", type=['xlsx', 'xls'], key="excel2")
+        with col1:
+            inbound_excel = st.file_uploader("📦 Inbound", type=['xlsx', 'xls'], key="inbound_excel")
+            excel1 = st.file_uploader("🔧 Schaeffler Luk", type=['xlsx', 'xls'], key="excel1")
+            excel2 = st.file_uploader("⚙️ ZF İthal Bakiye", type=['xlsx', 'xls'], key="excel2")
     
-    with col2:
-        excel3 = st.file_uploader("🔌 Delphi Bakiye", type=['xlsx', 'xls'], key="excel3")
-        excel4 = st.file_uploader("🏭 ZF Yerli Bakiye", type=['xlsx', 'xls'], key="excel4")
-        excel5 = st.file_uploader("🔋 Valeo Bakiye", type=['xlsx', 'xls'], key="excel5")
+        with col2:
+            excel3 = st.file_uploader("🔌 Delphi Bakiye", type=['xlsx', 'xls'], key="excel3")
+            excel4 = st.file_uploader("🏭 ZF Yerli Bakiye", type=['xlsx', 'xls'], key="excel4")
+            excel5 = st.file_uploader("🔋 Valeo Bakiye", type=['xlsx', 'xls'], key="excel5")
     
-    with col3:
-        excel6 = st.file_uploader("🌊 Filtron Bakiye", type=['xlsx', 'xls'], key="excel6")
-        excel7 = st.file_uploader("🔧 Mann Bakiye", type=['xlsx', 'xls'], key="excel7")
-        excel8 = st.file_uploader("⚡ Bosch Bakiye", type=['xlsx', 'xls'], key="excel8")
+        with col3:
+            excel6 = st.file_uploader("🌊 Filtron Bakiye", type=['xlsx', 'xls'], key="excel6")
+            excel7 = st.file_uploader("🔧 Mann Bakiye", type=['xlsx', 'xls'], key="excel7")
+            excel8 = st.file_uploader("⚡ Bosch Bakiye", type=['xlsx', 'xls'], key="excel8")
     
-    # Yükleme kontrolü
-    uploaded_files = {
-        'inbound_excel': inbound_excel, 'excel1': excel1, 'excel2': excel2, 'excel3': excel3, 'excel4': excel4,
-        'excel5': excel5, 'excel6': excel6, 'excel7': excel7, 'excel8': excel8
-    }
+        # Yükleme kontrolü
+        uploaded_files = {
+            'inbound_excel': inbound_excel, 'excel1': excel1, 'excel2': excel2, 'excel3': excel3, 'excel4': excel4,
+            'excel5': excel5, 'excel6': excel6, 'excel7': excel7, 'excel8': excel8
+        }
     uploaded_count = sum(1 for file in uploaded_files.values() if file is not None)
     
     st.write(f"**Yüklenen dosya sayısı:** {uploaded_count}/9")
+
+    # Yüklenen tüm dosyaların başlıkları tek seferde doğrulanır - sorunlar birlikte listelenir
+    uploads_blocked = False
+    rejected = set()
+    if uploaded_count > 0:
+        try:
+            problems = validate_uploads(uploaded_files)
+            uploads_blocked = show_problems(problems)
+            rejected = {problem.file_key for problem in problems if problem.level == 'hata'}
+        except Exception as e:
+            st.warning(f"⚠️ Dosyalar doğrulanamadı: {str(e)}")
     
-    # Güncelle butonu
+    # Dosyalar yüklendiği anda arka planda okunmaya başlar - butona basıldığında yalnızca eşleştirme kalır
     if uploaded_count > 0:
-        if st.button("🚀 Ultra Hızlı Marka Eşleştirme Yap", type="primary"):
+        try:
+            statuses = start_background_parsing([
+                (file, 'inbound' if key == 'inbound_excel' else 'marka')
+                for key, file in uploaded_files.items() if key not in rejected
+            ])
+            pending_count = statuses.count('okunuyor')
+            if pending_count:
+                st.caption(f"⏳ {pending_count} dosya arka planda okunuyor...")
+            else:
+                st.caption(f"✅ {statuses.count('hazır')} dosya okundu, eşleştirmeye hazır")
+        except Exception as e:
+            st.warning(f"⚠️ Arka plan okuma başlatılamadı, dosyalar işlem sırasında okunacak: {str(e)}")
+    
+    # Parçalı mod - ana dosya hiçbir zaman tamamen belleğe alınmaz
+    if chunked_mode:
+        if uploaded_file and st.button("🧱 Parçalı İşlemi Başlat", type="primary",
+                                       disabled=main_blocked or uploads_blocked):
+            with st.spinner("⚡ Parçalı işleme yapılıyor..."):
+                chunked_excel_data, row_count = process_chunked(uploaded_file, uploaded_files, int(chunk_size), total_mode, output_format,
+                                                                  order_rules, ledger_mode)
+            
+            if chunked_excel_data:
+                st.download_button(
+                    label=f"📥 Eşleştirilmiş Veriyi İndir ({row_count:,} satır)",
+                    data=chunked_excel_data,
+                    file_name=f"eslestirilmis_veri_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.{output_info['extension']}",
+                    mime=output_info['mime'],
+                    type="primary"
+                )
+    
+    # Güncelle butonu
+    elif uploaded_count > 0:
+        if st.button("🚀 Ultra Hızlı Marka Eşleştirme Yap", type="primary", disabled=uploads_blocked):
             try:
                 if st.session_state.processed_data is not None:
-                    # Önce Inbound verisini işle
-                    with st.spinner("⚡ Inbound verisi işleniyor..."):
-                        inbound_processed_df = process_inbound_data(st.session_state.processed_data, uploaded_files.get('inbound_excel'))
+                    touch(st.session_state, 'processed_data')
+                    if st.session_state.get('profile_enabled'):
+                        # Profil modu - önbellek ve diske taşıma atlanır, iki aşama tek kayıtta profillenir
+                        capture = ProfileCapture('siparis', st.session_state.get('profile_mode', 'pstats'))
+                        main_frame = as_frame(st.session_state.processed_data)
+                        capture.add_input('ana tablo', main_frame)
+                        for file_key, file in uploaded_files.items():
+                            capture.add_input(file_key, file)
+                        with st.spinner("🩺 Profil kaydıyla işleniyor..."):
+                            with capture:
+                                inbound_processed_df = capture.run('inbound', process_inbound_frame, main_frame,
+                                                                   uploaded_files.get('inbound_excel'), ledger_mode)
+                                final_df = capture.run('eşleştirme', match_brands_frame, inbound_processed_df, uploaded_files,
+                                                       fuzzy_config, fuzzy_budget)
+                        st.session_state.profile_capture = (capture.to_zip(), capture.filename)
+                        touch(st.session_state, 'profile_capture')
+                        st.download_button(
+                            label=f"🩺 Profil Kaydını İndir ({capture.duration:.1f} sn)",
+                            data=st.session_state.profile_capture[0],
+                            file_name=capture.filename,
+                            mime="application/zip"
+                        )
+                    else:
+                        # Önce Inbound verisini işle
+                        with st.spinner("⚡ Inbound verisi işleniyor..."):
+                            inbound_stage = process_inbound_ledger if ledger_mode else process_inbound_data
+                            inbound_processed_df = inbound_stage(st.session_state.processed_data,
+                                                                 uploaded_files.get('inbound_excel'), spill_mode)
                     
-                    # Sonra marka eşleştirme işlemi
-                    with st.spinner("⚡ Marka eşleştirme yapılıyor..."):
-                        final_df = match_brands_parallel(inbound_processed_df, uploaded_files)
+                        # Sonra marka eşleştirme işlemi
+                        with st.spinner("⚡ Marka eşleştirme yapılıyor..."):
+                            if fuzzy_budget:
+                                final_df = match_brands_budgeted(inbound_processed_df, uploaded_files, spill_mode,
+                                                                 fuzzy_config, fuzzy_budget)
+                            else:
+                                final_df = match_brands_parallel(inbound_processed_df, uploaded_files, spill=spill_mode,
+                                                                  fuzzy_config=fuzzy_config)
 
-                    
                     # Final Excel indirme butonu
                     if len(final_df) > 0:
                         try:
                             with st.spinner("⚡ Final Excel oluşturuluyor..."):
-                                final_excel_data = format_excel_ultra_fast(final_df)
+                                export_df = as_frame(final_df)
+                                if order_rules is not None:
+                                    order_totals = suggest_orders(export_df, order_rules)
+                                    st.info("🧮 Sipariş önerisi: " + ", ".join(
+                                        f"{depo} {total:,}" for depo, total in order_totals.items()))
+                                final_excel_data = export_data(export_df, output_format, total_mode)
                                 st.download_button(
                                     label=f"📥 Eşleştirilmiş Veriyi İndir ({len(final_df):,} satır)",
                                     data=final_excel_data,
-                                    file_name=f"eslestirilmis_veri_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                    file_name=f"eslestirilmis_veri_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.{output_info['extension']}",
+                                    mime=output_info['mime'],
                                     type="primary"
                                 )
+                            if split_depots:
+                                depot_download(export_df, output_format, 'eslestirilmis_veri')
                         except Exception as e:
                             st.error(f"Final Excel oluşturma hatası: {str(e)}")
                             st.error("💡 Çözüm: Sayfayı yenileyin ve tekrar deneyin.")
@@ -1816,6 +2003,68 @@ def main():
         else:
             st.error("❌ Cache temizleme başarısız!")
 
+# Bellek bütçesi aşılınca boşaltılabilen oturum nesneleri ve boşaltılınca alacakları değer
+SESSION_ARTIFACTS = {
+    'processed_data': None,
+    'siparis_bundle': None,
+    'brand_data_cache': dict,
+    'profile_capture': None
+}
+
+def resource_monitor():
+    """Kenar çubuğunda süreç kaynakları, oturum/önbellek boyutları ve bellek bütçesi"""
+    with st.sidebar.expander("📈 Kaynak izleme"):
+        usage = process_usage()
+        # Sayfanın st.cache_data fonksiyonları - boyutları yalnızca gösterilir
+        cached_names = {
+            func.__name__ for func in (
+                validate_uploads, load_data_ultra_fast, load_brand_data_parallel, transform_data_ultra_fast,
+                load_prepared_sheet, process_inbound_data, match_brands_parallel, format_excel_ultra_fast,
+                format_table_ultra_fast, format_depot_zip
+            )
+        }
+        session = session_artifacts(st.session_state, SESSION_ARTIFACTS)
+        rows = [(artifact.name, artifact.size) for artifact in session] + cache_entries(cached_names)
+        tracked = session_usage(session)
+        
+        if usage is None:
+            st.info("ℹ️ psutil kurulu değil - yalnızca oturum ve önbellek boyutları gösteriliyor")
+        else:
+            rss_col, cpu_col = st.columns(2)
+            rss_col.metric("RSS", format_bytes(usage['rss']))
+            cpu_col.metric("CPU", f"%{usage['cpu']:.0f}")
+            st.caption(f"{usage['threads']} iş parçacığı · sistemde boş {format_bytes(usage['system_available'])}")
+        
+        if rows:
+            st.dataframe(
+                pd.DataFrame({
+                    'Nesne': [name for name, _ in rows],
+                    'Boyut': [format_bytes(size) for _, size in rows]
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
+        st.caption(f"Bu oturumun nesneleri: {format_bytes(tracked)} · ortak önbellekler: "
+                   f"{format_bytes(sum(size for _, size in rows) - tracked)}")
+        
+        budget_mb = st.number_input(
+            "Bellek bütçesi (MB, 0 = kapalı)",
+            min_value=0,
+            max_value=1024 * 1024,
+            value=DEFAULT_MEMORY_BUDGET_MB,
+            step=256,
+            key="memory_budget_mb",
+            help="Bu oturumun nesneleri bütçeyi aşınca seçilen sırayla aşım kadar boşaltılır. "
+                 "Tüm kullanıcılarla ortak önbellekler bütçeye sayılmaz ve boşaltılmaz."
+        )
+        policy = st.selectbox("Boşaltma sırası", options=list(EVICTION_POLICIES),
+                              format_func=EVICTION_POLICIES.get, key="eviction_policy")
+        
+        evicted = enforce_budget(tracked, budget_mb * 1024 * 1024, session, policy)
+        if evicted:
+            st.warning("⚠️ Bellek bütçesi aşıldı, boşaltıldı: " + ", ".join(
+                f"{artifact.name} ({format_bytes(artifact.size)})" for artifact in evicted))
+
 # Sidebar
 def sidebar():
     st.sidebar.header("🛠️ Araçlar")
@@ -1828,6 +2077,19 @@ def sidebar():
         else:
             st.sidebar.error("❌ Cache temizleme başarısız!")
     
+    resource_monitor()
+    
+    # Sonraki eşleştirme çalıştırması profillenir (önbellek atlanır)
+    st.sidebar.markdown("---")
+    st.sidebar.header("🩺 Profil")
+    if st.sidebar.checkbox("Eşleştirmeyi profille", key="profile_enabled",
+                           help="Inbound ve marka eşleştirme önbelleksiz çalıştırılır ve profillenir. "
+                                "Kayıt girdi boyutları ve aşama süreleriyle zip olarak indirilir."):
+        st.sidebar.selectbox("Profil modu", options=list(PROFILE_MODES), format_func=PROFILE_MODES.get, key="profile_mode")
+    if st.session_state.get('profile_capture'):
+        profile_data, profile_name = st.session_state.profile_capture
+        st.sidebar.download_button("📥 Son profil kaydı", data=profile_data, file_name=profile_name, mime="application/zip")
+    
     st.sidebar.markdown("---")
     st.sidebar.header("📋 Temel Kurallar")
     st.sidebar.write("• Boş satırlara 0 değeri atanır")
@@ -3,8 +3,23 @@ import pandas as pd
 import json
 import io
 from datetime import datetime
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, PatternFill
+import sys
+from pathlib import Path
+
+# Paylaşılan modüller proje kökünde - sayfa doğrudan çalıştırıldığında da bulunabilsin
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from siparis.kodlar import process_bosch_codes, bosch_codes
+from siparis.profil import PROFILE_MODES, ProfileCapture
+from siparis.onizleme import PAGE_SIZES, FramePreview
+from siparis.dogrulama import BOSCH_SCHEMAS, validate_files
+from siparis.paket import HASH_FUNCS, open_bundle
+from siparis.kaynak import (
+    DEFAULT_MEMORY_BUDGET_MB, cache_data_sizes, enforce_budget, format_bytes, process_usage, session_artifacts,
+    session_usage
+)
 
 # Sayfa ayarları
 st.set_page_config(
@@ -22,21 +37,40 @@ st.caption("3 Excel dosyasından son.json formatında çıktı oluşturma")
 if 'process_bosch' not in st.session_state:
     st.session_state.process_bosch = False
 
-def process_bosch_codes(bosch_ref):
-    """Bosch ürün kodlarını işle - başına 3E- ekle ve boşlukları temizle"""
-    if pd.isna(bosch_ref):
-        return ''
-    
-    code_str = str(bosch_ref).strip()
-    
-    # Boşlukları temizle
-    code_str = code_str.replace(' ', '')
-    
-    # Başında 3E- yoksa ekle
-    if not code_str.startswith('3E-'):
-        code_str = '3E-' + code_str
-    
-    return code_str
+@st.cache_data(show_spinner=False, ttl=3600, hash_funcs=HASH_FUNCS)
+def validate_uploads(files):
+    """Üç dosyanın başlık ve örnek satırlarla şema doğrulaması (dosyalar tamamen okunmaz)"""
+    return validate_files(files, BOSCH_SCHEMAS)
+
+def bundle_upload(key='bosch_bundle'):
+    """Üç dosya tek zip/çoklu seçimle - başlıklarına göre tanınır, oturumda tek birim; paket yoksa None"""
+    generation = st.session_state.get(f"{key}_generation", 0)
+    uploads = st.file_uploader(
+        "Zip veya birden çok Excel dosyası",
+        type=['zip', 'xlsx', 'xls'],
+        accept_multiple_files=True,
+        key=f"{key}_{generation}"
+    )
+    if not uploads:
+        st.session_state.pop(key, None)
+        return None
+
+    signature = tuple((upload.file_id, upload.size) for upload in uploads)
+    opened = st.session_state.get(key)
+    if opened is None or opened[0] != signature:
+        with st.spinner("📦 Paket açılıyor..."):
+            opened = (signature, open_bundle(uploads, BOSCH_SCHEMAS))
+        st.session_state[key] = opened
+    bundle = opened[1]
+
+    for file_key, schema in BOSCH_SCHEMAS.items():
+        file = bundle.get(file_key)
+        st.caption(f"{'✅' if file else '❌'} {schema['label']}: {file.name if file else 'pakette yok'}")
+    if st.button("🗑️ Paketi kaldır", key=f"{key}_clear", use_container_width=True):
+        st.session_state.pop(key, None)
+        st.session_state[f"{key}_generation"] = generation + 1
+        st.rerun()
+    return bundle
 
 def determine_depot_code(siparis_notu):
     """Sipariş Notu'ndan depo kodunu belirle - sadece belirli kodlar"""
@@ -91,7 +125,7 @@ def process_bosch_three_excel():
                 return None
             
             # Bosch No'yu temizle - başına 3E- ekle ve boşlukları temizle
-            bakiye_df['Bosch No'] = bakiye_df['Bosch No'].apply(process_bosch_codes)
+            bakiye_df['Bosch No'] = bosch_codes(bakiye_df['Bosch No'])
             
             st.success(f"✅ Bakiye Raporu yüklendi: {len(bakiye_df)} satır")
             
@@ -250,6 +284,9 @@ def process_bosch_three_excel():
 
 def create_excel_file(df):
     """Excel dosyası oluştur - son.json formatında"""
+    from openpyxl.utils import get_column_letter
+    from openpyxl.styles import Font, PatternFill
+
     try:
         output = io.BytesIO()
         
@@ -355,38 +392,108 @@ def create_analysis_report(df):
     except Exception as e:
         st.error(f"❌ Analiz raporu hatası: {str(e)}")
 
+def render_preview(preview, key='bosch'):
+    """Sunucu tarafı sayfalı önizleme - tarayıcıya yalnızca seçilen sayfa gönderilir, gösterilen sayfayı döndürür"""
+    filter_col, text_col = st.columns([1, 2])
+    filter_column = filter_col.selectbox("Filtre kolonu", options=[''] + preview.columns, key=f"{key}_filter_column")
+    filter_text = text_col.text_input("Filtre", key=f"{key}_filter_text", placeholder="Aranacak metin")
+    columns = st.multiselect("Gösterilecek kolonlar", options=preview.columns, default=preview.columns,
+                             key=f"{key}_columns")
+    
+    size_col, page_col = st.columns(2)
+    page_size = size_col.selectbox("Sayfa boyutu", options=PAGE_SIZES, key=f"{key}_page_size")
+    pages = preview.page_count(page_size, filter_column, filter_text)
+    # Filtre daralınca sayfa numarası son sayfaya çekilir
+    page_key = f"{key}_page"
+    st.session_state[page_key] = min(st.session_state.get(page_key, 1), pages)
+    page_no = page_col.number_input(f"Sayfa (toplam {pages:,})", min_value=1, max_value=pages, step=1, key=page_key)
+    
+    view = preview.page(page_no, page_size, columns, filter_column, filter_text)
+    st.dataframe(view, use_container_width=True)
+    start = (page_no - 1) * page_size
+    st.caption(f"{start + min(1, len(view)):,}–{start + len(view):,} / {preview.count(filter_column, filter_text):,} "
+               f"satır (toplam {len(preview):,})")
+    
+    if st.checkbox("📊 Grup özeti", key=f"{key}_summary"):
+        group_col, value_col = st.columns(2)
+        group_column = group_col.selectbox("Gruplama kolonu", options=preview.columns, key=f"{key}_group_column")
+        value_column = value_col.selectbox("Toplanacak kolon", options=[''] + preview.numeric_columns(),
+                                           key=f"{key}_value_column")
+        st.dataframe(preview.summary(group_column, value_column or None, filter_column, filter_text),
+                     hide_index=True, use_container_width=True)
+    return view
+
+# Sonuç oturumda tutulur - önizleme etkileşimleri yeniden işleme yapmaz
+BOSCH_ARTIFACTS = {
+    'bosch_preview': None,
+    'bosch_bundle': None,
+    'bosch_downloads': None
+}
+
 # Sidebar
 with st.sidebar:
     st.header("📁 Excel Dosya Yükleme")
     
-    # Excel dosyalarını yükle
-    bakiye_raporu = st.file_uploader(
-        "📊 Bakiye Raporu Excel",
-        type=['xlsx', 'xls'],
-        help="Bakiye raporu Excel dosyasını yükleyin"
-    )
+    # Paket yükleme - üç dosya tek seferde, yükleyici yuvası yerine başlıklarına göre tanınır
+    with st.expander("📦 Paket yükleme (zip veya çoklu dosya)"):
+        bundle = bundle_upload()
     
-    inbound_excel = st.file_uploader(
-        "📦 InBound Excel",
-        type=['xlsx', 'xls'],
-        help="InBound Excel dosyasını yükleyin"
-    )
+    if bundle is not None:
+        bakiye_raporu = bundle.get('bakiye_raporu')
+        inbound_excel = bundle.get('inbound_excel')
+        siparis_kalemleri = bundle.get('siparis_kalemleri')
+    else:
+        # Excel dosyalarını yükle
+        bakiye_raporu = st.file_uploader(
+            "📊 Bakiye Raporu Excel",
+            type=['xlsx', 'xls'],
+            help="Bakiye raporu Excel dosyasını yükleyin"
+        )
     
-    siparis_kalemleri = st.file_uploader(
-        "📋 Sipariş Kalemleri Excel",
-        type=['xlsx', 'xls'],
-        help="Sipariş kalemleri Excel dosyasını yükleyin"
-    )
+        inbound_excel = st.file_uploader(
+            "📦 InBound Excel",
+            type=['xlsx', 'xls'],
+            help="InBound Excel dosyasını yükleyin"
+        )
+    
+        siparis_kalemleri = st.file_uploader(
+            "📋 Sipariş Kalemleri Excel",
+            type=['xlsx', 'xls'],
+            help="Sipariş kalemleri Excel dosyasını yükleyin"
+        )
+    
+    # Yüklenen dosyaların başlıkları hemen doğrulanır - tüm sorunlar birlikte listelenir
+    upload_errors = []
+    if bakiye_raporu or inbound_excel or siparis_kalemleri:
+        try:
+            problems = validate_uploads({
+                'bakiye_raporu': bakiye_raporu, 'inbound_excel': inbound_excel, 'siparis_kalemleri': siparis_kalemleri
+            })
+            upload_errors = [str(problem) for problem in problems if problem.level == 'hata']
+            for problem in problems:
+                if problem.level != 'hata':
+                    st.warning(f"⚠️ {problem}")
+            for error in upload_errors:
+                st.error(f"❌ {error}")
+        except Exception as e:
+            st.warning(f"⚠️ Dosyalar doğrulanamadı: {str(e)}")
     
     st.markdown("---")
     
     # İşlem butonları
     if st.button("🚀 BOSCH Verilerini İşle", type="primary", use_container_width=True):
-        if bakiye_raporu and inbound_excel and siparis_kalemleri:
+        if upload_errors:
+            st.error("⚠️ Dosyalardaki sorunlar düzeltilmeden işlem başlatılamaz!")
+        elif bakiye_raporu and inbound_excel and siparis_kalemleri:
             st.session_state.process_bosch = True
         else:
             st.error("⚠️ Tüm Excel dosyaları yüklenmelidir!")
     
+    # Sonraki çalıştırma profillenir
+    if st.checkbox("🩺 İşlemi profille", key="profile_enabled",
+                   help="İşlem profillenir; kayıt girdi boyutları ve süreyle zip olarak indirilir."):
+        st.selectbox("Profil modu", options=list(PROFILE_MODES), format_func=PROFILE_MODES.get, key="profile_mode")
+    
     st.markdown("---")
     
     # KURALLAR AÇIKLAMASI
@@ -418,6 +525,27 @@ with st.sidebar:
     
     st.markdown("---")
     
+    # Süreç kaynakları - bütçe yalnızca bu oturumun nesnelerine uygulanır, ortak önbellekler boşaltılmaz
+    with st.expander("📈 Kaynak izleme"):
+        usage = process_usage()
+        session = session_artifacts(st.session_state, BOSCH_ARTIFACTS)
+        tracked = session_usage(session)
+        if usage is None:
+            st.info("ℹ️ psutil kurulu değil - yalnızca oturum ve önbellek boyutları gösteriliyor")
+        else:
+            rss_col, cpu_col = st.columns(2)
+            rss_col.metric("RSS", format_bytes(usage['rss']))
+            cpu_col.metric("CPU", f"%{usage['cpu']:.0f}")
+        st.caption(f"Bu oturumun sonuçları: {format_bytes(tracked)} · ortak st.cache_data: "
+                   f"{format_bytes(sum((cache_data_sizes() or {}).values()))}")
+        budget_mb = st.number_input("Bellek bütçesi (MB, 0 = kapalı)", min_value=0, max_value=1024 * 1024,
+                                    value=DEFAULT_MEMORY_BUDGET_MB, step=256, key="memory_budget_mb")
+        evicted = enforce_budget(tracked, budget_mb * 1024 * 1024, session)
+        if evicted:
+            st.warning("⚠️ Bellek bütçesi aşıldı, boşaltıldı: " + ", ".join(artifact.name for artifact in evicted))
+    
+    st.markdown("---")
+    
     # Dosya durumu
     uploaded_count = sum(1 for file in [bakiye_raporu, inbound_excel, siparis_kalemleri] if file is not None)
     st.write(f"**📁 Yüklenen Dosya:** {uploaded_count}/3")
@@ -432,67 +560,96 @@ with st.sidebar:
 # Ana işlem akışı
 if st.session_state.get('process_bosch', False):
     st.session_state.process_bosch = False
+    st.session_state.bosch_preview = None
+    st.session_state.bosch_page = 1
     
     # BOSCH verilerini işle
-    final_df = process_bosch_three_excel()
+    if st.session_state.get('profile_enabled'):
+        capture = ProfileCapture('bosch', st.session_state.get('profile_mode', 'pstats'))
+        for name, file in [('bakiye_raporu', bakiye_raporu), ('inbound_excel', inbound_excel), ('siparis_kalemleri', siparis_kalemleri)]:
+            capture.add_input(name, file)
+        with capture:
+            final_df = capture.run('bosch', process_bosch_three_excel)
+        capture.add_input('sonuç', final_df)
+        st.download_button(
+            label=f"🩺 Profil Kaydını İndir ({capture.duration:.1f} sn)",
+            data=capture.to_zip(),
+            file_name=capture.filename,
+            mime="application/zip"
+        )
+    else:
+        final_df = process_bosch_three_excel()
     
     if final_df is not None:
         st.success("🎉 BOSCH işlemi başarıyla tamamlandı!")
         
-        # Sonuçları göster
-        st.subheader("📊 İşlenen Veriler")
-        st.dataframe(final_df, use_container_width=True)
-        
-        # Analiz raporu
-        create_analysis_report(final_df)
-        
-        # Dosya oluşturma butonları
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Excel dosyası oluştur - son.json formatında
-            excel_output, excel_filename = create_excel_file(final_df)
-            if excel_output:
-                st.download_button(
-                    label="📥 son.json Format Excel İndir",
-                    data=excel_output,
-                    file_name=excel_filename,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
-                )
-        
-        with col2:
-            # JSON dosyası oluştur
-            json_output, json_filename = create_son_json(final_df)
-            if json_output:
-                st.download_button(
-                    label="📥 JSON Dosyasını İndir",
-                    data=json_output,
-                    file_name=json_filename,
-                    mime="application/json",
-                    use_container_width=True
-                )
-        
-        # Veri kontrol butonları
-        st.markdown("---")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if st.button("🔍 JSON Veri Kontrolü", use_container_width=True):
-                st.json(final_df.to_dict('records'))
-        
-        with col2:
-            if st.button("📊 Format Kontrolü", use_container_width=True):
-                st.info("🎯 son.json Format Kontrolü:")
-                st.write(f"• Toplam satır: {len(final_df)}")
-                st.write(f"• Toplam kolon: {len(final_df.columns)}")
-                st.write(f"• Kolonlar: {list(final_df.columns)}")
-                
-                # Örnek satır göster
-                if len(final_df) > 0:
-                    st.write("**Örnek Satır:**")
-                    st.json(final_df.iloc[0].to_dict())
+        # İndirme dosyaları bir kez oluşturulur
+        excel_output, excel_filename = create_excel_file(final_df)
+        json_output, json_filename = create_son_json(final_df)
+        st.session_state.bosch_preview = FramePreview(final_df)
+        st.session_state.bosch_downloads = (
+            excel_output.getvalue() if excel_output else None, excel_filename,
+            json_output.getvalue() if json_output else None, json_filename
+        )
+
+if st.session_state.get('bosch_preview') is not None:
+    preview = st.session_state.bosch_preview
+    final_df = preview.frame
+    
+    # Sonuçları göster
+    st.subheader("📊 İşlenen Veriler")
+    page_view = render_preview(preview)
+    
+    # Analiz raporu
+    create_analysis_report(final_df)
+    
+    # Dosya oluşturma butonları
+    excel_output, excel_filename, json_output, json_filename = st.session_state.bosch_downloads
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Excel dosyası - son.json formatında
+        if excel_output:
+            st.download_button(
+                label="📥 son.json Format Excel İndir",
+                data=excel_output,
+                file_name=excel_filename,
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True
+            )
+    
+    with col2:
+        # JSON dosyası
+        if json_output:
+            st.download_button(
+                label="📥 JSON Dosyasını İndir",
+                data=json_output,
+                file_name=json_filename,
+                mime="application/json",
+                use_container_width=True
+            )
+    
+    # Veri kontrol butonları
+    st.markdown("---")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("🔍 JSON Veri Kontrolü", use_container_width=True):
+            # Yalnızca önizlemedeki sayfa - tüm tablo tarayıcıya gönderilmez
+            st.json(page_view.to_dict('records'))
+    
+    with col2:
+        if st.button("📊 Format Kontrolü", use_container_width=True):
+            st.info("🎯 son.json Format Kontrolü:")
+            st.write(f"• Toplam satır: {len(final_df)}")
+            st.write(f"• Toplam kolon: {len(final_df.columns)}")
+            st.write(f"• Kolonlar: {list(final_df.columns)}")
+            
+            # Örnek satır göster
+            if len(final_df) > 0:
+                st.write("**Örnek Satır:**")
+                st.json(final_df.iloc[0].to_dict())
 
 # Sayfa sonu
 st.markdown("---")
@@ -0,0 +1 @@
+"""Sipariş Oluşturma - sayfalar tarafından paylaşılan işlem modülleri"""
@@ -0,0 +1,116 @@
+"""Sayfaların açılış (import) ve yeniden çalıştırma süresi ölçümü
+
+Her sayfa ayrı bir Python sürecinde `-X importtime` ile çalıştırılır:
+
+- import: sayfanın ilk çalıştırılmasında yüklenen modüllerin toplam süresi (soğuk açılış),
+- ilk çizim: sayfa betiğinin ilk çalıştırılması (importlar dahil),
+- yeniden çalıştırma: aynı süreçte ikinci çalıştırma - Streamlit'in her widget
+  etkileşiminde yaptığı gibi, modüller artık yüklü.
+
+Sayfalar Streamlit sunucusu olmadan (bare mode) çalıştırılır; dosya yükleyiciler boş döner,
+yani ölçülen süre dosya yüklenmeden önceki ilk ekrandır.
+
+Kullanım:
+    python -m siparis.acilis
+    python -m siparis.acilis pages/bosch_islemleri.py --tekrar 5 --ilk 15
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_TARGETS = ['main.py', *sorted(str(p.relative_to(PROJECT_ROOT)) for p in (PROJECT_ROOT / 'pages').glob('*.py'))]
+
+# Alt süreçte çalışan ölçüm betiği - süreleri stdout'a JSON olarak yazar
+_RUNNER = """
+import json, logging, runpy, sys, time, warnings
+warnings.filterwarnings('ignore')
+logging.disable(logging.CRITICAL)
+path = sys.argv[1]
+start = time.perf_counter()
+runpy.run_path(path, run_name='__main__')
+first = time.perf_counter() - start
+start = time.perf_counter()
+runpy.run_path(path, run_name='__main__')
+rerun = time.perf_counter() - start
+print(json.dumps({'first': first, 'rerun': rerun}))
+"""
+
+
+def parse_importtime(stderr):
+    """`-X importtime` çıktısından (modül, kümülatif µs, derinlik) listesi"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(cumulative), depth))
+    return rows
+
+def measure(target):
+    """Tek ölçüm: import süreleri ve ilk/yeniden çalıştırma süreleri (saniye)"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _RUNNER, str(PROJECT_ROOT / target)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{target} çalıştırılamadı:\n{proc.stderr[-2000:]}")
+
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(proc.stderr)
+    # Yalnızca en üst seviye importlar toplanır (iç içe olanlar zaten kümülatif sürede)
+    top_level = [(name, us) for name, us, depth in imports if depth == 0]
+    return {
+        'import': sum(us for _, us in top_level) / 1e6,
+        'first': timings['first'],
+        'rerun': timings['rerun'],
+        'modules': sorted(top_level, key=lambda item: item[1], reverse=True)
+    }
+
+def benchmark(target, repeat=3):
+    """repeat ölçümün medyanı ve en yavaş üst seviye importlar"""
+    runs = [measure(target) for _ in range(repeat)]
+    return {
+        'target': target,
+        'import': statistics.median(run['import'] for run in runs),
+        'first': statistics.median(run['first'] for run in runs),
+        'rerun': statistics.median(run['rerun'] for run in runs),
+        'modules': runs[-1]['modules']
+    }
+
+
+def main(argv=None):
+    """Sayfaların açılış süresini ölç ve tablo olarak yazdır"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sayfa açılış ve yeniden çalıştırma süresi ölçümü")
+    parser.add_argument('hedef', nargs='*', default=DEFAULT_TARGETS, help="Ölçülecek betikler (proje köküne göre)")
+    parser.add_argument('--tekrar', type=int, default=3, help="Ölçüm tekrarı (medyan alınır)")
+    parser.add_argument('--ilk', type=int, default=10, help="Gösterilecek en yavaş import sayısı")
+    parser.add_argument('--json', dest='json_path', default=None, help="Sonuçları JSON dosyasına da yaz")
+    args = parser.parse_args(argv)
+
+    results = []
+    for target in args.hedef:
+        result = benchmark(target, args.tekrar)
+        results.append(result)
+
+        print(f"\n{target}")
+        print(f"  import            : {result['import'] * 1000:8.1f} ms")
+        print(f"  ilk çizim         : {result['first'] * 1000:8.1f} ms")
+        print(f"  yeniden çalıştırma: {result['rerun'] * 1000:8.1f} ms")
+        for name, us in result['modules'][:args.ilk]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
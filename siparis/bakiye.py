@@ -0,0 +1,324 @@
+"""Tedarikçi ve inbound bakiyelerinin delta olarak hesaplanması ve ana tabloya uygulanması
+
+Marka dosyaları ana tablodan bağımsız olarak (ürün kodu, hedef kolon, adet) üçlülerine
+indirgenir. Bu deltalar küçüktür; ana tablo parça parça işlenirken her bloğa ayrı ayrı
+uygulanabilir. Delta kodları ortak kod tablosunda (kod_tablosu) kimliklere çevrilir; bloklar
+aynı tabloya göre kodlanır ve toplamlar kimlik dizileri üzerinden okunur.
+"""
+import numpy as np
+import pandas as pd
+
+from siparis.kodlar import (
+    compact_codes,
+    schaeffler_codes,
+    valeo_codes,
+    zf_material_codes,
+)
+from siparis.kod_tablosu import KEY_MODES, MISSING, CodeTable
+from siparis.marka import BrandMaskIndex
+from siparis.siniflandirma import DELPHI_BRANCHES, MANN_BRANCHES, PO_BRANCHES, ZF_BRANCHES
+
+DEPO_NAMES = ['İmes', 'Ankara', 'Bolu', 'Maslak', 'İkitelli']
+
+MATCH_BOTH = ('URUNKODU', 'Düzenlenmiş Ürün Kodu')
+MATCH_DUZENLENMIS = ('Düzenlenmiş Ürün Kodu',)
+
+ZF_CAT4_TERMS = ('LEMFÖRDER', 'TRW', 'SACHS')
+BOSCH_CAT4_TERMS = ('BOSCH',)
+
+# Inbound Depo kolonu eşleştirmesi - TD kodları öncelikli kontrol edilir
+INBOUND_DEPO_MAPPING = {
+    'TD-02': 'Maslak',
+    'TD-04': 'Bolu',
+    'TD-A01': 'Ankara',
+    'TD-A09': 'Ankara',
+    'TD-D01': 'İmes',
+    'TD-D05': 'İmes',
+    'TD-D09': 'İmes',
+    'TD-E01': 'İkitelli',
+    'MASLAK': 'Maslak',
+    'BOLU': 'Bolu',
+    'ANKARA': 'Ankara',
+    'İMES': 'İmes',
+    'İKİTELLİ': 'İkitelli',
+    'IKITELLI': 'İkitelli',
+    'AAS': 'Ankara',
+    'DAS': 'İmes',
+    'MAS': 'Maslak',
+    'BAS': 'Bolu',
+    'EAS': 'İkitelli'
+}
+
+# Mann/Filtron dosyalarında ürün kodu kolonu (ilk bulunan kullanılır)
+MANN_MATERIAL_COLUMNS = ('Material Adı', 'Material', 'Material Name', 'Ürün Kodu', 'Product Code',
+                         'Material Kodu', 'Malzeme Kodu', 'Malzeme Adı')
+
+BOSCH_DEPO_MAPPING = {
+    'AAS': 'Ankara',
+    'BAS': 'Bolu',
+    'DAS': 'İmes',
+    'EAS': 'İkitelli',
+    'MAS': 'Maslak'
+}
+
+
+def _require(df, columns, label):
+    """Eksik kolon varsa açıklayıcı hata fırlat"""
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValueError(f"{label} dosyasında eksik kolonlar: {missing}")
+
+def _numeric(series):
+    return pd.to_numeric(series, errors='coerce').fillna(0)
+
+def restore_dtype(values, dtype):
+    """Toplamları kolonun tamsayı tipine geri çevir - kesirli toplamlar float kalır"""
+    values = np.asarray(values, dtype=np.float64)
+    if not pd.api.types.is_integer_dtype(dtype) or not np.all(np.mod(values, 1) == 0):
+        return values
+    return pd.array(values, dtype=dtype) if isinstance(dtype, pd.api.extensions.ExtensionDtype) else values.astype(dtype)
+
+def _inbound_depo(depo_kodu):
+    """Inbound depo kodunu depo adına çevir - önce TD kodları"""
+    for key, value in INBOUND_DEPO_MAPPING.items():
+        if key.startswith('TD-') and key in depo_kodu:
+            return value
+    for key, value in INBOUND_DEPO_MAPPING.items():
+        if not key.startswith('TD-') and key in depo_kodu:
+            return value
+    return None
+
+def _delta_group(brand, keys, depots, quantities, column_suffix='Tedarikçi Bakiye',
+                 key_mode='compact', match_columns=MATCH_BOTH, cat4_terms=None):
+    """Anahtar/depo/adet serilerinden toplanmış delta grubu oluştur"""
+    data = pd.DataFrame({
+        'key': keys.to_numpy(),
+        'depo': depots.to_numpy(),
+        'quantity': quantities.to_numpy()
+    })
+    data = data[data['depo'].isin(DEPO_NAMES)]
+    grouped = data.groupby(['key', 'depo'], sort=False)['quantity'].sum().reset_index()
+
+    grouped['column'] = grouped['depo'] + f' {column_suffix}'
+
+    return {
+        'brand': brand,
+        'key_mode': key_mode,
+        'match_columns': match_columns,
+        'cat4_terms': cat4_terms,
+        'deltas': grouped[['key', 'column', 'quantity']]
+    }
+
+def schaeffler_deltas(df, brand='SCHAEFFLER LUK'):
+    """Schaeffler: PO Number(L) → depo, Catalogue number → kod, Ordered quantity → adet"""
+    _require(df, ['PO Number(L)', 'Catalogue number', 'Ordered quantity'], 'Schaeffler')
+    keys = schaeffler_codes(df['Catalogue number'])
+    depots = PO_BRANCHES(df['PO Number(L)'])
+    return _delta_group(brand, keys, depots, _numeric(df['Ordered quantity']), key_mode='clean')
+
+def zf_ithal_deltas(df, brand='ZF İTHAL'):
+    """ZF İthal: Purchase order no. → depo, Material → kod, Qty.in Del. + Open quantity → adet"""
+    _require(df, ['Material', 'Purchase order no.', 'Qty.in Del.', 'Open quantity'], 'ZF İthal')
+    keys = compact_codes(zf_material_codes(df['Material']))
+    depots = ZF_BRANCHES(df['Purchase order no.'])
+    quantities = _numeric(df['Qty.in Del.']) + _numeric(df['Open quantity'])
+    return _delta_group(brand, keys, depots, quantities, cat4_terms=ZF_CAT4_TERMS)
+
+def zf_yerli_deltas(df, brand='ZF YERLİ'):
+    """ZF Yerli: Ship-to Name → depo, Basic No. → kod (sadece Düzenlenmiş Ürün Kodu), Outstanding Quantity → adet"""
+    _require(df, ['Basic No.', 'Ship-to Name', 'Outstanding Quantity'], 'ZF Yerli')
+    keys = compact_codes(df['Basic No.'])
+    depots = ZF_BRANCHES(df['Ship-to Name'])
+    return _delta_group(brand, keys, depots, _numeric(df['Outstanding Quantity']),
+                        match_columns=MATCH_DUZENLENMIS, cat4_terms=ZF_CAT4_TERMS)
+
+def valeo_deltas(df, brand='VALEO'):
+    """Valeo: Müşteri P/O No. → depo, Valeo Ref. → kod, Sipariş Adeti → adet"""
+    _require(df, ['Müşteri P/O No.', 'Valeo Ref.', 'Sipariş Adeti'], 'Valeo')
+    keys = valeo_codes(df['Valeo Ref.'])
+    depots = PO_BRANCHES(df['Müşteri P/O No.'])
+    return _delta_group(brand, keys, depots, _numeric(df['Sipariş Adeti']), key_mode='clean')
+
+def delphi_deltas(df, brand='DELPHI'):
+    """Delphi: Şube → depo, Material → kod, Cum.qty → adet"""
+    _require(df, ['Şube', 'Material', 'Cum.qty'], 'Delphi')
+    keys = compact_codes(df['Material'])
+    depots = DELPHI_BRANCHES(df['Şube'])
+    return _delta_group(brand, keys, depots, _numeric(df['Cum.qty']))
+
+def mann_filtron_deltas(df, brand='MANN'):
+    """Mann/Filtron: Müşteri SatınAlma No → depo, Material kolonu → kod, Açık Sipariş Adedi → adet"""
+    material_col = None
+    for col_name in MANN_MATERIAL_COLUMNS:
+        if col_name in df.columns:
+            material_col = col_name
+            break
+    if material_col is None:
+        raise ValueError(f"{brand} dosyasında Material kolonu bulunamadı")
+    _require(df, ['Müşteri SatınAlma No', 'Açık Sipariş Adedi'], brand)
+    keys = compact_codes(df[material_col])
+    depots = MANN_BRANCHES(df['Müşteri SatınAlma No'])
+    return _delta_group(brand, keys, depots, _numeric(df['Açık Sipariş Adedi']))
+
+def bosch_deltas(df, brand='BOSCH'):
+    """Bosch: Depo Kodu → depo, Ürün Grubu → Depo/Tedarikçi bakiyesi, Bosch No → kod"""
+    _require(df, ['Depo Kodu', 'Ürün Grubu', 'Bosch No', 'Fatura ve Sevk Edilmemiş Toplam'], 'Bosch')
+    depots = df['Depo Kodu'].astype(str).map(BOSCH_DEPO_MAPPING)
+    bakiye_tipi = df['Ürün Grubu'].astype(str).apply(
+        lambda x: 'Tedarikçi' if 'TEDARİKÇİ' in x.upper()
+        else 'Depo' if 'DEPO' in x.upper()
+        else None
+    )
+    known = bakiye_tipi.notna()
+    keys = compact_codes(df['Bosch No'])
+
+    # Depo ve Tedarikçi bakiyeleri aynı grupta farklı kolonlara yazılır
+    data = pd.DataFrame({
+        'key': keys[known].to_numpy(),
+        'depo': depots[known].to_numpy(),
+        'tip': bakiye_tipi[known].to_numpy(),
+        'quantity': _numeric(df['Fatura ve Sevk Edilmemiş Toplam'])[known].to_numpy()
+    })
+    data = data[data['depo'].isin(DEPO_NAMES)]
+    grouped = data.groupby(['key', 'depo', 'tip'], sort=False)['quantity'].sum().reset_index()
+    grouped['column'] = grouped['depo'] + ' ' + grouped['tip'] + ' Bakiye'
+
+    return {
+        'brand': brand,
+        'key_mode': 'compact',
+        'match_columns': MATCH_BOTH,
+        'cat4_terms': BOSCH_CAT4_TERMS,
+        'deltas': grouped[['key', 'column', 'quantity']]
+    }
+
+def inbound_lines(df):
+    """Inbound satırlarını sınıflandır - GE- ürünleri, Belge No 2 dolu, İrsaliye Miktarı > 0
+
+    (key, depo, quantity) tablosu döner, satır indeksi korunur; depo eşleşmeyen satırlarda depo None.
+    """
+    _require(df, ['Depo', 'Ürün Kodu', 'İrsaliye Miktarı'], 'Inbound')
+
+    df = df[df['Ürün Kodu'].astype(str).str.upper().str.startswith('GE-')]
+    if 'Belge No 2' in df.columns:
+        belge = df['Belge No 2']
+        df = df[
+            belge.notna() &
+            (belge.astype(str).str.strip() != '') &
+            (~belge.astype(str).str.lower().isin(['nan', 'none', 'null']))
+        ]
+
+    df = df[pd.to_numeric(df['İrsaliye Miktarı'], errors='coerce') > 0]
+    quantities = pd.to_numeric(df['İrsaliye Miktarı'], errors='coerce')
+    depo_kodlari = df['Depo'].astype(str).str.strip().str.upper()
+    depots = depo_kodlari.map({kod: _inbound_depo(kod) for kod in depo_kodlari.unique()})
+    return pd.DataFrame({'key': compact_codes(df['Ürün Kodu']), 'depo': depots, 'quantity': quantities}, index=df.index)
+
+def inbound_group(lines):
+    """(key, depo, quantity) satırlarından Depo Bakiye delta grubu"""
+    return _delta_group('INBOUND', lines['key'], lines['depo'], lines['quantity'], column_suffix='Depo Bakiye')
+
+def inbound_deltas(df):
+    """Inbound: GE- ürünleri, Belge No 2 dolu satırlar, İrsaliye Miktarı → Depo Bakiye"""
+    return inbound_group(inbound_lines(df))
+
+BRAND_DELTA_BUILDERS = {
+    'SCHAEFFLER LUK': schaeffler_deltas,
+    'ZF İTHAL': zf_ithal_deltas,
+    'DELPHI': delphi_deltas,
+    'ZF YERLİ': zf_yerli_deltas,
+    'VALEO': valeo_deltas,
+    'FILTRON': mann_filtron_deltas,
+    'MANN': mann_filtron_deltas,
+    'BOSCH': bosch_deltas
+}
+
+def build_delta_groups(brand_frames, inbound_df=None, table=None, inbound_totals=None):
+    """Tüm marka dosyalarını delta gruplarına çevir - (gruplar, uyarılar) döndürür
+
+    Delta kodları table'a (verilmezse yeni bir CodeTable) eklenir, gruplar tabloyu 'codes' altında taşır.
+    inbound_totals: inbound defterinden (key, depo, quantity) toplamları - verilirse inbound_df yerine kullanılır.
+    """
+    table = table if table is not None else CodeTable()
+    groups = []
+    notes = []
+
+    if inbound_totals is not None:
+        groups.append(inbound_group(inbound_totals))
+    elif inbound_df is not None and len(inbound_df) > 0:
+        try:
+            groups.append(inbound_deltas(inbound_df))
+        except ValueError as e:
+            notes.append(str(e))
+
+    for brand, brand_df in brand_frames.items():
+        builder = BRAND_DELTA_BUILDERS.get(brand)
+        if builder is None or brand_df is None or len(brand_df) == 0:
+            continue
+        try:
+            groups.append(builder(brand_df, brand))
+        except ValueError as e:
+            notes.append(str(e))
+
+    for group in groups:
+        group['deltas'] = group['deltas'].assign(key_id=table.encode(group['deltas']['key']))
+        group['codes'] = table
+
+    return groups, notes
+
+def _match_ids(frame, column, key_mode, table, cache):
+    """Ana tablo kolonunun kod kimlikleri (blok başına bir kez) - tabloda olmayan kodlar -1"""
+    cache_key = (column, key_mode)
+    if cache_key not in cache:
+        values = KEY_MODES[key_mode](frame[column].astype(str))
+        cache[cache_key] = table.encode(values, add=False)
+    return cache[cache_key]
+
+def apply_delta_groups(frame, groups):
+    """Delta gruplarını tabloya uygula - aynı satırda iki kolon aynı kodu veriyorsa bir kez eklenir"""
+    key_cache = {}
+    cat4_index = None
+
+    for group in groups:
+        deltas = group['deltas']
+        if len(deltas) == 0:
+            continue
+
+        row_filter = None
+        if group['cat4_terms']:
+            if 'CAT4' not in frame.columns:
+                continue
+            if cat4_index is None:
+                cat4_index = BrandMaskIndex(frame['CAT4'])
+            row_filter = cat4_index.mask(group['cat4_terms'])
+
+        table = group['codes']
+        match_columns = [col for col in group['match_columns'] if col in frame.columns]
+        row_ids = [_match_ids(frame, col, group['key_mode'], table, key_cache) for col in match_columns]
+
+        for column, part in deltas.groupby('column', sort=False):
+            # Kimlik -> toplam adet; sondaki eleman tabloda olmayan kodlar (-1) için 0
+            totals = np.zeros(len(table) + 1)
+            np.add.at(totals, part['key_id'].to_numpy(), part['quantity'].to_numpy(dtype=np.float64))
+            totals[MISSING] = 0
+
+            added = np.zeros(len(frame))
+            previous = None
+            for ids in row_ids:
+                values = totals[ids]
+                if previous is not None:
+                    values = np.where(ids != previous, values, 0)
+                added = added + values
+                previous = ids
+
+            if row_filter is not None:
+                added = np.where(row_filter.to_numpy(), added, 0)
+            added = pd.Series(added, index=frame.index)
+
+            if column in frame.columns:
+                # Tam bloktaki BalanceAccumulator.apply ile aynı tip: tamsayı kolon tamsayı kalır
+                current = _numeric(frame[column]).to_numpy(dtype=np.float64) + added.to_numpy()
+                frame[column] = pd.Series(restore_dtype(current, frame[column].dtype), index=frame.index)
+            else:
+                frame[column] = added
+
+    return frame
@@ -0,0 +1,104 @@
+"""Bakiye katkılarının biriktirilmesi
+
+Eşleşen her kod için tabloya `.loc[mask, kolon] += adet` yazmak yerine katkılar
+(satır konumu, kolon, adet) üçlüleri olarak toplanır. Tablo en sonda tek seferde güncellenir:
+üçlüler np.bincount ile satır x kolon matrisine toplanır ve her kolon bir kez yazılır.
+
+Farklı kaynakların (markalar, inbound) birikimleri birbirinden bağımsızdır; ayrı ayrı
+doldurulup merge() ile birleştirilebilir.
+"""
+import numpy as np
+import pandas as pd
+
+from siparis.bakiye import DEPO_NAMES, restore_dtype
+
+BALANCE_COLUMNS = (
+    [f"{depo} Depo Bakiye" for depo in DEPO_NAMES] +
+    [f"{depo} Tedarikçi Bakiye" for depo in DEPO_NAMES]
+)
+
+
+def _row_positions(rows):
+    """Maske veya konumlardan konum dizisi - nullable bool maskede NA eşleşmemiş sayılır"""
+    if isinstance(rows, (pd.Series, pd.Index, pd.api.extensions.ExtensionArray)) and pd.api.types.is_bool_dtype(rows.dtype):
+        # np.asarray NA içeren maskeyi object dizisine çevirir; bool kontrolünden kaçar
+        return np.flatnonzero(rows.to_numpy(dtype=bool, na_value=False))
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        return np.flatnonzero(rows)
+    if rows.dtype == object:
+        raise TypeError("Satırlar bool maske veya tamsayı konum dizisi olmalı")
+    return rows
+
+
+class BalanceAccumulator:
+    """Satır konumu x bakiye kolonu katkı tamponu"""
+
+    def __init__(self, n_rows, columns=BALANCE_COLUMNS):
+        self.n_rows = n_rows
+        self.columns = list(columns)
+        self._positions = {col: i for i, col in enumerate(self.columns)}
+        self._rows = []
+        self._cols = []
+        self._values = []
+
+    def __len__(self):
+        """Kaydedilen katkı (satır) sayısı"""
+        return sum(len(rows) for rows in self._rows)
+
+    def add(self, rows, column, quantity):
+        """Satırlara (bool maske veya konum dizisi) adet ekle - etkilenen satır sayısını döndürür"""
+        if column not in self._positions:
+            raise KeyError(f"Bilinmeyen bakiye kolonu: {column}")
+
+        rows = _row_positions(rows)
+        if len(rows) == 0:
+            return 0
+
+        quantity = float(quantity)
+        self._rows.append(rows.astype(np.int64, copy=False))
+        self._cols.append(np.full(len(rows), self._positions[column], dtype=np.int64))
+        self._values.append(np.full(len(rows), quantity, dtype=np.float64))
+        return len(rows)
+
+    def merge(self, other):
+        """Başka bir birikimin katkılarını ekle (aynı tablo için)"""
+        if other.n_rows != self.n_rows:
+            raise ValueError("Birikimler farklı uzunlukta tablolara ait")
+        column_map = np.array([self._positions[col] for col in other.columns], dtype=np.int64)
+        for rows, cols, values in zip(other._rows, other._cols, other._values):
+            self._rows.append(rows)
+            self._cols.append(column_map[cols])
+            self._values.append(values)
+        return self
+
+    def matrix(self):
+        """(satır, kolon) -> toplam adet matrisi ve katkı alan kolonlar"""
+        n_cols = len(self.columns)
+        if not self._rows:
+            return np.zeros((self.n_rows, n_cols)), []
+
+        rows = np.concatenate(self._rows)
+        cols = np.concatenate(self._cols)
+        values = np.concatenate(self._values)
+
+        flat = rows * n_cols + cols
+        dense = np.bincount(flat, weights=values, minlength=self.n_rows * n_cols).reshape(self.n_rows, n_cols)
+        touched = [self.columns[i] for i in np.unique(cols)]
+        return dense, touched
+
+    def apply(self, frame):
+        """Birikimi tabloya yaz (yerinde) - yalnızca katkı alan kolonlar güncellenir"""
+        if len(frame) != self.n_rows:
+            raise ValueError("Birikim ve tablo satır sayıları farklı")
+
+        dense, touched = self.matrix()
+        for col in touched:
+            added = dense[:, self._positions[col]]
+            if col in frame.columns:
+                dtype = frame[col].dtype
+                current = pd.to_numeric(frame[col], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+                frame[col] = restore_dtype(current + added, dtype)
+            else:
+                frame[col] = added
+        return frame
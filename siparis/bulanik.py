@@ -0,0 +1,196 @@
+"""Eşleşmeyen tedarikçi kodları için toplu fuzzy eşleştirme
+
+Her markada tam eşleşmeyen kodlar marka sonunda birlikte çözülür. Benzerlik ölçüsü
+difflib.SequenceMatcher.ratio() = 2*M / (|a| + |b|) olarak kalır; adaylar iki üst sınırla elenir:
+
+- uzunluk: M <= min(|a|, |b|) - ana tablo kodları uzunluğa göre sıralı tutulur, eşiği geçemeyecek
+  uzunluklar hiç taranmaz,
+- karakter sayısı: M <= ortak karakter sayısı (quick_ratio) - kod başına karakter sayım matrisi
+  üzerinden vektörel hesaplanır.
+
+Kalan adaylar üst sınır sırasıyla puanlanır; sınır en iyi orandan küçük olunca aramaya son verilir.
+Sonuç find_best_match ile aynıdır (eşit oranda listede önce gelen kod).
+
+Fuzzy eşleştirme marka bazında açılır, her markanın kendi eşiği vardır. Varsayılan olarak süre
+sınırı yoktur (Schaeffler ve Valeo önceden de sınırsız aranıyordu); çalıştırma başına süre bütçesi
+verilirse aşılınca kalan kodlar aranmaz - sonuç saate bağlı olduğundan önbelleğe alınmamalıdır.
+Kalıcı kod sözlüğü (kod_sozlugu) önce sorgulanır.
+"""
+import time
+from difflib import SequenceMatcher
+
+import numpy as np
+
+from siparis.kod_sozlugu import METHOD_FUZZY, METHOD_NONE, sheet_version
+
+# Marka -> varsayılan ayar. Schaeffler ve Valeo önceden de fuzzy eşleştiriliyordu.
+FUZZY_BRANDS = {
+    'SCHAEFFLER LUK': {'enabled': True, 'threshold': 0.85},
+    'VALEO': {'enabled': True, 'threshold': 0.85},
+    'ZF İTHAL': {'enabled': False, 'threshold': 0.9},
+    'ZF YERLİ': {'enabled': False, 'threshold': 0.9},
+    'DELPHI': {'enabled': False, 'threshold': 0.9},
+    'MANN': {'enabled': False, 'threshold': 0.9},
+    'FILTRON': {'enabled': False, 'threshold': 0.9},
+    'BOSCH': {'enabled': False, 'threshold': 0.9}
+}
+
+FUZZY_TIME_BUDGET = 0  # saniye, çalıştırma başına; 0 = sınırsız
+FUZZY_TAG_COLUMN = 'Fuzzy Eşleşme'
+
+# Karakter sayım kolonları - alfabe dışı karakterler tek kolonda toplanır (üst sınır bozulmaz)
+_ALPHABET = {char: i for i, char in enumerate('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ.')}
+_OTHER = len(_ALPHABET)
+
+
+def _char_counts(code):
+    counts = np.zeros(_OTHER + 1, dtype=np.int32)
+    for char in code:
+        counts[_ALPHABET.get(char, _OTHER)] += 1
+    return counts
+
+
+class CandidateIndex:
+    """Ana tablo kodları için aday eleme indeksi
+
+    codes: normalize kodlar, öncelik sırasıyla (tekrar ve boş değer olabilir)
+    """
+
+    def __init__(self, codes):
+        # İlk geçiş sırası eşit oranlarda önceliği belirler
+        unique = [code for code in dict.fromkeys(codes) if code]
+        lengths = np.array([len(code) for code in unique], dtype=np.int64)
+        order = np.argsort(lengths, kind='stable')
+
+        self.codes = [unique[i] for i in order]
+        self.positions = order
+        self.lengths = lengths[order]
+        self.counts = np.array([_char_counts(code) for code in self.codes], dtype=np.int32).reshape(-1, _OTHER + 1)
+        self.present = set(unique)
+        self.version = sheet_version(self.present)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def best(self, query, threshold):
+        """(en iyi kod, oran) - eşiği geçen yoksa (None, 0)"""
+        if not query or not self.codes:
+            return None, 0
+
+        size = len(query)
+        # 2*min(a, b)/(a + b) >= t  =>  a*t/(2-t) <= b <= a*(2-t)/t
+        low = np.searchsorted(self.lengths, size * threshold / (2 - threshold) - 1e-9, side='left')
+        high = np.searchsorted(self.lengths, size * (2 - threshold) / threshold + 1e-9, side='right')
+        if low >= high:
+            return None, 0
+
+        overlap = np.minimum(self.counts[low:high], _char_counts(query)).sum(axis=1)
+        bounds = 2.0 * overlap / (size + self.lengths[low:high])
+        candidates = np.flatnonzero(bounds >= threshold)
+        if len(candidates) == 0:
+            return None, 0
+
+        # Yüksek sınır önce, eşitlikte listede önce gelen
+        candidates = candidates[np.lexsort((self.positions[low + candidates], -bounds[candidates]))]
+
+        best_code, best_ratio, best_position = None, 0, None
+        for candidate in candidates:
+            if bounds[candidate] < best_ratio:
+                break
+            row = low + candidate
+            ratio = SequenceMatcher(None, query, self.codes[row]).ratio()
+            if ratio < threshold:
+                continue
+            position = self.positions[row]
+            if ratio > best_ratio or (ratio == best_ratio and position < best_position):
+                best_code, best_ratio, best_position = self.codes[row], ratio, position
+
+        return best_code, best_ratio
+
+
+class FuzzyMatcher:
+    """Çalıştırma boyunca marka ayarları, süre bütçesi, aday indeksleri ve fuzzy etiketleri"""
+
+    def __init__(self, config=None, code_store=None, time_budget=FUZZY_TIME_BUDGET):
+        self.config = {brand: dict(settings) for brand, settings in FUZZY_BRANDS.items()}
+        for brand, settings in (config or {}).items():
+            self.config.setdefault(brand, {'enabled': False, 'threshold': 0.9}).update(settings)
+        self.code_store = code_store
+        self.deadline = time.monotonic() + time_budget if time_budget else None
+        self._indexes = {}
+        self._tags = []
+        self.matched = 0
+        self.skipped = 0
+
+    def enabled(self, brand):
+        return bool(self.config.get(brand, {}).get('enabled'))
+
+    def threshold(self, brand):
+        return float(self.config.get(brand, {}).get('threshold', 0.9))
+
+    def index(self, key, codes):
+        """Aday indeksi - aynı anahtar için bir kez kurulur
+
+        codes: kod listesi veya onu üreten fonksiyon (yalnızca ilk kurulumda çağrılır)
+        """
+        if key not in self._indexes:
+            self._indexes[key] = CandidateIndex(codes() if callable(codes) else codes)
+        return self._indexes[key]
+
+    def _cached(self, brand, query, index, threshold):
+        if self.code_store is None:
+            return None
+        cached = self.code_store.lookup(brand, query, index.present, index.version)
+        if cached is None:
+            return None
+        target_code, method, ratio = cached
+        # Kayıt başka bir eşikle bulunmuş olabilir: fuzzy oranı eşiğin altındaysa veya
+        # 'none' daha yüksek bir eşikle arandıysa yeniden aranır
+        if method == METHOD_FUZZY and (ratio or 0) < threshold:
+            return None
+        if method == METHOD_NONE and (ratio or 0) > threshold:
+            return None
+        return target_code, ratio or 0
+
+    def resolve(self, brand, queries, index):
+        """Kodları toplu çöz - {kod: (hedef kod, oran)}; bulunamayanlar sonuçta yer almaz"""
+        threshold = self.threshold(brand)
+        results = {}
+        for query in dict.fromkeys(queries):
+            if not query:
+                continue
+            cached = self._cached(brand, query, index, threshold)
+            if cached is not None:
+                target_code, ratio = cached
+            else:
+                if self.deadline is not None and time.monotonic() > self.deadline:
+                    self.skipped += 1
+                    continue
+                target_code, ratio = index.best(query, threshold)
+                if self.code_store is not None:
+                    # 'none' kaydında oran, aramanın yapıldığı eşiktir
+                    method = METHOD_FUZZY if target_code else METHOD_NONE
+                    self.code_store.record(brand, query, target_code, method,
+                                           ratio if target_code else threshold, index.version)
+            if target_code:
+                results[query] = (target_code, ratio)
+        return results
+
+    def tag(self, rows, brand, query, target_code, ratio):
+        """Fuzzy eşleşen satırları etiketle (bool maske veya konum dizisi)"""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        if len(rows):
+            self.matched += 1
+            self._tags.append((rows, f"{brand}: {query} → {target_code} ({ratio:.2f})"))
+
+    def tag_column(self, n_rows):
+        """Etiket kolonu değerleri - hiç fuzzy eşleşme yoksa None"""
+        if not self._tags:
+            return None
+        labels = [[] for _ in range(n_rows)]
+        for rows, text in self._tags:
+            for row in rows:
+                labels[row].append(text)
+        return np.array(['; '.join(items) for items in labels], dtype=object)
@@ -0,0 +1,299 @@
+"""Sonuç tablolarının dışa aktarımı
+
+Toplam kolonları varsayılan olarak hesaplanmış sayı olarak yazılır. Formül istenirse her satıra
+=SUM(...) formülü hesaplanmış değeriyle (önbellek değeri) birlikte yazılır: pandas/openpyxl gibi
+okuyucular toplamı görür, Excel'de satırlar sıralanabilir, eklenip silinebilir. Çok hücreli dizi
+formülü kullanılmaz - Excel onun bir parçasının değiştirilmesine izin vermez.
+
+xlsx dışında Parquet (zstd), Feather ve gzip CSV de yazılabilir. Sütunsal formatlar tekrarlanan
+kolon adlarını kabul etmediği için ikinci kopyalar read_excel'deki gibi '.1' ekiyle adlandırılır.
+Kod ve metin kolonlarının tipi çıktı düzeninde bildirilir (sema.COLUMN_TYPES); blok blok yazımda
+ilk blokta yalnızca rakam içeren bir kod kolonu sonraki bloklarda da metin kalır. Fiyat ve oran
+kolonlarında sayıya çevrilemeyen metin ('12,50' gibi) varsa kolon metin yazılır; blok blok yazımda
+şema ilk bloktan belirlendiği için sonraki bloklardaki bu değerler boş yazılır ve ConversionWarning
+verilir.
+
+Toplu kullanım - dışa aktarılmış bir xlsx dosyasını parça parça okuyup dönüştürür:
+    python -m siparis.cikti eslestirilmis_veri.xlsx --format parquet
+"""
+import gzip
+import warnings
+
+import pandas as pd
+
+TOTAL_MODES = ('values', 'formula')
+
+OUTPUT_FORMATS = {
+    'xlsx': {
+        'label': 'Excel (xlsx)',
+        'extension': 'xlsx',
+        'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    },
+    'parquet': {
+        'label': 'Parquet (zstd)',
+        'extension': 'parquet',
+        'mime': 'application/vnd.apache.parquet'
+    },
+    'feather': {
+        'label': 'Feather',
+        'extension': 'feather',
+        'mime': 'application/vnd.apache.arrow.file'
+    },
+    'csv.gz': {
+        'label': 'CSV (gzip)',
+        'extension': 'csv.gz',
+        'mime': 'application/gzip'
+    }
+}
+
+CSV_CHUNK_SIZE = 50_000
+
+
+class ConversionWarning(UserWarning):
+    """Sütunsal çıktıda sayıya çevrilemeyip boş yazılan değerler"""
+
+
+def _column_letters(columns, sources):
+    from xlsxwriter.utility import xl_col_to_name
+    return [xl_col_to_name(columns.index(col)) for col in sources if col in columns]
+
+def write_excel(df, output, text_columns=(), sum_columns=None, total_mode='values', sheet_name='Sheet1'):
+    """DataFrame'i xlsx olarak yaz
+
+    sum_columns: {hedef kolon: [toplanan kolonlar]}
+    total_mode: 'values' -> hedef kolondaki sayılar olduğu gibi yazılır,
+                'formula' -> hedef kolona satır başına =SUM(D2,E2,...) formülü, hedef kolondaki
+                sayı önbellek değeri olarak yazılır
+    """
+    if total_mode not in TOTAL_MODES:
+        raise ValueError(f"Geçersiz toplam modu: {total_mode} (geçerli: {list(TOTAL_MODES)})")
+
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+
+        workbook = writer.book
+        worksheet = writer.sheets[sheet_name]
+        columns = list(df.columns)
+
+        # Metin kolonları - hücre hücre değil kolon formatı ile
+        text_format = workbook.add_format({'num_format': '@'})
+        for col in text_columns:
+            if col in columns:
+                idx = columns.index(col)
+                worksheet.set_column(idx, idx, None, text_format)
+
+        if total_mode == 'formula' and len(df) > 0:
+            for target, sources in (sum_columns or {}).items():
+                letters = _column_letters(columns, sources)
+                if target not in columns or not letters:
+                    continue
+                idx = columns.index(target)
+                totals = pd.to_numeric(df.iloc[:, idx], errors='coerce').fillna(0).tolist()
+                # Excel'de satır 1 başlık
+                for row_num, total in enumerate(totals, start=1):
+                    cells = ','.join(f"{letter}{row_num + 1}" for letter in letters)
+                    worksheet.write_formula(row_num, idx, f"=SUM({cells})", None, total)
+
+    return output
+
+def unique_column_names(columns):
+    """Tekrarlanan kolon adlarına read_excel gibi '.1', '.2' eki ver"""
+    seen = {}
+    result = []
+    for col in columns:
+        name = str(col)
+        if name in seen:
+            seen[name] += 1
+            candidate = f"{name}.{seen[name]}"
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f"{name}.{seen[name]}"
+            seen[candidate] = 0
+            name = candidate
+        else:
+            seen[name] = 0
+        result.append(name)
+    return result
+
+def _text_values(col):
+    """Sayıya çevrilemeyen dolu değerlerin maskesi - boş sayılan değerler ('-', '') hariç"""
+    from siparis.dogrulama import EMPTY_VALUES
+
+    if pd.api.types.is_numeric_dtype(col):
+        return pd.Series(False, index=col.index)
+    values = pd.to_numeric(col, errors='coerce')
+    return values.isna() & col.notna() & ~col.astype(str).str.strip().str.lower().isin(EMPTY_VALUES)
+
+def _arrow_schema(df, column_types=None):
+    """Bloklar arasında sabit şema - tipi bildirilmiş kolonlar bildirimle, diğerleri ilk bloğun tipiyle
+
+    column_types: {kolon: 'string' | 'float'}; verilmezse çıktı düzeninin bildirimi (sema.COLUMN_TYPES).
+    'float' bildirilen kolonda sayıya çevrilemeyen metin varsa kolon metin yazılır.
+    """
+    import pyarrow as pa
+
+    if column_types is None:
+        from siparis.sema import COLUMN_TYPES
+        column_types = COLUMN_TYPES
+
+    fields = []
+    for name, (column, col) in zip(unique_column_names(df.columns), df.items()):
+        declared = column_types.get(str(column))
+        if declared == 'string':
+            fields.append(pa.field(name, pa.string()))
+        elif declared == 'float':
+            # ERP fiyatları virgüllü ondalık gelebilir - değer kaybetmek yerine metin
+            fields.append(pa.field(name, pa.string() if _text_values(col).any() else pa.float64()))
+        elif pd.api.types.is_bool_dtype(col) or not pd.api.types.is_numeric_dtype(col):
+            fields.append(pa.field(name, pa.string()))
+        elif pd.api.types.is_integer_dtype(col):
+            fields.append(pa.field(name, pa.int64()))
+        else:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+def _conversion_error(field, col, mask, reason):
+    examples = col[mask].astype(str).unique()[:3].tolist()
+    return ValueError(
+        f"'{field.name}' kolonu {reason} (örnek: {examples}) - kolonun tipini column_types ile bildirin"
+    )
+
+def _arrow_table(df, schema):
+    """DataFrame'i şemaya çevir - metin kolonlarına her değer yazılır, sayısal kolonda sayıya
+    çevrilemeyen değerler boş yazılıp ConversionWarning verilir, tam sayı kolonunda kesirli değer hata
+    """
+    import pyarrow as pa
+
+    arrays = []
+    for field, (_, col) in zip(schema, df.items()):
+        if pa.types.is_string(field.type):
+            values = col.astype('string')
+        else:
+            values = pd.to_numeric(col, errors='coerce')
+            # Boş sayılan değerler ('-', '') sessizce, diğer metinler uyarıyla null yazılır
+            lost = _text_values(col)
+            if lost.any():
+                examples = col[lost].astype(str).unique()[:3].tolist()
+                warnings.warn(ConversionWarning(
+                    f"'{field.name}' kolonunda sayıya çevrilemeyen {int(lost.sum()):,} değer boş yazıldı "
+                    f"(örnek: {examples})"
+                ), stacklevel=2)
+            if pa.types.is_integer(field.type):
+                fractional = values.notna() & (values != values.round())
+                if fractional.any():
+                    raise _conversion_error(field, col, fractional, "tam sayı ama kesirli değerler var")
+                values = values.astype('Int64')
+            else:
+                values = values.astype('float64')
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def _write_csv_gzip(df, output, header=True):
+    with gzip.open(output, 'at' if not header else 'wt', encoding='utf-8', newline='') as handle:
+        df.to_csv(handle, index=False, header=header, chunksize=CSV_CHUNK_SIZE)
+
+def write_table(df, output, fmt='xlsx', column_types=None, **excel_options):
+    """DataFrame'i seçilen formatta yaz (output: dosya yolu veya BytesIO)
+
+    column_types yalnızca Parquet/Feather için (bkz. _arrow_schema), excel_options yalnızca xlsx
+    için kullanılır (text_columns, sum_columns, total_mode).
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Geçersiz çıktı formatı: {fmt} (geçerli: {list(OUTPUT_FORMATS)})")
+
+    if fmt == 'xlsx':
+        return write_excel(df, output, **excel_options)
+
+    if fmt == 'csv.gz':
+        if hasattr(output, 'write'):
+            with gzip.GzipFile(fileobj=output, mode='wb') as compressed:
+                df.to_csv(compressed, index=False, chunksize=CSV_CHUNK_SIZE, encoding='utf-8')
+        else:
+            _write_csv_gzip(df, output)
+        return output
+
+    table = _arrow_table(df, _arrow_schema(df, column_types))
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, output, compression='zstd')
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, output)
+    return output
+
+def write_table_stream(chunks, path, fmt='xlsx', column_types=None, **excel_options):
+    """DataFrame bloklarını seçilen formatta tek dosyaya sırayla yaz - satır sayısını döndürür
+
+    Sütunsal formatlarda şema çıktı düzeninin bildiriminden (kod ve metin kolonları her zaman
+    metin), bildirilmemiş kolonlar için ilk bloktan belirlenir. Sonraki bir bloğun sayısal kolonundaki
+    metin değerler boş yazılır (ConversionWarning), tam sayı kolonundaki kesirli değerler hata verir.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Geçersiz çıktı formatı: {fmt} (geçerli: {list(OUTPUT_FORMATS)})")
+
+    if fmt == 'xlsx':
+        from siparis.parcali import write_excel_stream
+        return write_excel_stream(chunks, path, **excel_options)
+
+    row_count = 0
+
+    if fmt == 'csv.gz':
+        for chunk in chunks:
+            _write_csv_gzip(chunk, path, header=row_count == 0)
+            row_count += len(chunk)
+        return row_count
+
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = _arrow_schema(chunk, column_types)
+                if fmt == 'parquet':
+                    writer = pq.ParquetWriter(path, schema, compression='zstd')
+                else:
+                    # Feather v2 = Arrow IPC dosya formatı
+                    writer = ipc.new_file(path, schema, options=ipc.IpcWriteOptions(compression='lz4'))
+            writer.write_table(_arrow_table(chunk, schema))
+            row_count += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return row_count
+
+
+def main(argv=None):
+    """Dışa aktarılmış xlsx dosyasını başka bir formata çevir (toplu kullanım)"""
+    import argparse
+    from pathlib import Path
+
+    from siparis.parcali import DEFAULT_CHUNK_SIZE, iter_excel_chunks
+
+    parser = argparse.ArgumentParser(description="xlsx çıktısını Parquet/Feather/CSV formatına çevir")
+    parser.add_argument('girdi', nargs='+', help="Dönüştürülecek xlsx dosyaları")
+    parser.add_argument('--format', dest='fmt', default='parquet',
+                        choices=[fmt for fmt in OUTPUT_FORMATS if fmt != 'xlsx'])
+    parser.add_argument('--cikti-klasoru', default=None, help="Varsayılan: girdi dosyasının klasörü")
+    parser.add_argument('--blok', type=int, default=DEFAULT_CHUNK_SIZE, help="Okuma blok boyutu (satır)")
+    args = parser.parse_args(argv)
+
+    extension = OUTPUT_FORMATS[args.fmt]['extension']
+    for source in args.girdi:
+        source = Path(source)
+        target_dir = Path(args.cikti_klasoru) if args.cikti_klasoru else source.parent
+        target = target_dir / f"{source.stem}.{extension}"
+
+        with open(source, 'rb') as f:
+            chunks = (
+                chunk.set_axis(unique_column_names(chunk.columns), axis=1)
+                for chunk in iter_excel_chunks(f, args.blok)
+            )
+            rows = write_table_stream(chunks, str(target), args.fmt)
+        print(f"{source.name} -> {target} ({rows:,} satır)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Sonuç tablosunun depo bazında ayrı dosyalara bölünmesi
+
+Her depo (İmes, İkitelli, Ankara, Maslak, Bolu) için ortak kolonlar (ürün kodları, açıklama,
+kategoriler, fiyat ve kampanya kolonları) ile yalnızca o deponun DEVIR/ALIŞ/SATIS/STOK, depo ve
+tedarikçi bakiyesi, sipariş ve ay tahmini kolonlarını içeren bir tablo çıkarılır. Diğer depoların
+kolonları ve depolar arası Toplam Depo Bakiye atılır; depo kolonlarının hepsi 0 olan satırlar
+dosyaya yazılmaz.
+
+Dosyalar süreç havuzunda paralel yazılır (xlsxwriter yazımı saf Python, iş parçacıkları GIL'de
+sıraya girer) ve tek zip'te döner. Havuz verilmezse çağrı boyunca bir spawn havuzu açılıp
+kapatılır (sayfa böyle kullanır, havuz önbellekte tutulmaz); küçük tablolarda ve tek çekirdekli
+makinede süreç başlatma maliyeti kazançtan büyük olduğundan sıralı yazılır.
+
+Kullanım:
+    python -m siparis.depo_ayirma eslestirilmis_veri.xlsx --format parquet
+"""
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from siparis.cikti import OUTPUT_FORMATS, write_table
+from siparis.ikmal import ORDER_DEPOS, forecast_columns
+from siparis.sema import TOTAL_DEPO_COLUMN, TEXT_COLUMNS
+
+DEPO_COLUMN_TYPES = ('DEVIR', 'ALIŞ', 'SATIS', 'STOK')
+PARALLEL_MIN_ROWS = 20_000  # bunun altında dosyalar sıralı yazılır
+
+
+def depot_columns(columns, depo):
+    """(deponun kendi kolonları, tablodan atılacak kolonlar) - depo: ORDER_DEPOS'taki ad"""
+    columns = [str(col) for col in columns]
+    forecasts = forecast_columns(columns)
+    owned = {}
+    for i, (name, block) in enumerate(ORDER_DEPOS):
+        owned[name] = (
+            [f"{block} {col_type}" for col_type in DEPO_COLUMN_TYPES] +
+            [f"{name} Depo Bakiye", f"{name} Tedarikçi Bakiye", f"{name} Sipariş"] +
+            forecasts[i]
+        )
+    if depo not in owned:
+        raise ValueError(f"Bilinmeyen depo: {depo} (geçerli: {[name for name, _ in ORDER_DEPOS]})")
+
+    present = set(columns)
+    own = [col for col in owned[depo] if col in present]
+    dropped = {col for name, cols in owned.items() if name != depo for col in cols} | {TOTAL_DEPO_COLUMN}
+    return own, dropped
+
+def depot_frame(df, depo):
+    """Deponun tablosu - ortak kolonlar ve deponun kolonları, depo kolonları 0 olmayan satırlar"""
+    own, dropped = depot_columns(df.columns, depo)
+    # Kampanya Tipi, not ve Toplam İsk iki kez yer alır - kolonlar konumla seçilir
+    positions = [i for i, col in enumerate(df.columns) if str(col) not in dropped]
+    frame = df.iloc[:, positions]
+    if own:
+        values = np.column_stack([
+            pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            for col in own
+        ])
+        frame = frame[np.any(np.nan_to_num(values) != 0, axis=1)]
+    return frame.reset_index(drop=True)
+
+def split_depots(df):
+    """{depo: tablo} - ORDER_DEPOS sırasıyla"""
+    return {depo: depot_frame(df, depo) for depo, _ in ORDER_DEPOS}
+
+def _write_part(depo, frame, fmt, excel_options):
+    """Tek deponun dosyası - süreç havuzunda çalışır (modül düzeyinde olmalı)"""
+    output = io.BytesIO()
+    write_table(frame, output, fmt, **excel_options)
+    return depo, len(frame), output.getvalue()
+
+def file_name(depo, fmt='xlsx', prefix='siparis'):
+    return f"{prefix}_{depo}.{OUTPUT_FORMATS[fmt]['extension']}"
+
+def make_pool(max_workers=None):
+    """Depo dosyalarını yazacak spawn süreç havuzu (Streamlit sunucusu çok iş parçacıklı)"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(
+        max_workers=max_workers or min(len(ORDER_DEPOS), os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+def write_depot_zip(df, fmt='xlsx', executor=None, prefix='siparis'):
+    """Depo dosyalarını yazıp zip'le - (zip içeriği, {depo: satır sayısı})
+
+    executor: paylaşılan süreç havuzu; verilmezse büyük tablolar için (çok çekirdekli makinede)
+    çağrı boyunca açılır.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Geçersiz çıktı formatı: {fmt} (geçerli: {list(OUTPUT_FORMATS)})")
+
+    parts = split_depots(df)
+    excel_options = {}
+    if fmt == 'xlsx':
+        excel_options['text_columns'] = tuple(col for col in TEXT_COLUMNS if col in df.columns)
+    jobs = [(depo, frame, fmt, excel_options) for depo, frame in parts.items()]
+
+    if executor is None and (len(df) < PARALLEL_MIN_ROWS or (os.cpu_count() or 1) < 2):
+        results = [_write_part(*job) for job in jobs]
+    elif executor is None:
+        with make_pool() as pool:
+            results = list(pool.map(_write_part, *zip(*jobs)))
+    else:
+        results = list(executor.map(_write_part, *zip(*jobs)))
+
+    output = io.BytesIO()
+    # Tüm formatlar kendi içinde sıkıştırılmış (xlsx, zstd, lz4, gzip) - zip yalnızca paketler
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as archive:
+        for depo, _, data in results:
+            archive.writestr(file_name(depo, fmt, prefix), data)
+    return output.getvalue(), {depo: rows for depo, rows, _ in results}
+
+
+def main(argv=None):
+    """Dışa aktarılmış sonuç dosyasını depo bazında böl"""
+    import argparse
+    import time
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Sonuç tablosunu depo bazında ayrı dosyalara böl")
+    parser.add_argument('dosya', help="Eşleştirilmiş veri (xlsx, parquet, feather veya csv.gz)")
+    parser.add_argument('--format', choices=list(OUTPUT_FORMATS), default='xlsx', help="Depo dosyalarının formatı")
+    parser.add_argument('--cikti', help="Zip dosyası (varsayılan: <dosya>_depolar.zip)")
+    parser.add_argument('--surec', type=int, default=None, help="Süreç sayısı (varsayılan: depo sayısı)")
+    args = parser.parse_args(argv)
+
+    path = Path(args.dosya)
+    name = path.name.lower()
+    if name.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    elif name.endswith('.feather'):
+        df = pd.read_feather(path)
+    elif name.endswith('.csv.gz'):
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_excel(path, dtype={col: str for col in TEXT_COLUMNS})
+
+    target = Path(args.cikti) if args.cikti else path.with_name(f"{path.name.split('.')[0]}_depolar.zip")
+    start = time.perf_counter()
+    with make_pool(args.surec) as pool:
+        data, counts = write_depot_zip(df, args.format, pool)
+    target.write_bytes(data)
+    elapsed = time.perf_counter() - start
+
+    for depo, rows in counts.items():
+        print(f"{depo}: {rows:,} satır")
+    print(f"{target} ({len(data) / 1024 / 1024:.1f} MB, {elapsed:.2f} sn)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Yüklenen dosyaların ağır işlemden önce şema doğrulaması
+
+Dosyanın tamamı okunmaz: openpyxl read-only modunda yalnızca başlık satırı ve ilk SAMPLE_ROWS
+satır okunur. Başlıkta zorunlu kolonlar (ve Mann/Filtron gibi alternatifli kolon grupları)
+aranır, sayısal kolonlar örnek üzerinde pd.to_numeric ile denetlenir. Tüm dosyaların sorunları
+tek listede döner; böylece hatalı yükleme, diğer markalar işlenmeden ve dosya tamamen
+okunmadan reddedilir.
+
+Seviyeler:
+    'hata'  - işlem başlatılmaz (eksik zorunlu kolon, hiç sayı içermeyen adet kolonu, boş dosya)
+    'uyarı' - işlem sürer (önerilen kolon eksik, adet kolonunda sayı olmayan değerler)
+
+Kullanım:
+    python -m siparis.dogrulama paket/
+    python -m siparis.dogrulama paket/ --sayfa bosch
+"""
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+
+import pandas as pd
+
+from siparis.bakiye import MANN_MATERIAL_COLUMNS
+from siparis.onbellek import file_bytes
+
+SAMPLE_ROWS = 200
+
+# Sayısal kolonlarda boş sayılan değerler (dönüşümde 0'a çevrilir)
+EMPTY_VALUES = ('', '-', 'nan', 'none', 'null')
+
+# Dosya anahtarı -> etiket, zorunlu kolonlar, alternatif gruplar (en az biri), sayısal kolonlar,
+# önerilen kolonlar (eksikse uyarı)
+FILE_SCHEMAS = {
+    'main_file': {
+        'label': 'Ana Excel',
+        'required': ['URUNKODU'],
+        'recommended': ['CAT4'],
+    },
+    'inbound_excel': {
+        'label': 'Inbound',
+        'required': ['Depo', 'Ürün Kodu', 'İrsaliye Miktarı'],
+        'numeric': ['İrsaliye Miktarı'],
+        'recommended': ['Belge No 2'],
+    },
+    'excel1': {
+        'label': 'Schaeffler Luk',
+        'required': ['PO Number(L)', 'Catalogue number', 'Ordered quantity'],
+        'numeric': ['Ordered quantity'],
+    },
+    'excel2': {
+        'label': 'ZF İthal',
+        'required': ['Material', 'Purchase order no.', 'Qty.in Del.', 'Open quantity'],
+        'numeric': ['Qty.in Del.', 'Open quantity'],
+    },
+    'excel3': {
+        'label': 'Delphi',
+        'required': ['Şube', 'Material', 'Cum.qty'],
+        'numeric': ['Cum.qty'],
+    },
+    'excel4': {
+        'label': 'ZF Yerli',
+        'required': ['Basic No.', 'Ship-to Name', 'Outstanding Quantity'],
+        'numeric': ['Outstanding Quantity'],
+    },
+    'excel5': {
+        'label': 'Valeo',
+        'required': ['Müşteri P/O No.', 'Valeo Ref.', 'Sipariş Adeti'],
+        'numeric': ['Sipariş Adeti'],
+    },
+    'excel6': {
+        'label': 'Filtron',
+        'required': ['Müşteri SatınAlma No', 'Açık Sipariş Adedi'],
+        'any_of': [MANN_MATERIAL_COLUMNS],
+        'numeric': ['Açık Sipariş Adedi'],
+    },
+    'excel7': {
+        'label': 'Mann',
+        'required': ['Müşteri SatınAlma No', 'Açık Sipariş Adedi'],
+        'any_of': [MANN_MATERIAL_COLUMNS],
+        'numeric': ['Açık Sipariş Adedi'],
+    },
+    'excel8': {
+        'label': 'Bosch',
+        'required': ['Depo Kodu', 'Ürün Grubu', 'Bosch No', 'Fatura ve Sevk Edilmemiş Toplam'],
+        'numeric': ['Fatura ve Sevk Edilmemiş Toplam'],
+    },
+}
+
+# BOSCH sayfasının üç dosyası (bakiye raporu Sipariş sayfasındaki Bosch dosyasından farklı düzende)
+BOSCH_SCHEMAS = {
+    'bakiye_raporu': {
+        'label': 'BOSCH Bakiye Raporu',
+        'required': ['Sipariş Notu', 'Ürün Grubu', 'Bosch No', 'Fatura ve Sevk Edilmemiş Toplam'],
+        'numeric': ['Fatura ve Sevk Edilmemiş Toplam'],
+    },
+    'inbound_excel': {
+        'label': 'InBound',
+        'required': ['Cari', 'Sipariş No', 'Ürün Kodu', 'İrsaliye Miktarı'],
+        'numeric': ['İrsaliye Miktarı'],
+    },
+    'siparis_kalemleri': {
+        'label': 'Sipariş Kalemleri',
+        'required': ['SIPARIS_NO', 'STOK_KODU', 'SIPARIS_MIKTARI', 'KALAN_MIKTAR'],
+        'numeric': ['SIPARIS_MIKTARI', 'KALAN_MIKTAR'],
+    },
+}
+
+
+@dataclass(frozen=True)
+class Problem:
+    """Bir dosyada bulunan şema sorunu"""
+    file_key: str
+    label: str
+    level: str  # 'hata' | 'uyarı'
+    message: str
+
+    def __str__(self):
+        return f"{self.label}: {self.message}"
+
+
+def read_sample(source, rows=SAMPLE_ROWS, name=None):
+    """İlk sayfanın başlık dahil ilk rows+1 dolu satırı - indeks Excel satır numarası
+
+    Dosya tamamen okunmaz; .xls dosyaları pandas ile aynı satır sınırıyla okunur.
+    """
+    data = file_bytes(source)
+    name = (name or getattr(source, 'name', None) or str(source)).lower()
+    if name.endswith('.xls'):
+        sample = pd.read_excel(BytesIO(data), header=None, nrows=rows + 1)
+        sample.index += 1
+        return sample
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        sample, numbers = [], []
+        for number, row in enumerate(workbook.worksheets[0].iter_rows(values_only=True), start=1):
+            # Tamamen boş satırları atla (read_excel ile aynı)
+            if all(value is None for value in row):
+                continue
+            sample.append(row)
+            numbers.append(number)
+            if len(sample) > rows:
+                break
+    finally:
+        workbook.close()
+    return pd.DataFrame(sample, index=numbers)
+
+def _header(sample):
+    if sample.empty:
+        return []
+    return [str(value).strip() for value in sample.iloc[0] if value is not None and not pd.isna(value)]
+
+def read_header(source, name=None):
+    """Yalnızca başlık satırındaki kolon adları"""
+    return _header(read_sample(source, rows=0, name=name))
+
+def _header_row_hint(sample, expected):
+    """Beklenen kolonlar başlıkta değil de sonraki bir satırda geçiyorsa o satırın numarası"""
+    expected = set(expected)
+    for position in range(1, len(sample)):
+        values = {str(value).strip() for value in sample.iloc[position] if value is not None}
+        if len(expected & values) >= max(1, len(expected) // 2):
+            return sample.index[position]
+    return None
+
+def _non_numeric(values):
+    """Boş olmayan ve sayıya çevrilemeyen değerlerin maskesi"""
+    text = values.astype(str).str.strip()
+    filled = values.notna() & ~text.str.lower().isin(EMPTY_VALUES)
+    return filled & pd.to_numeric(values, errors='coerce').isna(), filled
+
+def validate_sample(sample, schema, file_key=''):
+    """Başlık ve örnek satırlar üzerinde şema denetimi - Problem listesi"""
+    label = schema['label']
+    header = _header(sample)
+    if not header:
+        return [Problem(file_key, label, 'hata', "dosya boş veya başlık satırı okunamadı")]
+
+    problems = []
+    required = list(schema.get('required', []))
+    missing = [col for col in required if col not in header]
+    if missing:
+        message = f"eksik kolonlar: {missing}"
+        hint = _header_row_hint(sample, required)
+        if hint:
+            message += f" (başlık {hint}. satırda görünüyor, ilk satır başlık olmalı)"
+        problems.append(Problem(file_key, label, 'hata', message))
+    for group in schema.get('any_of', []):
+        if not any(col in header for col in group):
+            problems.append(Problem(file_key, label, 'hata', f"şu kolonlardan biri gerekli: {list(group)}"))
+    for col in schema.get('recommended', []):
+        if col not in header:
+            problems.append(Problem(file_key, label, 'uyarı', f"'{col}' kolonu yok"))
+
+    # Tip denetimi yalnızca örnek satırlarda, bulunan sayısal kolonlar için
+    body = sample.iloc[1:]
+    positions = {name: i for i, name in reversed(list(enumerate(str(value).strip() for value in sample.iloc[0])))}
+    for col in schema.get('numeric', []):
+        if col not in positions or body.empty:
+            continue
+        bad, filled = _non_numeric(body.iloc[:, positions[col]])
+        if not bad.any():
+            continue
+        examples = body.iloc[:, positions[col]][bad].astype(str).unique()[:3].tolist()
+        if bad.sum() == filled.sum():
+            problems.append(Problem(file_key, label, 'hata',
+                                    f"'{col}' kolonunda sayı yok (örnek: {examples}) - kolonlar kaymış olabilir"))
+        else:
+            problems.append(Problem(file_key, label, 'uyarı',
+                                    f"'{col}' kolonunda ilk {len(body)} satırın {int(bad.sum())} tanesi sayı değil "
+                                    f"(örnek: {examples}) - 0 sayılacak"))
+    return problems
+
+def validate_file(source, file_key, schemas=FILE_SCHEMAS, rows=SAMPLE_ROWS):
+    """Tek dosyanın doğrulaması - okunamayan dosya da 'hata' olarak döner"""
+    schema = schemas[file_key]
+    try:
+        sample = read_sample(source, rows)
+    except Exception as e:
+        return [Problem(file_key, schema['label'], 'hata', f"dosya okunamadı: {e}")]
+    return validate_sample(sample, schema, file_key)
+
+def validate_files(files, schemas=FILE_SCHEMAS, rows=SAMPLE_ROWS):
+    """{anahtar: dosya} - yüklenen tüm dosyaların sorunları tek listede (dosya sırasıyla)
+
+    Yüklenmemiş (None) dosyalar atlanır; dosyalar paralel okunur.
+    """
+    keys = [key for key, source in files.items() if source is not None and key in schemas]
+    if not keys:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(keys), 8)) as pool:
+        results = pool.map(lambda key: validate_file(files[key], key, schemas, rows), keys)
+        return [problem for problems in results for problem in problems]
+
+def has_errors(problems):
+    return any(problem.level == 'hata' for problem in problems)
+
+
+def main(argv=None):
+    """Girdi paketindeki dosyaları doğrula - hata varsa çıkış kodu 1"""
+    import argparse
+    import time
+
+    from siparis.karsilastirma import bundle_files
+
+    parser = argparse.ArgumentParser(description="Girdi dosyalarının şema doğrulaması")
+    parser.add_argument('paket', help="Girdi paketi klasörü (karsilastirma.PAKET_DOSYALARI adlarıyla)")
+    parser.add_argument('--sayfa', choices=['siparis', 'bosch'], default='siparis', help="Doğrulanacak sayfanın dosyaları")
+    parser.add_argument('--ornek', type=int, default=SAMPLE_ROWS, help="Tip denetimi için okunacak satır sayısı")
+    args = parser.parse_args(argv)
+
+    files = bundle_files(args.paket)
+    if args.sayfa == 'bosch':
+        files = {'bakiye_raporu': files['excel8'], 'inbound_excel': files['inbound_excel'],
+                 'siparis_kalemleri': files['siparis_kalemleri']}
+        schemas = BOSCH_SCHEMAS
+    else:
+        schemas = FILE_SCHEMAS
+
+    start = time.perf_counter()
+    problems = validate_files(files, schemas, args.ornek)
+    elapsed = time.perf_counter() - start
+    checked = sum(1 for key, source in files.items() if source is not None and key in schemas)
+    for problem in problems:
+        print(f"[{problem.level}] {problem}")
+    print(f"{checked} dosya, {len(problems)} sorun ({elapsed * 1000:.0f} ms)")
+    return 1 if has_errors(problems) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
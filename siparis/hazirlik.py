@@ -0,0 +1,237 @@
+"""Gece dışa aktarımının önceden hazırlanması (ön ısıtma)
+
+ERP'nin gece dışa aktarımı bir bırakma klasörüne düşer. Hazırlık işi klasörü izler ve yazımı
+biten (SETTLE_SECONDS boyunca değişmeyen) en yeni dosya için sabah kullanıcıdan önce şunları yapar:
+
+- okuma: sonuç yüklemedeki ile aynı anahtarla (onbellek.content_key, 'ana') disk önbelleğine yazılır,
+  dosya sayfadan yüklendiğinde yeniden okunmaz,
+- dönüşüm: Sipariş sayfasının transform_frame'i ile; anahtar içerik, ay (dinamik ay kolonları) ve
+  kaynak sürümünü (sayfa ve siparis paketi) içerir,
+- kod indeksi: ana tablonun eşleştirme kolonlarının normalize kodları ve kimlikleri (SheetCodes).
+
+Son hazırlanan dosya hazirlik.json'a yazılır; sayfa bunu "bugünün dışa aktarımı" olarak sunar.
+Aynı içerikli dosya yüklendiğinde de oturum hazır ve indekslenmiş tablodan başlar.
+
+Kullanım:
+    python -m siparis.hazirlik                       # bırakma klasöründeki en yeni dosyayı hazırla
+    python -m siparis.hazirlik gelen/ --izle --aralik 120
+"""
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from siparis.onbellek import (
+    CACHE_DIR, content_key, ensure_private_dir, file_bytes, load_cached, read_excel_bytes, store_cached
+)
+
+DROP_DIR = Path(os.environ.get('SIPARIS_GELEN_DIR', Path.home() / '.siparis' / 'gelen'))
+EXPORT_SUFFIXES = ('.xlsx', '.xls')
+SETTLE_SECONDS = 30  # dosya bu kadar süre değişmemişse yazımı bitmiş sayılır
+WATCH_INTERVAL = 60  # saniye
+
+PAGE_PATH = Path(__file__).resolve().parent.parent / 'pages' / 'SiparişOluşturma.py'
+MANIFEST_NAME = 'hazirlik.json'
+
+# Hazırlanmış tablonun kaynağı - DataFrame.attrs içinde taşınır, kod indeksi bununla bulunur
+SOURCE_ATTR = 'siparis_kaynak'
+
+# İndeksi önceden kurulan (kolonlar, normalizasyon) çiftleri - eşleştirmede kullanılanlar
+INDEX_KEYS = [
+    (column, mode)
+    for mode in ('compact', 'clean')
+    for column in ('URUNKODU', 'Düzenlenmiş Ürün Kodu')
+]
+
+
+@lru_cache(maxsize=1)
+def page_version():
+    """Sipariş sayfası ve siparis paketi kaynaklarının kısa özeti
+
+    Dönüşüm ve kod indeksi sayfanın yanında sema, kodlar, kod_tablosu gibi modüllere de bağlıdır;
+    bunlardan biri değişince (dağıtım) eski hazırlıklar kullanılmaz.
+    """
+    digest = hashlib.sha256(PAGE_PATH.read_bytes())
+    for path in sorted(Path(__file__).resolve().parent.glob('*.py')):
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+def _period():
+    return datetime.date.today().strftime('%Y-%m')
+
+def transform_key(source_key):
+    """Dönüşüm sonucunun önbellek anahtarı (ay ve kaynak sürümüyle)"""
+    return f"donusum-{_period()}-{page_version()}-{source_key}"
+
+def index_key(source_key):
+    return f"kodlar-{_period()}-{page_version()}-{source_key}"
+
+def index_state(frame):
+    """Ana tablonun kod indeksi durumu (normalize kodlar, kod tablosu, kimlikler)"""
+    from siparis.kod_tablosu import CodeTable, SheetCodes
+
+    sheet = SheetCodes(CodeTable(), frame)
+    for column, mode in INDEX_KEYS:
+        if column in frame.columns:
+            sheet.ids(column, mode)
+    return sheet.state()
+
+def load_prepared(source_key):
+    """Hazırlanmış dönüşüm tablosu - yoksa None; tablo kaynağını attrs içinde taşır"""
+    frame = load_cached(transform_key(source_key))
+    if frame is not None:
+        frame.attrs[SOURCE_ATTR] = source_key
+    return frame
+
+def load_index(frame):
+    """Tablonun hazırlanmış kod indeksi durumu - tablo hazırlıktan gelmiyorsa veya indeks yoksa None"""
+    source_key = frame.attrs.get(SOURCE_ATTR)
+    if source_key is None:
+        return None
+    return load_cached(index_key(source_key))
+
+
+def _manifest_path():
+    return CACHE_DIR / MANIFEST_NAME
+
+def load_manifest():
+    """Son hazırlık kaydı - yoksa None"""
+    try:
+        return json.loads(_manifest_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def _write_manifest(record):
+    ensure_private_dir(CACHE_DIR)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, _manifest_path())
+
+def todays_export():
+    """Bugün hazırlanmış ve önbellekte duran dışa aktarım kaydı - yoksa None"""
+    record = load_manifest()
+    if not record or not record.get('hazırlandı', '').startswith(datetime.date.today().isoformat()):
+        return None
+    if not (CACHE_DIR / f"{transform_key(record['anahtar'])}.pkl").exists():
+        return None
+    return record
+
+
+def latest_export(directory=DROP_DIR, settle=SETTLE_SECONDS):
+    """Klasördeki yazımı bitmiş en yeni Excel dosyası - yoksa None"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return None
+    now = time.time()
+    candidates = [
+        path for path in directory.iterdir()
+        if path.suffix.lower() in EXPORT_SUFFIXES and not path.name.startswith('~$')
+        and now - path.stat().st_mtime >= settle
+    ]
+    return max(candidates, key=lambda path: path.stat().st_mtime, default=None)
+
+def prepare(path, transform):
+    """Dosyayı oku, dönüştür, kod indeksini kur ve önbelleğe yaz - hazırlık kaydı
+
+    transform: Sipariş sayfasının transform_frame(df, quiet=True) fonksiyonu
+    """
+    path = Path(path)
+    durations = {}
+
+    start = time.perf_counter()
+    data = file_bytes(path)
+    source_key = content_key(data, 'ana')
+    df = load_cached(source_key)
+    if df is None:
+        df = read_excel_bytes(data, 'ana')
+        store_cached(source_key, df)
+    durations['okuma'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frame = transform(df, quiet=True)
+    if frame is None or len(frame) == 0:
+        raise ValueError(f"{path.name} dönüştürülemedi")
+    store_cached(transform_key(source_key), frame)
+    durations['dönüşüm'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store_cached(index_key(source_key), index_state(frame))
+    durations['indeks'] = time.perf_counter() - start
+
+    record = {
+        'ad': path.name,
+        'anahtar': source_key,
+        'satır': len(frame),
+        'değiştirildi': _stamp(path)[1],
+        'hazırlandı': datetime.datetime.now().isoformat(timespec='seconds'),
+        'süreler_sn': durations
+    }
+    _write_manifest(record)
+    return record
+
+def _stamp(path):
+    """(ad, değiştirilme zamanı) - dosyanın bu sürümü"""
+    return path.name, datetime.datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds')
+
+def _is_prepared(path):
+    """Dosyanın bu sürümü bugün hazırlanmış ve önbellekte mi"""
+    record = todays_export()
+    return record is not None and (record['ad'], record['değiştirildi']) == _stamp(path)
+
+def load_transform():
+    """Sipariş sayfasının dönüşüm fonksiyonu (sayfa Streamlit sunucusu olmadan yüklenir)"""
+    import runpy
+    import sys
+
+    root = str(PAGE_PATH.parent.parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return runpy.run_path(str(PAGE_PATH), run_name='hazirlik')['transform_frame']
+
+
+def main(argv=None):
+    """Bırakma klasöründeki en yeni dışa aktarımı hazırla - --izle ile yeni dosyaları bekler"""
+    import argparse
+    import logging
+    import warnings
+
+    parser = argparse.ArgumentParser(description="Gece dışa aktarımının önceden hazırlanması")
+    parser.add_argument('klasor', nargs='?', default=str(DROP_DIR), help="Bırakma klasörü")
+    parser.add_argument('--izle', action='store_true', help="Klasörü izle, yeni dosya geldikçe hazırla")
+    parser.add_argument('--aralik', type=float, default=WATCH_INTERVAL, help="İzleme aralığı (sn)")
+    parser.add_argument('--bekleme', type=float, default=SETTLE_SECONDS,
+                        help="Dosya bu kadar süre değişmemişse yazımı bitmiş sayılır (sn)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    logging.disable(logging.CRITICAL)
+    transform = load_transform()
+
+    failed = set()
+    while True:
+        path = latest_export(args.klasor, args.bekleme)
+        if path is None and not args.izle:
+            parser.error(f"{args.klasor} içinde hazır Excel dosyası yok")
+        if path is not None and _stamp(path) not in failed and not _is_prepared(path):
+            try:
+                record = prepare(path, transform)
+                stages = ', '.join(f"{stage} {seconds:.2f} sn" for stage, seconds in record['süreler_sn'].items())
+                print(f"{record['ad']}: {record['satır']:,} satır hazır ({stages})", flush=True)
+            except Exception as e:
+                if not args.izle:
+                    raise
+                # Aynı dosya değişmedikçe tekrar denenmez
+                failed.add(_stamp(path))
+                print(f"{path.name} hazırlanamadı: {e}", flush=True)
+        if not args.izle:
+            return
+        time.sleep(args.aralik)
+
+if __name__ == '__main__':
+    main()
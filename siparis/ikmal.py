@@ -0,0 +1,119 @@
+"""Depo bazında sipariş önerisi (ikmal) hesabı
+
+Dönüşümde 0 ile başlatılan '<Depo> Sipariş' kolonları tüm tablo için NumPy ile tek geçişte
+doldurulur. Her depo için:
+
+    aylık talep = SATIS / satış dönemi (ay)                   talep='satis'
+                = (DEVIR + ALIŞ - STOK) / satış dönemi (ay)   talep='tuketim'
+                  önümüzdeki iki ayın kolonları doluysa onların ortalaması (tahmin=True)
+    hedef       = aylık talep x (kapsama + emniyet) ay
+    eldeki      = STOK + Depo Bakiye (+ Tedarikçi Bakiye, açık tedarikçi siparişleri)
+    sipariş     = hedef - eldeki (negatifse 0), Paket Adetleri'nin katına yukarı yuvarlanır
+
+Ay kolonları '<Ay>_<i>' biçimindedir; i. kolon çıktı depo sırasındaki i. depoya aittir
+(İmes, İkitelli, Ankara, Maslak, Bolu). Kurallar sözlükle verilir, 'depolar' altında depo
+bazında ezilebilir.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from siparis.sema import MONTH_NAMES
+
+# Çıktı depo sırası ve STOK/SATIS kolonlarındaki büyük harfli depo adı
+ORDER_DEPOS = [('İmes', 'İMES'), ('İkitelli', 'İKİTELLİ'), ('Ankara', 'ANKARA'), ('Maslak', 'MASLAK'), ('Bolu', 'BOLU')]
+
+PACK_COLUMN = 'Paket Adetleri'
+
+DEMAND_SOURCES = {
+    'satis': 'SATIS',
+    'tuketim': 'DEVIR + ALIŞ - STOK'
+}
+
+ORDER_RULES = {
+    'talep': 'satis',          # aylık talebin kaynağı (DEMAND_SOURCES)
+    'satis_donemi': 1.0,       # SATIS/DEVIR kolonlarının kapsadığı ay sayısı
+    'kapsama': 2.0,            # sipariş sonrası stoğun yetmesi istenen ay
+    'emniyet': 0.0,            # ek emniyet stoğu (ay)
+    'tahmin': True,            # ay kolonları doluysa talep olarak onları kullan
+    'tedarikci_dahil': True,   # açık tedarikçi bakiyesi eldeki stoğa sayılır
+    'min_siparis': 0,          # sıfırdan büyük siparişler için alt sınır (adet)
+    'depolar': {}              # depo -> yukarıdaki anahtarların depo bazında değerleri
+}
+
+_MONTH_PATTERN = re.compile(rf"^({'|'.join(MONTH_NAMES)})_(\d+)$")
+
+
+def _numeric(df, column):
+    """Kolonu float dizisine çevir - eksik kolon, '-' ve boş değerler 0"""
+    if column not in df.columns:
+        return np.zeros(len(df))
+    values = pd.to_numeric(df[column], errors='coerce')
+    return np.nan_to_num(values.to_numpy(dtype=np.float64, na_value=np.nan), nan=0.0)
+
+def _matrix(df, columns):
+    """(satır, depo) matrisi"""
+    return np.column_stack([_numeric(df, col) for col in columns]) if len(df) else np.zeros((0, len(columns)))
+
+def forecast_columns(columns):
+    """Ay kolonlarını depo sırasına göre grupla - [[İmes ay kolonları], [İkitelli ...], ...]"""
+    groups = [[] for _ in ORDER_DEPOS]
+    for col in columns:
+        match = _MONTH_PATTERN.match(str(col))
+        if match and 1 <= int(match.group(2)) <= len(ORDER_DEPOS):
+            groups[int(match.group(2)) - 1].append(col)
+    return groups
+
+def resolve_rules(rules=None):
+    """Varsayılanlarla birleştirilmiş kurallar ve depo bazında parametre dizileri"""
+    merged = {**ORDER_RULES, **(rules or {})}
+    if merged['talep'] not in DEMAND_SOURCES:
+        raise ValueError(f"Bilinmeyen talep kaynağı: {merged['talep']} (seçenekler: {', '.join(DEMAND_SOURCES)})")
+
+    overrides = merged.get('depolar') or {}
+    params = {}
+    for key in ('satis_donemi', 'kapsama', 'emniyet', 'tahmin', 'tedarikci_dahil', 'min_siparis'):
+        params[key] = np.array([overrides.get(depo, {}).get(key, merged[key]) for depo, _ in ORDER_DEPOS], dtype=np.float64)
+    if (params['satis_donemi'] <= 0).any():
+        raise ValueError("Satış dönemi 0'dan büyük olmalı")
+    return merged, params
+
+def suggest_orders(df, rules=None):
+    """'<Depo> Sipariş' kolonlarını hesapla ve tabloya yaz (yerinde) - depo -> toplam sipariş adedi"""
+    merged, params = resolve_rules(rules)
+
+    stok = _matrix(df, [f"{block} STOK" for _, block in ORDER_DEPOS])
+    if merged['talep'] == 'tuketim':
+        devir = _matrix(df, [f"{block} DEVIR" for _, block in ORDER_DEPOS])
+        alis = _matrix(df, [f"{block} ALIŞ" for _, block in ORDER_DEPOS])
+        demand = np.maximum(devir + alis - stok, 0)
+    else:
+        demand = _matrix(df, [f"{block} SATIS" for _, block in ORDER_DEPOS])
+    monthly = demand / params['satis_donemi']
+
+    # Tahmin: depo başına ay kolonlarının ortalaması, yalnızca dolu satırlarda
+    for i, columns in enumerate(forecast_columns(df.columns)):
+        if not columns or not params['tahmin'][i]:
+            continue
+        forecast = _matrix(df, columns)
+        has_forecast = forecast.any(axis=1)
+        monthly[has_forecast, i] = forecast[has_forecast].mean(axis=1)
+
+    on_hand = stok + _matrix(df, [f"{depo} Depo Bakiye" for depo, _ in ORDER_DEPOS])
+    on_hand += _matrix(df, [f"{depo} Tedarikçi Bakiye" for depo, _ in ORDER_DEPOS]) * params['tedarikci_dahil']
+
+    target = monthly * (params['kapsama'] + params['emniyet'])
+    need = np.maximum(target - on_hand, 0)
+
+    # Paket adedinin katına yukarı yuvarla (paket bilgisi yoksa 1)
+    pack = _numeric(df, PACK_COLUMN)
+    pack = np.where(pack > 0, pack, 1.0)[:, None]
+    need = np.maximum(need, np.where(need > 0, params['min_siparis'], 0))
+    orders = (np.ceil(np.round(need / pack, 9)) * pack).astype(np.int64)
+
+    totals = {}
+    for i, (depo, _) in enumerate(ORDER_DEPOS):
+        df[f"{depo} Sipariş"] = orders[:, i]
+        totals[depo] = int(orders[:, i].sum())
+    return totals
@@ -0,0 +1,193 @@
+"""Inbound irsaliye satırları için kalıcı defter (SQLite)
+
+Inbound dışa aktarımı ay boyunca büyür; her çalıştırmada tüm dosyayı yeniden sınıflandırmak yerine
+işlenmiş satırlar (dönem, Belge No 2, satır anahtarı) ile deftere yazılır. Yeni yüklemede yalnızca
+defterde olmayan veya içeriği değişmiş satırlar sınıflandırılır (GE- filtresi, depo eşleştirmesi);
+depo bakiyeleri defterdeki (kod, depo) toplamlarından okunur.
+
+Yüklemede yer alan bir belgenin defterdeki satırları belgenin güncel satırlarıyla değiştirilir:
+ERP'de düzeltilen satır yeniden sınıflandırılır, belgeden çıkarılan satır defterden silinir. Böylece
+yüklemedeki belgeler için sonuç tam işlemeyle aynıdır; yüklemede olmayan belgeler olduğu gibi kalır.
+
+Satır anahtarı dosyada satır numarası kolonu varsa (LINE_COLUMNS) o kolondur ve satır içeriği
+(ürün kodu, depo, miktar) ayrıca saklanıp karşılaştırılır; yoksa anahtar içeriğin kendisi ve
+belgedeki aynı içerikli satırların geliş sırasıdır. Sınıflandırmada elenen satırlar da adet 0 ve
+depo boş olarak kaydedilir, değişmedikçe tekrar incelenmez. Dönem varsayılan olarak içinde
+bulunulan aydır (YYYY-AA); yeni ayda defter boş başlar.
+"""
+import datetime
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from siparis.bakiye import inbound_lines
+
+DEFAULT_LEDGER_PATH = Path(os.environ.get('SIPARIS_IRSALIYE_DB', Path.home() / '.siparis' / 'irsaliye_defteri.sqlite'))
+
+# Dosyada varsa satır anahtarı olarak kullanılan kolonlar (öncelik sırasıyla)
+LINE_COLUMNS = ('Satır No', 'Sıra No', 'Kalem No')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS irsaliye_satir (
+    period TEXT NOT NULL,
+    belge_no TEXT NOT NULL,
+    line_key TEXT NOT NULL,
+    product_code TEXT,
+    depo TEXT,
+    quantity REAL NOT NULL,
+    content TEXT,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (period, belge_no, line_key)
+)
+"""
+
+
+def current_period():
+    return datetime.date.today().strftime('%Y-%m')
+
+def _filled(series):
+    text = series.astype(str).str.strip()
+    return series.notna() & (text != '') & (~text.str.lower().isin(['nan', 'none', 'null']))
+
+def line_contents(df):
+    """Satır içeriği (ürün kodu|depo|miktar) - miktar sayı olarak biçimlenir, 3 ve 3.0 aynı satırdır"""
+    quantity = pd.to_numeric(df['İrsaliye Miktarı'], errors='coerce').map('{:g}'.format)
+    return (df['Ürün Kodu'].astype(str).str.strip() + '|' +
+            df['Depo'].astype(str).str.strip().str.upper() + '|' + quantity)
+
+def line_keys(df):
+    """(Belge No 2, satır anahtarı) serileri - satır no kolonu yoksa anahtar içerik ve geliş sırası"""
+    belge = df['Belge No 2'].astype(str).str.strip()
+    line_column = next((col for col in LINE_COLUMNS if col in df.columns), None)
+    if line_column is not None:
+        return belge, df[line_column].astype(str).str.strip()
+
+    content = line_contents(df)
+    occurrence = pd.DataFrame({'belge': belge, 'content': content}).groupby(['belge', 'content'], sort=False).cumcount()
+    return belge, content + '#' + occurrence.astype(str)
+
+
+class InboundLedger:
+    """(dönem, Belge No 2, satır) -> ürün kodu, depo, adet defteri"""
+
+    def __init__(self, path=DEFAULT_LEDGER_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(_SCHEMA)
+        # İçerik kolonu sonradan eklendi - eski defterlerdeki satırlar ilk yüklemede yeniden sınıflandırılır
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(irsaliye_satir)")}
+        if 'content' not in columns:
+            self._conn.execute("ALTER TABLE irsaliye_satir ADD COLUMN content TEXT")
+        self._conn.commit()
+
+    def _stored(self, period, documents):
+        """Dönemde bu belgelere ait kayıtlı satırlar - (belge, satır anahtarı) -> içerik"""
+        stored = {}
+        documents = list(documents)
+        # SQLite parametre sınırı için belgeler parça parça sorgulanır
+        for start in range(0, len(documents), 500):
+            part = documents[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT belge_no, line_key, content FROM irsaliye_satir WHERE period = ? "
+                f"AND belge_no IN ({', '.join('?' * len(part))})",
+                [period] + part
+            )
+            stored.update(((belge, line), content) for belge, line, content in rows)
+        return stored
+
+    def ingest(self, inbound_df, period=None):
+        """Yüklemedeki belgelerin satırlarını deftere işle - (işlenen, değişmeyen, silinen) satır sayıları
+
+        Yeni ve içeriği değişmiş satırlar sınıflandırılır, belgeden çıkarılmış satırlar silinir.
+        Belge No 2 boş satırlar anahtarlanamaz ve (tam işlemedeki gibi) dikkate alınmaz.
+        """
+        if 'Belge No 2' not in inbound_df.columns:
+            raise ValueError("Inbound defteri için 'Belge No 2' kolonu gerekli")
+        period = period or current_period()
+
+        df = inbound_df[_filled(inbound_df['Belge No 2'])].reset_index(drop=True)
+        belge, line = line_keys(df)
+        # Satır no kolonunda tekrar eden anahtarlarda ilk satır kullanılır
+        first = ~pd.DataFrame({'belge': belge, 'line': line}).duplicated()
+        df, belge, line = df[first], belge[first], line[first]
+        content = line_contents(df)
+
+        stored = self._stored(period, belge.unique())
+        is_new = [stored.get((b, l)) != c for b, l, c in zip(belge, line, content)]
+        current = set(zip(belge, line))
+        removed = [(period, b, l) for b, l in stored if (b, l) not in current]
+
+        new = df[is_new]
+        lines = inbound_lines(new).reindex(new.index)
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        records = [
+            (period, b, l,
+             key if isinstance(depo, str) else None,
+             depo if isinstance(depo, str) else None,
+             float(quantity) if isinstance(depo, str) else 0.0,
+             c, now)
+            for b, l, c, key, depo, quantity in zip(belge[is_new], line[is_new], content[is_new],
+                                                    lines['key'], lines['depo'], lines['quantity'])
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM irsaliye_satir WHERE period = ? AND belge_no = ? AND line_key = ?", removed
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO irsaliye_satir "
+                "(period, belge_no, line_key, product_code, depo, quantity, content, added_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                records
+            )
+        return len(records), len(df) - len(records), len(removed)
+
+    def contributions(self, period=None):
+        """Dönemin (key, depo, quantity) toplamları"""
+        return pd.read_sql_query(
+            "SELECT product_code AS key, depo, SUM(quantity) AS quantity FROM irsaliye_satir "
+            "WHERE period = ? AND depo IS NOT NULL GROUP BY product_code, depo",
+            self._conn, params=(period or current_period(),)
+        )
+
+    def summary(self):
+        """Dönem başına belge, satır ve toplam adet"""
+        return pd.read_sql_query(
+            "SELECT period, COUNT(DISTINCT belge_no) AS belge, COUNT(*) AS satir, "
+            "SUM(depo IS NOT NULL) AS islenen, SUM(quantity) AS adet "
+            "FROM irsaliye_satir GROUP BY period ORDER BY period",
+            self._conn
+        )
+
+    def reset(self, period=None):
+        """Dönemin kayıtlarını sil - silinen satır sayısı"""
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM irsaliye_satir WHERE period = ?", (period or current_period(),))
+        return cursor.rowcount
+
+    def close(self):
+        self._conn.close()
+
+
+def main(argv=None):
+    """Defter özetini göster veya bir dönemi sıfırla"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inbound irsaliye defteri özeti")
+    parser.add_argument('--sifirla', metavar='DONEM', default=None, help="Bu dönemin (YYYY-AA) kayıtlarını sil")
+    parser.add_argument('--db', default=str(DEFAULT_LEDGER_PATH), help="Defter veritabanı")
+    args = parser.parse_args(argv)
+
+    ledger = InboundLedger(args.db)
+    try:
+        if args.sifirla:
+            print(f"{ledger.reset(args.sifirla):,} satır silindi ({args.sifirla})")
+        print(ledger.summary().to_string(index=False))
+    finally:
+        ledger.close()
+
+
+if __name__ == '__main__':
+    main()
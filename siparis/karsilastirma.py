@@ -0,0 +1,405 @@
+"""Eski ve yeni motorların çıktı karşılaştırması (golden output)
+
+Aynı girdi paketi iki kod sürümünde çalıştırılır: eski sürüm bir git revizyonundan çıkarılır,
+yeni sürüm çalışma ağacıdır. Her sürüm kendi `siparis` paketiyle ayrı bir süreçte çalışır:
+
+- Sipariş sayfası: okuma -> dönüşüm -> inbound -> marka eşleştirme,
+- BOSCH sayfası: process_bosch_three_excel -> son.json kayıtları.
+
+Sonuç tabloları hücre hücre (sayılar toleransla, metinler birebir), son.json kayıtları alan alan
+karşılaştırılır. Aşama süreleri ve hızlanma oranı raporlanır; fark varsa çıkış kodu 1 olur.
+
+Girdi paketi bir klasördür (PAKET_DOSYALARI adlarıyla); eksik dosyalar yüklenmemiş sayılır.
+Gerçek dosyalar yerine sentetik paket de üretilebilir.
+
+Kullanım:
+    python -m siparis.karsilastirma paket/ --eski HEAD~3
+    python -m siparis.karsilastirma paket/ --sentetik 30000 --rapor fark.json
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Paket içindeki dosya adları - anahtarlar sayfadaki yükleyici anahtarlarıdır
+PAKET_DOSYALARI = {
+    'main_file': 'main.xlsx',
+    'inbound_excel': 'inbound.xlsx',
+    'excel1': 'schaeffler.xlsx',
+    'excel2': 'zfithal.xlsx',
+    'excel3': 'delphi.xlsx',
+    'excel4': 'zfyerli.xlsx',
+    'excel5': 'valeo.xlsx',
+    'excel6': 'filtron.xlsx',
+    'excel7': 'mann.xlsx',
+    'excel8': 'bosch.xlsx',
+    # BOSCH sayfası: bakiye raporu excel8, inbound inbound_excel ile ortaktır
+    'siparis_kalemleri': 'siparis.xlsx'
+}
+
+DEFAULT_RTOL = 1e-9
+DEFAULT_ATOL = 1e-6
+MAX_EXAMPLES = 5
+
+# Alt süreçte çalışan motor - süreleri ve çıktıları verilen klasöre yazar
+_RUNNER = """
+import json, logging, runpy, sys, time, warnings
+warnings.filterwarnings('ignore')
+logging.disable(logging.CRITICAL)
+root, files, out = sys.argv[1], json.loads(sys.argv[2]), sys.argv[3]
+sys.path.insert(0, root)
+timings = {}
+
+def timed(name, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    timings[name] = time.perf_counter() - start
+    return result
+
+if files.get('main_file'):
+    page = runpy.run_path(root + '/pages/SiparişOluşturma.py', run_name='karsilastirma')
+    uploaded = {key: files.get(key) for key in
+                ['inbound_excel'] + ['excel%d' % i for i in range(1, 9)]}
+    df = timed('okuma', page['load_data_ultra_fast'], files['main_file'])
+    df = timed('dönüşüm', page['transform_data_ultra_fast'], df)
+    df = timed('inbound', page['process_inbound_data'], df, uploaded['inbound_excel'])
+    df = timed('eşleştirme', page['match_brands_parallel'], df, uploaded)
+    df.to_pickle(out + '/siparis.pkl')
+
+if files.get('excel8') and files.get('inbound_excel') and files.get('siparis_kalemleri'):
+    page = runpy.run_path(root + '/pages/bosch_islemleri.py', run_name='karsilastirma')
+    process = page['process_bosch_three_excel']
+    process.__globals__.update(
+        bakiye_raporu=files['excel8'], inbound_excel=files['inbound_excel'],
+        siparis_kalemleri=files['siparis_kalemleri']
+    )
+    bosch_df = timed('bosch', process)
+    if bosch_df is not None:
+        output, _ = page['create_son_json'](bosch_df)
+        with open(out + '/son.json', 'wb') as f:
+            f.write(output.getvalue())
+
+with open(out + '/sureler.json', 'w') as f:
+    json.dump(timings, f)
+"""
+
+
+def bundle_files(bundle):
+    """Paket klasöründeki dosyalar - anahtar -> yol (eksikler None)"""
+    bundle = Path(bundle)
+    return {
+        key: str(bundle / name) if (bundle / name).exists() else None
+        for key, name in PAKET_DOSYALARI.items()
+    }
+
+def export_revision(revision, target):
+    """Git revizyonunu klasöre çıkar"""
+    import io
+    import tarfile
+
+    archive = subprocess.run(
+        ['git', 'archive', '--format=tar', revision],
+        cwd=PROJECT_ROOT, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return Path(target)
+
+def run_engine(root, files, workdir):
+    """Bir kod sürümünü ayrı süreçte çalıştır - (süreler, sipariş tablosu, son.json kayıtları)"""
+    import pandas as pd
+
+    workdir = Path(workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    # Önbellek ve kod sözlüğü her çalıştırmada boş başlar - sürümler birbirinin sonucunu kullanmaz
+    env = dict(
+        os.environ,
+        SIPARIS_CACHE_DIR=str(workdir / 'onbellek'),
+        SIPARIS_SPILL_DIR=str(workdir / 'tasma'),
+        SIPARIS_KOD_DB=str(workdir / 'kod_sozlugu.sqlite')
+    )
+    proc = subprocess.run(
+        [sys.executable, '-c', _RUNNER, str(root), json.dumps(files), str(workdir)],
+        cwd=root, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{root} çalıştırılamadı:\n{proc.stderr[-3000:]}")
+
+    timings = json.loads((workdir / 'sureler.json').read_text())
+    frame = pd.read_pickle(workdir / 'siparis.pkl') if (workdir / 'siparis.pkl').exists() else None
+    records = None
+    if (workdir / 'son.json').exists():
+        records = json.loads((workdir / 'son.json').read_text(encoding='utf-8'))
+    return timings, frame, records
+
+
+def _is_numeric(series):
+    import pandas as pd
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+def _as_text(series):
+    """Metin karşılaştırması için dizi - eksik değerler (None, NaN, pd.NA) tek biçimde"""
+    return series.astype(object).where(series.notna(), '<NA>').astype(str).to_numpy()
+
+def compare_frames(old, new, rtol=DEFAULT_RTOL, atol=DEFAULT_ATOL, key='URUNKODU'):
+    """İki tabloyu hücre hücre karşılaştır - fark listesi (boşsa eşit)
+
+    Kolonlar konumla eşlenir (tekrarlanan adlar için). Sayısal kolonlar toleransla, diğerleri metin olarak
+    birebir karşılaştırılır. Örneklerde satır, key kolonundaki değerle gösterilir.
+    """
+    import numpy as np
+    import pandas as pd
+
+    differences = []
+    if old.shape != new.shape:
+        differences.append({'tür': 'boyut', 'eski': list(old.shape), 'yeni': list(new.shape)})
+    if list(old.columns) != list(new.columns):
+        differences.append({
+            'tür': 'kolonlar',
+            'yalnız eski': [str(col) for col in old.columns if col not in set(new.columns)],
+            'yalnız yeni': [str(col) for col in new.columns if col not in set(old.columns)]
+        })
+        return differences
+    if len(old) != len(new):
+        return differences
+
+    keys = old.iloc[:, list(old.columns).index(key)] if key in old.columns else None
+    for position, column in enumerate(old.columns):
+        old_col = old.iloc[:, position]
+        new_col = new.iloc[:, position]
+        if _is_numeric(old_col) or _is_numeric(new_col):
+            old_values = pd.to_numeric(old_col, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            new_values = pd.to_numeric(new_col, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            differs = ~np.isclose(old_values, new_values, rtol=rtol, atol=atol, equal_nan=True)
+            max_diff = float(np.nanmax(np.abs(old_values - new_values), initial=0.0))
+        else:
+            old_values = _as_text(old_col)
+            new_values = _as_text(new_col)
+            differs = old_values != new_values
+            max_diff = None
+
+        count = int(differs.sum())
+        if count:
+            rows = np.flatnonzero(differs)[:MAX_EXAMPLES]
+            differences.append({
+                'tür': 'hücre',
+                'kolon': str(column),
+                'konum': position,
+                'farklı': count,
+                'en büyük fark': max_diff,
+                'örnekler': [
+                    {
+                        'satır': str(keys.iloc[row]) if keys is not None else int(row),
+                        'eski': str(old_col.iloc[row]),
+                        'yeni': str(new_col.iloc[row])
+                    }
+                    for row in rows
+                ]
+            })
+    return differences
+
+def compare_records(old, new, rtol=DEFAULT_RTOL, atol=DEFAULT_ATOL):
+    """son.json kayıtlarını sırayla alan alan karşılaştır - fark listesi"""
+    import math
+
+    differences = []
+    if len(old) != len(new):
+        differences.append({'tür': 'kayıt sayısı', 'eski': len(old), 'yeni': len(new)})
+
+    field_counts = {}
+    for index, (old_record, new_record) in enumerate(zip(old, new)):
+        for field in sorted(set(old_record) | set(new_record)):
+            old_value = old_record.get(field)
+            new_value = new_record.get(field)
+            if isinstance(old_value, (int, float)) and isinstance(new_value, (int, float)):
+                same = math.isclose(old_value, new_value, rel_tol=rtol, abs_tol=atol) or (
+                    old_value != old_value and new_value != new_value
+                )
+            else:
+                same = old_value == new_value
+            if not same:
+                entry = field_counts.setdefault(field, {'tür': 'alan', 'alan': field, 'farklı': 0, 'örnekler': []})
+                entry['farklı'] += 1
+                if len(entry['örnekler']) < MAX_EXAMPLES:
+                    entry['örnekler'].append({'kayıt': index, 'eski': old_value, 'yeni': new_value})
+    return differences + list(field_counts.values())
+
+
+def compare(bundle, old_revision='HEAD', new_root=None, rtol=DEFAULT_RTOL, atol=DEFAULT_ATOL):
+    """Paketi eski ve yeni sürümde çalıştırıp karşılaştır - rapor sözlüğü"""
+    files = bundle_files(bundle)
+    if not files['main_file'] and not files['siparis_kalemleri']:
+        raise FileNotFoundError(f"{bundle} içinde {PAKET_DOSYALARI['main_file']} veya "
+                                f"{PAKET_DOSYALARI['siparis_kalemleri']} bulunamadı")
+
+    with tempfile.TemporaryDirectory(prefix='siparis_karsilastirma_') as tmp:
+        old_root = export_revision(old_revision, Path(tmp) / 'eski_kod')
+        old_timings, old_frame, old_records = run_engine(old_root, files, Path(tmp) / 'eski')
+        new_timings, new_frame, new_records = run_engine(new_root or PROJECT_ROOT, files, Path(tmp) / 'yeni')
+
+    report = {
+        'eski': old_revision,
+        'yeni': str(new_root or 'çalışma ağacı'),
+        'süreler': {
+            stage: {
+                'eski': old_timings[stage],
+                'yeni': new_timings.get(stage),
+                'hızlanma': old_timings[stage] / new_timings[stage] if new_timings.get(stage) else None
+            }
+            for stage in old_timings
+        },
+        'sipariş farkları': [],
+        'son.json farkları': []
+    }
+    if old_frame is not None or new_frame is not None:
+        if old_frame is None or new_frame is None:
+            report['sipariş farkları'].append({'tür': 'çıktı', 'eski': old_frame is not None, 'yeni': new_frame is not None})
+        else:
+            report['sipariş farkları'] = compare_frames(old_frame, new_frame, rtol, atol)
+    if old_records is not None or new_records is not None:
+        report['son.json farkları'] = compare_records(old_records or [], new_records or [], rtol, atol)
+    return report
+
+
+def make_synthetic_bundle(directory, n_rows=3000, seed=0):
+    """Sayfaların beklediği başlıklarla rastgele girdi paketi üret"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def write(frame, key):
+        frame.to_excel(directory / PAKET_DOSYALARI[key], index=False)
+
+    brands = ['SCHAEFFLER LUK', 'LEMFÖRDER', 'TRW', 'SACHS', 'DELPHI', 'VALEO', 'MANN FILTER', 'FILTRON', 'BOSCH', 'DİĞER']
+    prefixes = dict(zip(brands, ['LU', 'LE', 'TR', 'SA', 'DE', 'VA', 'MA', 'FI', '3E', 'GE']))
+    cat4 = rng.choice(brands, n_rows)
+    base = [f"{rng.integers(100000, 999999)}{rng.choice(['', 'A', ' B'])}" for _ in range(n_rows)]
+    codes = [f"{prefixes[brand]}-{code}" for brand, code in zip(cat4, base)]
+
+    main = {'URUNKODU': codes, 'ACIKLAMA': 'açıklama', 'URETİCİKODU': base, 'ORJİNAL': '', 'ESKİKOD': ''}
+    for i in range(1, 8):
+        main[f'CAT{i}'] = cat4 if i == 4 else f'K{i}'
+    for prefix in ['02-', '04-', 'D01-', 'A01-', 'TD-E01-']:
+        for col_type in ['DEVIR', 'ALIS', 'STOK', 'SATIS']:
+            values = rng.integers(0, 50, n_rows).astype(object)
+            values[rng.random(n_rows) < 0.1] = ''
+            main[prefix + col_type] = values
+    main.update({'TOPL.FAT.ADT': rng.integers(0, 9, n_rows), 'MÜŞT.SAY.': 1, 'SATıŞ FIYATı': 1.5, 'DÖVIZ CINSI (S)': 'EUR'})
+    write(pd.DataFrame(main), 'main_file')
+
+    n_brand = max(n_rows // 10, 20)
+
+    def pick(brand):
+        rows = rng.choice(np.flatnonzero(cat4 == brand), n_brand)
+        return [base[i] for i in rows], [codes[i] for i in rows]
+
+    po_numbers = ['IME-285', 'ANK 321', '322X', 'P323', 'IKI324', 'XXX', 'İST9']
+    supplier_codes, _ = pick('SCHAEFFLER LUK')
+    write(pd.DataFrame({'PO Number(L)': rng.choice(po_numbers, n_brand), 'Catalogue number': supplier_codes,
+                        'Ordered quantity': rng.integers(1, 9, n_brand)}), 'excel1')
+    supplier_codes, _ = pick(rng.choice(['LEMFÖRDER', 'TRW', 'SACHS']))
+    materials = [f"LF: {code}" if i % 3 == 0 else (f"{code}:xx" if i % 3 == 1 else code) for i, code in enumerate(supplier_codes)]
+    write(pd.DataFrame({'Material': materials, 'Purchase order no.': rng.choice(po_numbers, n_brand),
+                        'Qty.in Del.': rng.integers(0, 5, n_brand), 'Open quantity': rng.integers(0, 5, n_brand)}), 'excel2')
+    supplier_codes, _ = pick('SACHS')
+    write(pd.DataFrame({'Basic No.': supplier_codes, 'Ship-to Name': rng.choice(po_numbers, n_brand),
+                        'Outstanding Quantity': rng.integers(1, 5, n_brand)}), 'excel4')
+    _, product_codes = pick('DELPHI')
+    branches = ['Teknik Dizel-Bolu', 'Teknik Dizel-Ümraniye', 'Teknik Dizel-Maslak', 'Teknik Dizel-Ankara', 'Teknik Dizel-İkitelli', 'X']
+    write(pd.DataFrame({'Şube': rng.choice(branches, n_brand), 'Material': product_codes,
+                        'Cum.qty': rng.integers(1, 5, n_brand)}), 'excel3')
+    supplier_codes, _ = pick('VALEO')
+    write(pd.DataFrame({'Müşteri P/O No.': rng.choice(po_numbers, n_brand), 'Valeo Ref.': supplier_codes,
+                        'Sipariş Adeti': rng.integers(1, 5, n_brand)}), 'excel5')
+    for brand, key in [('MANN FILTER', 'excel7'), ('FILTRON', 'excel6')]:
+        _, product_codes = pick(brand)
+        write(pd.DataFrame({'Material Adı': product_codes,
+                            'Müşteri SatınAlma No': rng.choice(['AAS1', 'DAS2', 'BAS', 'MAS', 'EAS', 'ZZ'], n_brand),
+                            'Açık Sipariş Adedi': rng.integers(1, 5, n_brand)}), key)
+
+    _, product_codes = pick('BOSCH')
+    bosch = pd.DataFrame({
+        'Depo Kodu': rng.choice(['AAS', 'BAS', 'DAS', 'EAS', 'MAS', 'QQ'], n_brand),
+        'Ürün Grubu': rng.choice(['Tedarikçi X', 'DEPO', 'diğer'], n_brand),
+        'Bosch No': product_codes,
+        'Fatura ve Sevk Edilmemiş Toplam': rng.integers(1, 5, n_brand),
+        'Sipariş Notu': rng.choice(['AAS123', 'das9', 'XYZ1'], n_brand)
+    })
+    write(bosch, 'excel8')
+
+    _, product_codes = pick('DİĞER')
+    write(pd.DataFrame({
+        'Depo': rng.choice(['TD-02 MASLAK', 'TD-04', 'TD-A01', 'TD-D05', 'TD-E01', 'ANKARA', 'XX'], n_brand),
+        'Ürün Kodu': product_codes,
+        'İrsaliye Miktarı': rng.integers(-1, 5, n_brand),
+        'Belge No 2': rng.choice(['B1', '', None, 'B2'], n_brand),
+        'Cari': rng.choice(['BOSCH SANAYİ VE TİCARET A.Ş.', 'X'], n_brand),
+        'Sipariş No': rng.choice(['AAS1', 'DAS2'], n_brand)
+    }), 'inbound_excel')
+
+    write(pd.DataFrame({
+        'SIPARIS_NO': bosch['Sipariş Notu'].values,
+        'STOK_KODU': ['3E-' + str(code).replace(' ', '') for code in bosch['Bosch No']],
+        'SIPARIS_MIKTARI': rng.integers(1, 9, n_brand),
+        'KALAN_MIKTAR': rng.integers(0, 9, n_brand)
+    }), 'siparis_kalemleri')
+    return directory
+
+
+def print_report(report):
+    print(f"Eski: {report['eski']}  Yeni: {report['yeni']}")
+    print("\nSüreler (sn)")
+    for stage, timing in report['süreler'].items():
+        new = f"{timing['yeni']:.2f}" if timing['yeni'] is not None else '-'
+        speedup = f"{timing['hızlanma']:.2f}x" if timing['hızlanma'] else '-'
+        print(f"  {stage:<12} eski {timing['eski']:8.2f}  yeni {new:>8}  hızlanma {speedup}")
+
+    for title in ('sipariş farkları', 'son.json farkları'):
+        differences = report[title]
+        if not differences:
+            print(f"\n{title}: yok")
+            continue
+        print(f"\n{title}: {len(differences)}")
+        for difference in differences:
+            print("  " + json.dumps(difference, ensure_ascii=False, default=str))
+
+
+def main(argv=None):
+    """Eski ve yeni sürümü aynı paketle çalıştırıp karşılaştır"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Eski/yeni motor çıktı ve süre karşılaştırması")
+    parser.add_argument('paket', help="Girdi paketi klasörü")
+    parser.add_argument('--eski', default='HEAD', help="Karşılaştırılacak git revizyonu (varsayılan HEAD)")
+    parser.add_argument('--yeni', default=None, help="Yeni sürümün klasörü (varsayılan çalışma ağacı)")
+    parser.add_argument('--sentetik', type=int, default=None, metavar='SATIR',
+                        help="Paketi bu satır sayısıyla sentetik olarak üret")
+    parser.add_argument('--tohum', type=int, default=0, help="Sentetik paket için rastgelelik tohumu")
+    parser.add_argument('--rtol', type=float, default=DEFAULT_RTOL)
+    parser.add_argument('--atol', type=float, default=DEFAULT_ATOL)
+    parser.add_argument('--rapor', default=None, help="Raporu JSON dosyasına da yaz")
+    args = parser.parse_args(argv)
+
+    if args.sentetik:
+        make_synthetic_bundle(args.paket, args.sentetik, args.tohum)
+
+    report = compare(args.paket, args.eski, args.yeni, args.rtol, args.atol)
+    print_report(report)
+
+    if args.rapor:
+        with open(args.rapor, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+    if report['sipariş farkları'] or report['son.json farkları']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
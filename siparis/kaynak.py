@@ -0,0 +1,162 @@
+"""Süreç kaynak kullanımı ve oturum bellek bütçesi
+
+- Süreç: RSS, CPU ve iş parçacığı sayısı psutil ile okunur (isteğe bağlı bağımlılık; kurulu
+  değilse yalnızca nesne boyutları gösterilir).
+- Oturum nesneleri (processed_data, brand_data_cache, indirme kayıtları) ve st.cache_data
+  fonksiyonlarının bellek boyutları ölçülür.
+- Oturum bellek bütçesi yalnızca bu oturumun ölçülen nesneleriyle karşılaştırılır. Süreç RSS'i
+  tüm oturumları içerir ve nesne silindikten sonra da küçülmez; bütçe RSS ile ölçülseydi aşım
+  sonrası her etkileşim oturumun tablolarını yeniden boşaltırdı. Bütçe aşılınca oturum nesneleri
+  seçilen politikaya göre (en eski kullanılan veya en büyük) yalnızca aşım kadar boşaltılır.
+- st.cache_data önbellekleri tüm kullanıcılarla ortaktır; boyutları gösterilir ama bir oturumun
+  bütçe denetimi onları boşaltmaz.
+
+Streamlit'e bağımlı değildir: oturum durumu ve önbellek fonksiyonlarının adları sayfadan verilir.
+"""
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get('SIPARIS_BELLEK_BUTCESI_MB', 0))  # 0: kapalı
+
+EVICTION_POLICIES = {
+    'lru': 'En eski kullanılan',
+    'largest': 'En büyük'
+}
+
+SESSION_ACCESS_KEY = '_kaynak_erisim'
+
+_PROCESS = None
+
+
+@dataclass
+class Artifact:
+    """Boşaltılabilir bellek nesnesi"""
+    name: str
+    size: int
+    last_used: float  # time.time(); 0 = bilinmiyor
+    evict: Callable[[], None]
+
+
+def process_usage():
+    """Süreç kaynak kullanımı - psutil kurulu değilse None"""
+    global _PROCESS
+    try:
+        import psutil
+    except ImportError:
+        return None
+
+    if _PROCESS is None:
+        _PROCESS = psutil.Process()
+    with _PROCESS.oneshot():
+        usage = {
+            'rss': _PROCESS.memory_info().rss,
+            # İlk çağrıda 0, sonra önceki çağrıdan bu yana ortalama
+            'cpu': _PROCESS.cpu_percent(interval=None),
+            'threads': _PROCESS.num_threads()
+        }
+    usage['system_available'] = psutil.virtual_memory().available
+    return usage
+
+def object_size(value):
+    """Nesnenin yaklaşık bellek boyutu (bayt) - diske taşınmış tablolar 0"""
+    from siparis.tasma import SpilledFrame
+
+    if value is None or isinstance(value, SpilledFrame):
+        return 0
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, 'getbuffer'):
+        return value.getbuffer().nbytes
+    if isinstance(value, dict):
+        return sum(object_size(item) for item in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return sum(object_size(item) for item in value)
+    return sys.getsizeof(value)
+
+def cache_data_sizes():
+    """st.cache_data fonksiyon adı -> toplam bayt; Streamlit istatistikleri okunamazsa None"""
+    try:
+        from streamlit.runtime.caching.cache_data_api import get_data_cache_stats_provider
+        stats = get_data_cache_stats_provider().get_stats()
+    except Exception:
+        return None
+
+    # Sürüme göre liste veya aile adı -> liste
+    if isinstance(stats, dict):
+        stats = [stat for family in stats.values() for stat in family]
+    sizes = {}
+    for stat in stats:
+        # cache_name: '<modül>.<fonksiyon>'
+        name = stat.cache_name.rsplit('.', 1)[-1]
+        sizes[name] = sizes.get(name, 0) + stat.byte_length
+    return sizes
+
+def touch(state, key):
+    """Oturum nesnesinin son kullanım zamanını güncelle"""
+    access = state.get(SESSION_ACCESS_KEY)
+    if access is None:
+        access = {}
+        state[SESSION_ACCESS_KEY] = access
+    access[key] = time.time()
+
+def session_artifacts(state, defaults):
+    """Oturum nesneleri - defaults: anahtar -> boşaltıldığında verilecek değer"""
+    access = state.get(SESSION_ACCESS_KEY) or {}
+    artifacts = []
+    for key, default in defaults.items():
+        size = object_size(state.get(key))
+        if size:
+            def evict(key=key, default=default):
+                state[key] = default() if callable(default) else default
+                access.pop(key, None)
+            artifacts.append(Artifact(f"oturum: {key}", size, access.get(key, 0), evict))
+    return artifacts
+
+def cache_entries(names):
+    """Gösterim için st.cache_data boyutları - [(ad, bayt)]; names: izlenen önbellekli fonksiyon adları
+
+    Önbellekler süreçteki tüm oturumlarla ortaktır - oturum bütçesine verilmez, boşaltılmaz.
+    """
+    sizes = cache_data_sizes() or {}
+    return [(f"önbellek: {name}", size) for name, size in sizes.items() if size and name in names]
+
+def session_usage(artifacts):
+    """Oturum nesnelerinin toplam boyutu - oturum bütçesiyle karşılaştırılan kullanım"""
+    return sum(artifact.size for artifact in artifacts)
+
+def enforce_budget(usage, budget, artifacts, policy='lru'):
+    """Kullanım bütçeyi aşıyorsa nesneleri politika sırasıyla aşım kadar boşalt - boşaltılan nesneler
+
+    usage, artifacts nesnelerinin toplamı olmalıdır (session_usage); süreç RSS'i verilmez.
+    """
+    if budget <= 0 or usage <= budget:
+        return []
+    if policy not in EVICTION_POLICIES:
+        raise ValueError(f"Bilinmeyen boşaltma politikası: {policy}")
+
+    if policy == 'lru':
+        order = sorted(artifacts, key=lambda artifact: (artifact.last_used, -artifact.size))
+    else:
+        order = sorted(artifacts, key=lambda artifact: -artifact.size)
+
+    evicted = []
+    for artifact in order:
+        if usage <= budget:
+            break
+        artifact.evict()
+        usage -= artifact.size
+        evicted.append(artifact)
+    return evicted
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:,.0f} {unit}" if unit == 'B' else f"{size:,.1f} {unit}"
+        size /= 1024
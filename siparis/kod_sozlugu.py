@@ -0,0 +1,159 @@
+"""Çalıştırmalar arası kalıcı ürün kodu sözlüğü
+
+(marka, normalize tedarikçi kodu) -> ana tablodaki hedef kod eşleşmeleri SQLite'ta saklanır.
+Her kayıt nasıl çözüldüğünü (exact/fuzzy/none, oran) ve hangi ana tablo sürümünde
+bulunduğunu tutar. Fuzzy arama yapılmadan önce sözlüğe bakılır:
+
+- exact/fuzzy kayıt, hedef kod ana tabloda hâlâ varsa doğrudan kullanılır; yoksa silinir,
+- 'none' (eşleşme bulunamadı) kaydı yalnızca aynı ana tablo sürümünde geçerlidir.
+
+Kayıtlar bellekte biriktirilir ve flush() ile tek işlemde yazılır.
+"""
+import datetime
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(os.environ.get('SIPARIS_KOD_DB', Path.home() / '.siparis' / 'kod_sozlugu.sqlite'))
+
+METHOD_EXACT = 'exact'
+METHOD_FUZZY = 'fuzzy'
+METHOD_NONE = 'none'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kod_eslesme (
+    brand TEXT NOT NULL,
+    supplier_code TEXT NOT NULL,
+    target_code TEXT,
+    method TEXT NOT NULL,
+    ratio REAL,
+    sheet_version TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (brand, supplier_code)
+)
+"""
+
+
+def sheet_version(codes):
+    """Ana tablodaki kod kümesinden sürüm özeti (sıra bağımsız)"""
+    digest = hashlib.sha1()
+    for code in sorted(set(codes)):
+        digest.update(code.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+class CodeDictionary:
+    """(marka, tedarikçi kodu) -> hedef kod sözlüğü"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._pending = {}
+        self._stale = set()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, brand, supplier_code, present_codes, version):
+        """Geçerli kayıt varsa (hedef kod, yöntem, oran), yoksa None
+
+        present_codes: ana tablodaki normalize kodlar (hedefin hâlâ var olup olmadığı için)
+        """
+        key = (brand, supplier_code)
+        if key in self._pending:
+            row = self._pending[key]
+        else:
+            row = self._conn.execute(
+                "SELECT target_code, method, ratio, sheet_version FROM kod_eslesme "
+                "WHERE brand = ? AND supplier_code = ?",
+                key
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        target_code, method, ratio, row_version = row
+        if method == METHOD_NONE:
+            valid = row_version == version
+        else:
+            valid = target_code in present_codes
+
+        if not valid:
+            # Hedef kod kaybolmuş veya eşleşmezlik eski sürüme ait - kayıt geçersiz
+            self._stale.add(key)
+            self._pending.pop(key, None)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return target_code, method, ratio
+
+    def record(self, brand, supplier_code, target_code, method, ratio, version):
+        """Çözümlemeyi kaydet (flush() ile yazılır)"""
+        key = (brand, supplier_code)
+        self._stale.discard(key)
+        self._pending[key] = (target_code, method, ratio, version)
+
+    def flush(self):
+        """Bekleyen kayıt ve silmeleri tek işlemde yaz"""
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._conn:
+            if self._stale:
+                self._conn.executemany(
+                    "DELETE FROM kod_eslesme WHERE brand = ? AND supplier_code = ?",
+                    list(self._stale)
+                )
+            if self._pending:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO kod_eslesme "
+                    "(brand, supplier_code, target_code, method, ratio, sheet_version, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [key + values + (now,) for key, values in self._pending.items()]
+                )
+        written = len(self._pending)
+        self._pending.clear()
+        self._stale.clear()
+        return written
+
+    def audit(self, brand=None):
+        """Sözlük kayıtları - denetim için DataFrame"""
+        import pandas as pd
+
+        query = "SELECT * FROM kod_eslesme"
+        params = ()
+        if brand is not None:
+            query += " WHERE brand = ?"
+            params = (brand,)
+        return pd.read_sql_query(query + " ORDER BY brand, supplier_code", self._conn, params=params)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def main(argv=None):
+    """Sözlüğü CSV olarak dışa aktar (denetim)"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ürün kodu sözlüğünü CSV olarak dışa aktar")
+    parser.add_argument('cikti', help="CSV dosya yolu")
+    parser.add_argument('--marka', default=None, help="Yalnızca bu markanın kayıtları")
+    parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help="Sözlük veritabanı")
+    args = parser.parse_args(argv)
+
+    store = CodeDictionary(args.db)
+    try:
+        df = store.audit(args.marka)
+        df.to_csv(args.cikti, index=False)
+        print(f"{len(df):,} kayıt -> {args.cikti}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
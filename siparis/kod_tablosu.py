@@ -0,0 +1,158 @@
+"""Çalıştırma boyunca paylaşılan ürün kodu kimlik tablosu
+
+Ana tablo ve tedarikçi dosyalarındaki normalize ürün kodları tek bir sözlükte yoğun int32
+kimliklere çevrilir. Kolonlar factorize edilir, sözlüğe yalnızca farklı değerler bakar; gruplama
+ve eşleştirme bundan sonra tamsayı dizileri üzerinde yapılır, her kod metni bellekte bir kez durur.
+
+Ana tablo kolonları için kimlik -> satır konumları indeksi (CodeRows) bir kez kurulur. Tedarikçi
+kodu başına tüm tabloyu string olarak karşılaştırmak yerine eşleşen satırlar doğrudan okunur.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from siparis.kodlar import clean_codes, compact_codes
+
+MISSING = -1
+
+# Ana tablo kod normalizasyonları - 'clean': clean_product_code, 'compact': compact_code
+KEY_MODES = {
+    'clean': clean_codes,
+    'compact': compact_codes
+}
+
+_EMPTY = np.array([], dtype=np.int64)
+
+
+def column_digest(frame, columns):
+    """Kolonların ham değerlerinin özeti - hazırlanmış indeksin bu tabloya ait olduğu doğrulanır"""
+    digest = hashlib.sha256()
+    for column in sorted(columns):
+        digest.update(str(column).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame[column].astype(str), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class CodeTable:
+    """Normalize ürün kodu -> int32 kimlik sözlüğü"""
+
+    def __init__(self):
+        self._ids = {}
+        self.codes = []
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def from_codes(cls, codes):
+        """Kaydedilmiş kod listesinden tablo - kimlikler listedeki sıralar"""
+        table = cls()
+        table.codes = list(codes)
+        table._ids = {code: code_id for code_id, code in enumerate(table.codes)}
+        return table
+
+    def id(self, code, add=False):
+        """Tek kodun kimliği - bilinmeyen kod (add=False) veya boş değer için -1"""
+        if not isinstance(code, str):
+            return MISSING
+        code_id = self._ids.get(code)
+        if code_id is None:
+            if not add:
+                return MISSING
+            code_id = len(self.codes)
+            self._ids[code] = code_id
+            self.codes.append(code)
+        return code_id
+
+    def encode(self, values, add=True):
+        """Kolonu kimlik dizisine çevir - boş değerler ve (add=False iken) bilinmeyen kodlar -1"""
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        ids = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, code in enumerate(uniques):
+            ids[i] = self.id(code, add)
+        # factorize boş değerlere -1 verir, dizinin son elemanı -1'e karşılık gelir
+        ids[-1] = MISSING
+        return ids[codes]
+
+    def decode(self, ids):
+        """Kimlik dizisini kodlara çevir (-1 -> None)"""
+        lookup = np.empty(len(self.codes) + 1, dtype=object)
+        lookup[:-1] = self.codes
+        return lookup[np.asarray(ids)]
+
+
+class CodeRows:
+    """Kimlik -> satır konumları indeksi (kimliğe göre sıralı konumlar ve başlangıç dizini)"""
+
+    def __init__(self, ids, size):
+        ids = np.asarray(ids)
+        valid = np.flatnonzero(ids >= 0)
+        order = np.argsort(ids[valid], kind='stable')
+        self.positions = valid[order]
+        self.starts = np.concatenate(([0], np.cumsum(np.bincount(ids[valid], minlength=size))))
+
+    def get(self, code_id):
+        """Kimliğin geçtiği satırlar (artan sırada)"""
+        if code_id < 0 or code_id >= len(self.starts) - 1:
+            return _EMPTY
+        return self.positions[self.starts[code_id]:self.starts[code_id + 1]]
+
+
+class SheetCodes:
+    """Ana tablo kod kolonlarının normalize değerleri, kimlikleri ve satır indeksleri
+
+    Her (kolon, normalizasyon) çifti ilk istendiğinde bir kez hesaplanır.
+    """
+
+    def __init__(self, table, frame):
+        self.table = table
+        self.frame = frame
+        self._values = {}
+        self._ids = {}
+        self._rows = {}
+
+    def values(self, column, mode='compact'):
+        """Normalize kodlar (object dizisi)"""
+        key = (column, mode)
+        if key not in self._values:
+            self._values[key] = KEY_MODES[mode](self.frame[column].astype(str)).to_numpy()
+        return self._values[key]
+
+    def ids(self, column, mode='compact'):
+        """Kod kimlikleri (int32 dizisi)"""
+        key = (column, mode)
+        if key not in self._ids:
+            self._ids[key] = self.table.encode(self.values(column, mode))
+        return self._ids[key]
+
+    def state(self):
+        """Hesaplanmış normalize kodlar ve kimlikler (kod tablosuyla birlikte) - önceden hazırlık için"""
+        columns = {column for column, _ in self._values}
+        return {'rows': len(self.frame), 'digest': column_digest(self.frame, columns),
+                'codes': list(self.table.codes), 'values': dict(self._values), 'ids': dict(self._ids)}
+
+    @classmethod
+    def from_state(cls, frame, state):
+        """Hazırlanmış durumdan indeks - satır sayısı veya kod kolonlarının özeti tutmuyorsa None"""
+        if state.get('rows') != len(frame):
+            return None
+        columns = {column for column, _ in state['values']}
+        if not columns <= set(frame.columns) or state.get('digest') != column_digest(frame, columns):
+            return None
+        sheet = cls(CodeTable.from_codes(state['codes']), frame)
+        sheet._values.update(state['values'])
+        sheet._ids.update(state['ids'])
+        return sheet
+
+    def rows(self, code_id, columns, mode='compact'):
+        """Kodun kolonlardan herhangi birinde geçtiği satırlar - sıralı ve tekil"""
+        parts = []
+        for column in columns:
+            key = (column, mode)
+            if key not in self._rows:
+                self._rows[key] = CodeRows(self.ids(column, mode), len(self.table))
+            parts.append(self._rows[key].get(code_id))
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
@@ -0,0 +1,180 @@
+"""Ürün kodu temizleme ve standartlaştırma kuralları
+
+Tekil kurallar (clean_product_code, process_*_codes) tek bir değer alır. Kolonlar için
+*_codes yardımcıları kullanılır: kolon factorize edilir, kural yalnızca farklı değerlere
+uygulanır (mümkünse vektörel, değilse önbellekli) ve sonuç kodlar üzerinden tüm satırlara
+yayılır. Çıktı, kuralın satır satır .apply ile uygulanmasıyla aynıdır.
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MEMO_SIZE = 200_000
+
+
+def clean_product_code(code):
+    """Ürün kodunu temizle ve standardize et"""
+    if pd.isna(code) or code == '':
+        return ''
+    
+    # String'e çevir
+    code_str = str(code).strip()
+    
+    # Boşlukları kaldır
+    code_str = code_str.replace(' ', '').replace('-', '').replace('_', '')
+    
+    # Büyük harfe çevir
+    code_str = code_str.upper()
+    
+    # Özel karakterleri temizle (sadece harf, rakam ve nokta bırak)
+    code_str = re.sub(r'[^A-Z0-9.]', '', code_str)
+    
+    return code_str
+
+def compact_code(code):
+    """Tam eşleştirme anahtarı - kenar boşluklarını ve boşlukları sil, büyük harfe çevir"""
+    return str(code).strip().replace(' ', '').upper()
+
+def process_schaeffler_codes(catalogue_number):
+    """Schaeffler ürün kodlarını işle"""
+    if pd.isna(catalogue_number):
+        return ''
+    
+    code_str = str(catalogue_number).strip()
+    
+    # Özel Schaeffler kuralları
+    # 1. Sondaki 0'ları kaldır (sadece belirli durumlarda)
+    if code_str.endswith('0') and len(code_str) > 1:
+        # Eğer sondaki 0'dan önceki karakter rakam değilse, 0'ı kaldır
+        if not code_str[-2].isdigit():
+            code_str = code_str[:-1]
+    
+    # 2. Özel Schaeffler formatları
+    # LUK formatı: LUK-XXXXX -> XXXXX
+    if code_str.startswith('LUK-'):
+        code_str = code_str[4:]
+    
+    # 3. Boşlukları ve özel karakterleri temizle
+    code_str = clean_product_code(code_str)
+    
+    return code_str
+
+def process_valeo_codes(valeo_ref):
+    """Valeo ürün kodlarını işle"""
+    if pd.isna(valeo_ref):
+        return ''
+    
+    code_str = str(valeo_ref).strip()
+    
+    # Özel Valeo kuralları
+    # 1. Valeo özel formatları
+    # VALE-XXXXX -> XXXXX
+    if code_str.startswith('VALE-'):
+        code_str = code_str[5:]
+    
+    # 2. Boşlukları ve özel karakterleri temizle
+    code_str = clean_product_code(code_str)
+    
+    return code_str
+
+def process_bosch_codes(bosch_ref):
+    """Bosch ürün kodlarını işle - başına 3E- ekle ve boşlukları temizle"""
+    if pd.isna(bosch_ref):
+        return ''
+    
+    code_str = str(bosch_ref).strip()
+    
+    # Boşlukları temizle
+    code_str = code_str.replace(' ', '')
+    
+    # Başında 3E- yoksa ekle
+    if not code_str.startswith('3E-'):
+        code_str = '3E-' + code_str
+    
+    return code_str
+
+def split_zf_material(material):
+    """ZF İthal Material kodunu işle - LF:/SX: ile başlıyorsa : sonrası, diğerlerinde : öncesi"""
+    if ':' in material and (material.startswith('LF:') or material.startswith('SX:')):
+        return material.split(':')[1].replace(' ', '')
+    if ':' in material:
+        return material.split(':')[0].strip()
+    # : yoksa boşlukları sil
+    return material.replace(' ', '')
+
+
+# Kolon bazlı normalizasyon
+
+def _clean_product_codes_vectorized(values):
+    """clean_product_code'un vektörel karşılığı (farklı değerler üzerinde)
+
+    Boşluk, '-', '_' ve kenar boşlukları zaten [^A-Z0-9.] kapsamında olduğundan
+    büyük harfe çevirip tek bir regex ile temizlemek aynı sonucu verir.
+    """
+    missing = values.isna().to_numpy()
+    # object dtype: Python str.upper semantiği korunur (ß → SS gibi)
+    strings = pd.Series([str(value) for value in values], index=values.index, dtype=object)
+    cleaned = strings.str.upper().str.replace(r'[^A-Z0-9.]', '', regex=True)
+    cleaned = cleaned.to_numpy(dtype=object, copy=True)
+    cleaned[missing] = ''
+    return cleaned
+
+def _has_colliding_types(uniques):
+    """Eşit sayılan farklı tipler (1, 1.0, True) factorize'da birleşir - bu durumda farklı değer yöntemi kullanılamaz"""
+    numeric_types = {type(value) for value in uniques if not isinstance(value, str) and not pd.isna(value)}
+    return len(numeric_types) > 1
+
+@lru_cache(maxsize=None)
+def _memoized(rule):
+    return lru_cache(maxsize=MEMO_SIZE, typed=True)(rule)
+
+def normalize_unique(series, rule, vectorized_rule=None):
+    """Kuralı yalnızca kolondaki farklı değerlere uygula ve sonucu tüm satırlara yay
+
+    rule tüm boş değerler (None, NaN, pd.NA) için aynı sonucu vermelidir.
+    vectorized_rule verilirse farklı değerler tek seferde onunla işlenir.
+    """
+    if len(series) == 0:
+        return pd.Series([], index=series.index, dtype=object)
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    uniques = list(uniques)
+    if series.dtype == object and _has_colliding_types(uniques):
+        return series.apply(rule).astype(object)
+
+    if vectorized_rule is not None:
+        normalized = np.asarray(vectorized_rule(pd.Series(uniques, dtype=object)), dtype=object)
+    else:
+        cached_rule = _memoized(rule)
+        normalized = np.array([cached_rule(value) for value in uniques], dtype=object)
+
+    return pd.Series(normalized[codes], index=series.index, dtype=object)
+
+def clean_codes(series):
+    """Kolon için clean_product_code"""
+    return normalize_unique(series, clean_product_code, _clean_product_codes_vectorized)
+
+def compact_codes(series):
+    """Kolon için compact_code (değerler önce string'e çevrilir)"""
+    return normalize_unique(series.astype(str), compact_code)
+
+def schaeffler_codes(series):
+    """Kolon için process_schaeffler_codes"""
+    return normalize_unique(series, process_schaeffler_codes)
+
+def valeo_codes(series):
+    """Kolon için process_valeo_codes"""
+    return normalize_unique(series, process_valeo_codes)
+
+def bosch_codes(series):
+    """Kolon için process_bosch_codes"""
+    return normalize_unique(series, process_bosch_codes)
+
+def _split_zf_material_str(material):
+    return split_zf_material(str(material))
+
+def zf_material_codes(series):
+    """Kolon için ZF İthal Material işlemi (değerler önce string'e çevrilir)"""
+    return normalize_unique(series, _split_zf_material_str)
@@ -0,0 +1,59 @@
+"""CAT4 (marka) kolonu için tek geçişli maske indeksi
+
+CAT4 birkaç yüz farklı değerden oluşur. Kolon bir kez factorize edilir, arama terimleri
+yalnızca farklı değerler üzerinde değerlendirilir ve sonuç satırlara kod dizisiyle yayılır.
+Aynı terim/terim grubu için hesaplanan maskeler saklanır, tekrar istenince yeniden hesaplanmaz.
+"""
+import numpy as np
+import pandas as pd
+
+
+class BrandMaskIndex:
+    """CAT4 kolonu için marka maskeleri (str.contains(case=False, na=False) ile aynı sonuç)"""
+
+    def __init__(self, cat4):
+        self.index = cat4.index
+        # NaN/None -> -1; yayma sırasında her zaman False'a düşer
+        self._codes, uniques = pd.factorize(cat4)
+        self._uniques = pd.Series(uniques, dtype=object)
+        # str.contains string olmayan değerlerde NaN (na=False ile False) verir
+        self._strings = pd.Series(
+            [value if isinstance(value, str) else None for value in self._uniques],
+            dtype=object
+        )
+        self._term_masks = {}
+        self._masks = {}
+
+    def __len__(self):
+        return len(self._codes)
+
+    def _term_mask(self, term):
+        if term not in self._term_masks:
+            self._term_masks[term] = self._strings.str.contains(term, case=False, na=False).to_numpy(dtype=bool)
+        return self._term_masks[term]
+
+    def _broadcast(self, unique_mask):
+        return np.append(unique_mask, False)[self._codes]
+
+    def unique_mask(self, terms):
+        """Farklı CAT4 değerleri için birleşik (OR) maske"""
+        result = np.zeros(len(self._uniques), dtype=bool)
+        for term in terms:
+            result |= self._term_mask(term)
+        return result
+
+    def mask(self, terms):
+        """Terimlerden herhangi birini içeren satırlar - kolonla aynı index'e sahip bool Series"""
+        key = tuple(dict.fromkeys(terms))
+        if key not in self._masks:
+            self._masks[key] = pd.Series(self._broadcast(self.unique_mask(key)), index=self.index)
+        return self._masks[key]
+
+    def rows(self, terms):
+        """Terimlerden herhangi birini içeren satırların konumları"""
+        return np.flatnonzero(self.mask(terms).to_numpy())
+
+    def exact(self, value):
+        """CAT4 == value olan satırlar"""
+        unique_mask = (self._uniques == value).to_numpy(dtype=bool)
+        return pd.Series(self._broadcast(unique_mask), index=self.index)
@@ -0,0 +1,196 @@
+"""Yüklenen Excel dosyalarının arka planda okunması ve disk önbelleği
+
+Dosyalar yüklendiği anda bir süreç havuzuna gönderilir; her süreç dosyayı okur ve sonucu
+içerik özetiyle (sha256) adlandırılmış bir pickle dosyasına yazar. Sayfa tabloyu istediğinde
+önce diskteki sonuca bakar, iş hâlâ sürüyorsa onu bekler. Aynı içerik farklı oturumlarda veya
+yeniden yüklemelerde tekrar okunmaz.
+
+Süreçler openpyxl ayrıştırmasını GIL dışında paralel yürütür; okuma ayarları READERS'ta
+tek yerde tanımlıdır, böylece arka plan ve doğrudan okuma aynı tabloyu üretir.
+
+Pickle dosyası okunurken kod çalıştırabilir. Önbellek bu yüzden kullanıcıya özel bir dizindedir
+(varsayılan ~/.siparis/onbellek, 0700); dizin veya dosya başka bir kullanıcıya aitse kullanılmaz.
+"""
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR = Path(os.environ.get('SIPARIS_CACHE_DIR', Path.home() / '.siparis' / 'onbellek'))
+CACHE_TTL = 24 * 3600  # saniye
+
+# Dosya türü -> pd.read_excel ayarları
+READERS = {
+    # Ana Excel - URUNKODU metin, NaN kontrolü kapalı
+    'ana': {'dtype': {'URUNKODU': 'string'}, 'na_filter': False, 'keep_default_na': False},
+    # Marka bakiye dosyaları
+    'marka': {'na_filter': False, 'keep_default_na': False},
+    # Inbound
+    'inbound': {}
+}
+
+
+def file_bytes(source):
+    """UploadedFile, dosya nesnesi veya yoldan içerik"""
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    if hasattr(source, 'read'):
+        source.seek(0)
+        data = source.read()
+        source.seek(0)
+        return data
+    with open(source, 'rb') as f:
+        return f.read()
+
+def content_key(data, kind):
+    """İçerik ve dosya türünden önbellek anahtarı"""
+    return f"{kind}-{hashlib.sha256(data).hexdigest()}"
+
+def ensure_private_dir(path):
+    """Dizini yalnızca bu kullanıcıya açık (0700) oluştur - başka kullanıcıya aitse PermissionError"""
+    path = Path(path)
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        # Windows - varsayılan dizin kullanıcı profilinde
+        return path
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"Önbellek yolu bir dizin değil (bağlantı olabilir): {path}")
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"Önbellek dizini başka bir kullanıcıya ait: {path}")
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+def _owned(path):
+    """Dosya bu kullanıcıya ait mi - başkasının bıraktığı pickle okunmaz"""
+    return not hasattr(os, 'getuid') or os.lstat(path).st_uid == os.getuid()
+
+def _cache_path(key):
+    return CACHE_DIR / f"{key}.pkl"
+
+def load_cached(key):
+    """Diskteki sonucu oku - yoksa None"""
+    path = _cache_path(key)
+    if not path.exists():
+        return None
+    ensure_private_dir(CACHE_DIR)
+    if not _owned(path):
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        # Yarım kalmış/bozuk dosya - yeniden okunacak
+        path.unlink(missing_ok=True)
+        return None
+
+def store_cached(key, df):
+    """Sonucu diske yaz (önce geçici dosyaya, sonra atomik yer değiştirme)"""
+    ensure_private_dir(CACHE_DIR)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    os.close(fd)
+    try:
+        pd.to_pickle(df, tmp_path)
+        os.replace(tmp_path, _cache_path(key))
+    except Exception:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+def read_excel_bytes(data, kind):
+    """Excel içeriğini türüne göre oku"""
+    from io import BytesIO
+    return pd.read_excel(BytesIO(data), engine='openpyxl', **READERS[kind])
+
+def parse_to_cache(data, kind, key):
+    """Süreç havuzunda çalışır - dosyayı okuyup diske yazar, satır sayısını döndürür"""
+    df = read_excel_bytes(data, kind)
+    store_cached(key, df)
+    return len(df)
+
+def prune_cache(max_age=CACHE_TTL):
+    """Süresi dolmuş önbellek dosyalarını sil"""
+    if not CACHE_DIR.exists():
+        return 0
+    removed = 0
+    now = time.time()
+    for path in CACHE_DIR.iterdir():
+        try:
+            if now - path.stat().st_mtime > max_age:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+def clear_cache():
+    """Tüm disk önbelleğini sil"""
+    return prune_cache(max_age=-1)
+
+
+class BackgroundParser:
+    """Yüklenen dosyaları süreç havuzunda okuyup disk önbelleğine yazan yönetici"""
+
+    def __init__(self, max_workers=None):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Streamlit sunucusu çok iş parçacıklı - fork yerine spawn
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self._futures = {}
+        self._lock = threading.Lock()
+        prune_cache()
+
+    def submit(self, source, kind):
+        """Dosyayı arka planda okumaya gönder - önbellek anahtarını döndürür"""
+        data = file_bytes(source)
+        key = content_key(data, kind)
+        with self._lock:
+            if key not in self._futures and not _cache_path(key).exists():
+                self._futures[key] = self._pool.submit(parse_to_cache, data, kind, key)
+        return key
+
+    def status(self, key):
+        """'hazır', 'okunuyor', 'hata' veya None (gönderilmemiş)"""
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None:
+            return 'hazır' if _cache_path(key).exists() else None
+        if not future.done():
+            return 'okunuyor'
+        return 'hata' if future.exception() is not None else 'hazır'
+
+    def result(self, source, kind):
+        """Okunmuş tablo - gerekirse arka plan işini bekler, hiç gönderilmemişse doğrudan okur"""
+        data = file_bytes(source)
+        key = content_key(data, kind)
+
+        df = load_cached(key)
+        if df is not None:
+            return df
+
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is not None:
+            try:
+                future.result()
+                df = load_cached(key)
+                if df is not None:
+                    return df
+            except Exception:
+                # Arka plan okuması başarısız - aynı hatayı çağırana doğrudan okumada göster
+                pass
+
+        df = read_excel_bytes(data, kind)
+        store_cached(key, df)
+        return df
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
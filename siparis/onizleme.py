@@ -0,0 +1,83 @@
+"""Büyük sonuç tabloları için sunucu tarafı sayfalı önizleme
+
+Tablonun tamamı tarayıcıya gönderilmez; oturumda tutulan tablodan istenen sayfa, seçilen kolonlar
+ve filtrelenmiş görünüm üretilir. Filtre maskesi son (kolon, metin) için saklanır, sayfa değiştirmek
+tabloyu yeniden taramaz. Özetler (grup başına kayıt sayısı ve toplam) yalnızca küçük bir sonuç
+tablosu döndürür. Böylece arayüze gönderilen veri sayfa boyutuyla sınırlıdır.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100, 500]
+SUMMARY_LIMIT = 50
+
+
+class FramePreview:
+    """Tablo üzerinde sayfa, kolon seçimi, filtre ve özet sorguları"""
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._filter_key = None
+        self._filter_rows = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def nbytes(self):
+        return int(self.frame.memory_usage(deep=True).sum())
+
+    @property
+    def columns(self):
+        return [str(col) for col in self.frame.columns]
+
+    def rows(self, column=None, text=''):
+        """Filtreye uyan satır konumları - filtre yoksa None (tüm satırlar)
+
+        Metin, kolonun metin halinde büyük/küçük harf duyarsız aranır.
+        """
+        text = (text or '').strip()
+        if not column or not text:
+            return None
+        key = (column, text)
+        if key != self._filter_key:
+            values = self.frame[column].astype(str)
+            mask = values.str.contains(text, case=False, regex=False, na=False).to_numpy()
+            self._filter_key = key
+            self._filter_rows = np.flatnonzero(mask)
+        return self._filter_rows
+
+    def count(self, column=None, text=''):
+        rows = self.rows(column, text)
+        return len(self.frame) if rows is None else len(rows)
+
+    def page_count(self, page_size, column=None, text=''):
+        return max(1, math.ceil(self.count(column, text) / page_size))
+
+    def page(self, number, page_size, columns=None, column=None, text=''):
+        """1'den başlayan sayfa - yalnızca seçilen kolonlar"""
+        rows = self.rows(column, text)
+        start = (max(1, number) - 1) * page_size
+        stop = start + page_size
+        positions = np.arange(start, min(stop, len(self.frame))) if rows is None else rows[start:stop]
+        view = self.frame.iloc[positions]
+        if columns:
+            view = view[[col for col in view.columns if str(col) in set(columns)]]
+        return view
+
+    def summary(self, group_column, value_column=None, column=None, text=''):
+        """Grup başına kayıt sayısı (ve değer kolonunun toplamı) - en kalabalık SUMMARY_LIMIT grup"""
+        rows = self.rows(column, text)
+        frame = self.frame if rows is None else self.frame.iloc[rows]
+        groups = frame[group_column].astype(str)
+        result = groups.value_counts().rename('Kayıt').to_frame()
+        if value_column:
+            values = pd.to_numeric(frame[value_column], errors='coerce').fillna(0)
+            result['Toplam'] = values.groupby(groups).sum()
+        result.index.name = str(group_column)
+        return result.head(SUMMARY_LIMIT).reset_index()
+
+    def numeric_columns(self):
+        return [str(col) for col in self.frame.columns if pd.api.types.is_numeric_dtype(self.frame[col])]
@@ -0,0 +1,150 @@
+"""Tek yüklemede dosya paketi (zip veya çoklu dosya)
+
+Ana, inbound ve tedarikçi dosyaları tek bir zip veya çoklu dosya seçimiyle yüklenir. Dosyalar
+yükleyici yuvasına göre değil başlık imzasına göre tanınır: her dosyanın yalnızca başlık satırı
+okunur ve doğrulama şemalarıyla (dogrulama.FILE_SCHEMAS / BOSCH_SCHEMAS) karşılaştırılır. Zorunlu
+kolonların tamamını içeren en ayrıntılı şema seçilir; başlıkları aynı olan dosyalar (Mann/Filtron)
+dosya adındaki ipucuyla ayrılır.
+
+Zip üyeleri ve başlıklar iş parçacıklarında paralel okunur (zlib ve openpyxl ayrıştırmasının
+büyük kısmı GIL dışında). Çıkarılan dosyalar bellekte BundleFile (adı olan BytesIO) olarak tutulur
+ve tek tek yüklenen dosyalarla aynı okuyuculardan geçer. st.cache_data adı olan dosya nesnelerini
+diskteki yol gibi hashler (değiştirilme zamanına bakar); paket dosyalarını alan önbellekli
+fonksiyonlar HASH_FUNCS ile ad ve içerikten hashlenir.
+"""
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+
+from siparis.dogrulama import read_header
+
+EXCEL_SUFFIXES = ('.xlsx', '.xls')
+MAX_MEMBERS = 50
+
+# Başlığı aynı olan dosyalar için dosya adı ipuçları (küçük harf)
+NAME_HINTS = {
+    'excel6': ('filtron',),
+    'excel7': ('mann',),
+}
+
+
+class BundleFile(io.BytesIO):
+    """Paketten çıkarılmış dosya - yüklenen dosya gibi .name, .size ve getvalue() sunar"""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def file_hash(file):
+    """Paket dosyasının önbellek anahtarı - ad ve içerik"""
+    return file.name, file.getvalue()
+
+# st.cache_data(hash_funcs=HASH_FUNCS) - tür tam eşleşir, alt sınıflar ayrıca eklenmeli
+HASH_FUNCS = {BundleFile: file_hash}
+
+
+@dataclass
+class Bundle:
+    """Tanınan dosyalar (anahtar -> dosya) ve tanınamayanlar (ad, neden)"""
+    files: dict = field(default_factory=dict)
+    unknown: list = field(default_factory=list)
+
+    def __len__(self):
+        return len(self.files)
+
+    @property
+    def nbytes(self):
+        return sum(file.size for file in self.files.values())
+
+    def get(self, key):
+        return self.files.get(key)
+
+
+def _is_excel(name):
+    path = PurePosixPath(name)
+    return (path.suffix.lower() in EXCEL_SUFFIXES and not path.name.startswith(('~$', '.'))
+            and '__MACOSX' not in path.parts)
+
+def expand(uploads, make_file=BundleFile):
+    """Yüklemeleri dosyalara aç - zip üyeleri paralel çıkarılır; (dosyalar, atlananlar)"""
+    files, skipped = [], []
+    for upload in uploads:
+        name = getattr(upload, 'name', 'dosya')
+        data = upload.getvalue() if hasattr(upload, 'getvalue') else upload.read()
+        if name.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                skipped.append((name, "zip açılamadı"))
+                continue
+            members = [member for member in archive.infolist() if not member.is_dir()]
+            skipped.extend((member.filename, "Excel dosyası değil") for member in members if not _is_excel(member.filename))
+            members = [member for member in members if _is_excel(member.filename)]
+            if len(members) > MAX_MEMBERS:
+                skipped.append((name, f"{len(members)} dosya var, en fazla {MAX_MEMBERS}"))
+                continue
+            with ThreadPoolExecutor(max_workers=min(len(members), 8) or 1) as pool:
+                files.extend(pool.map(
+                    lambda member: make_file(PurePosixPath(member.filename).name, archive.read(member)), members))
+        elif _is_excel(name):
+            files.append(make_file(name, data))
+        else:
+            skipped.append((name, "Excel veya zip değil"))
+    return files, skipped
+
+def _matches(header, schema):
+    return (all(col in header for col in schema.get('required', []))
+            and all(any(col in header for col in group) for group in schema.get('any_of', [])))
+
+def recognize(header, schemas, name=''):
+    """Başlığa uyan şema anahtarı - (anahtar, None) veya (None, neden)"""
+    header = set(header)
+    candidates = [key for key, schema in schemas.items() if _matches(header, schema)]
+    if not candidates:
+        return None, "başlık hiçbir dosya türüne uymuyor"
+
+    # En çok zorunlu kolon isteyen (en ayrıntılı) şema
+    def specificity(key):
+        return len(schemas[key].get('required', [])) + len(schemas[key].get('any_of', []))
+    best = max(specificity(key) for key in candidates)
+    candidates = [key for key in candidates if specificity(key) == best]
+    if len(candidates) > 1:
+        lowered = name.lower()
+        hinted = [key for key in candidates if any(hint in lowered for hint in NAME_HINTS.get(key, ()))]
+        if len(hinted) != 1:
+            labels = ', '.join(schemas[key]['label'] for key in candidates)
+            return None, f"başlık birden çok türe uyuyor ({labels}) - dosya adında türü belirtin"
+        candidates = hinted
+    return candidates[0], None
+
+def open_bundle(uploads, schemas, make_file=BundleFile):
+    """Yüklemelerden paket - dosyalar açılır, başlıkları paralel okunup şemalarla eşleştirilir"""
+    files, skipped = expand(uploads, make_file)
+    bundle = Bundle(unknown=list(skipped))
+    if not files:
+        return bundle
+
+    def identify(file):
+        try:
+            return recognize(read_header(file), schemas, file.name)
+        except Exception as e:
+            return None, f"okunamadı: {e}"
+
+    with ThreadPoolExecutor(max_workers=min(len(files), 8)) as pool:
+        results = list(pool.map(identify, files))
+
+    # Aynı türde birden çok dosya varsa ada göre ilki kullanılır
+    for file, (key, reason) in sorted(zip(files, results), key=lambda item: item[0].name):
+        if key is None:
+            bundle.unknown.append((file.name, reason))
+        elif key in bundle.files:
+            bundle.unknown.append((file.name, f"ikinci {schemas[key]['label']} dosyası ({bundle.files[key].name} kullanıldı)"))
+        else:
+            bundle.files[key] = file
+    # Şema sırasıyla (yükleyici yuvalarının sırası)
+    bundle.files = {key: bundle.files[key] for key in schemas if key in bundle.files}
+    return bundle
@@ -0,0 +1,107 @@
+"""Parçalı (bellek sınırlı) Excel okuma ve yazma
+
+Ana Excel dosyası openpyxl read-only modunda satır blokları halinde okunur ve sonuç
+xlsxwriter constant_memory modunda satır satır diske yazılır. Böylece bellekte aynı anda
+yalnızca bir blok tutulur.
+"""
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def _convert_cell(value):
+    """pd.read_excel(na_filter=False) ile aynı hücre dönüşümü"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _block_to_frame(rows, columns, string_columns):
+    frame = pd.DataFrame(rows, columns=columns)
+    for col in string_columns:
+        if col in frame.columns:
+            frame[col] = frame[col].astype(str).astype('string')
+    return frame
+
+def iter_excel_chunks(excel_file, chunk_size=DEFAULT_CHUNK_SIZE, string_columns=('URUNKODU',)):
+    """İlk sayfayı chunk_size satırlık DataFrame blokları halinde oku"""
+    from openpyxl import load_workbook
+
+    if hasattr(excel_file, 'seek'):
+        excel_file.seek(0)
+
+    workbook = load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        columns = [f"Unnamed: {i}" if name is None else str(name) for i, name in enumerate(header)]
+        width = len(columns)
+        block = []
+
+        for row in rows:
+            # Tamamen boş satırları atla (read_excel ile aynı)
+            if all(value is None for value in row):
+                continue
+            values = [_convert_cell(value) for value in row[:width]]
+            if len(values) < width:
+                values.extend([''] * (width - len(values)))
+            block.append(values)
+
+            if len(block) >= chunk_size:
+                yield _block_to_frame(block, columns, string_columns)
+                block = []
+
+        if block:
+            yield _block_to_frame(block, columns, string_columns)
+    finally:
+        workbook.close()
+
+def write_excel_stream(chunks, path, text_columns=(), sum_columns=None, total_mode='values', sheet_name='Sheet1'):
+    """DataFrame bloklarını tek bir xlsx dosyasına sırayla yaz - yazılan satır sayısını döndürür
+
+    sum_columns: {hedef kolon: [toplanan kolonlar]}
+    total_mode: 'values' -> hedef kolondaki sayılar yazılır, 'formula' -> satır bazında SUM formülü
+    (hesaplanmış değeriyle birlikte) yazılır - cikti.write_excel ile aynı.
+    """
+    import xlsxwriter
+    from xlsxwriter.utility import xl_col_to_name
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    text_format = workbook.add_format({'num_format': '@'})
+
+    columns = None
+    formulas = {}
+    row_num = 0
+
+    try:
+        for chunk in chunks:
+            if columns is None:
+                columns = list(chunk.columns)
+                worksheet.write_row(0, 0, columns)
+                for col in text_columns:
+                    if col in columns:
+                        idx = columns.index(col)
+                        worksheet.set_column(idx, idx, None, text_format)
+                if total_mode == 'formula':
+                    for target, sources in (sum_columns or {}).items():
+                        letters = [xl_col_to_name(columns.index(col)) for col in sources if col in columns]
+                        if target in columns and letters:
+                            formulas[columns.index(target)] = letters
+
+            # NaN/NA hücreler boş yazılır (tekrarlanan kolon adları nedeniyle konumsal)
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                row_num += 1
+                worksheet.write_row(row_num, 0, row)
+                for idx, letters in formulas.items():
+                    cells = ','.join(f"{letter}{row_num + 1}" for letter in letters)
+                    worksheet.write_formula(row_num, idx, f"=SUM({cells})", None, row[idx])
+    finally:
+        workbook.close()
+
+    return row_num
@@ -0,0 +1,307 @@
+"""Tek bir işlem çalıştırmasının profil kaydı
+
+İki mod vardır:
+
+- 'pstats': cProfile (deterministik) - her çağrı sayılır, yalnızca çağıran iş parçacığı ölçülür;
+  `python -m pstats`, snakeviz vb. ile açılır,
+- 'speedscope': örnekleme - kayıt boyunca çağıran iş parçacığı ve kayıt sırasında başlatılan iş
+  parçacıklarının (marka okuma havuzu) yığınları aralıkla okunur; https://www.speedscope.app ile açılır.
+
+Kayıt zip olarak indirilir: profil dosyası ve bilgi.json (aşama süreleri, girdi boyutları, ortam).
+
+Kullanım:
+    python -m siparis.profil paket/ --mod speedscope --cikti profil.zip
+    python -m siparis.profil paket/ --sayfa bosch
+"""
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+PROFILE_MODES = {
+    'pstats': 'cProfile (deterministik, .pstats)',
+    'speedscope': 'Örnekleme (speedscope.json)'
+}
+DEFAULT_INTERVAL = 0.005  # saniye, örnekleme aralığı
+
+
+def describe_input(value):
+    """Girdi boyutu özeti - DataFrame, yüklenen dosya, dosya yolu veya bayt"""
+    if value is None:
+        return None
+    if hasattr(value, 'shape') and hasattr(value, 'memory_usage'):
+        return {
+            'satır': int(value.shape[0]),
+            'kolon': int(value.shape[1]),
+            'bellek_bayt': int(value.memory_usage(deep=True).sum())
+        }
+    if hasattr(value, 'getbuffer'):
+        return {'ad': getattr(value, 'name', None), 'bayt': value.getbuffer().nbytes}
+    if isinstance(value, (bytes, bytearray)):
+        return {'bayt': len(value)}
+    if isinstance(value, (str, os.PathLike)) and os.path.isfile(value):
+        return {'ad': os.path.basename(value), 'bayt': os.path.getsize(value)}
+    return {'tür': type(value).__name__}
+
+
+class _Sampler(threading.Thread):
+    """İş parçacıklarının yığınlarını aralıkla okuyan örnekleyici"""
+
+    def __init__(self, target_thread, interval):
+        super().__init__(name='siparis-profil', daemon=True)
+        self.target_thread = target_thread
+        self.interval = interval
+        # Kayıttan önce var olan (sunucu vb.) iş parçacıkları örneklenmez
+        self.ignored = set(sys._current_frames()) - {target_thread}
+        self.frames = []
+        self._frame_ids = {}
+        self.samples = {}
+        self._done = threading.Event()
+
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        frame_id = self._frame_ids.get(key)
+        if frame_id is None:
+            frame_id = len(self.frames)
+            self._frame_ids[key] = frame_id
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return frame_id
+
+    def run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._done.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self.ignored:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks, weights = self.samples.setdefault(ident, ([], []))
+                stacks.append(stack)
+                weights.append(elapsed)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def speedscope(self, name):
+        """speedscope dosya biçimi (her iş parçacığı ayrı profil)"""
+        profiles = []
+        for ident, (stacks, weights) in self.samples.items():
+            label = 'ana iş parçacığı' if ident == self.target_thread else f'iş parçacığı {ident}'
+            profiles.append({
+                'type': 'sampled',
+                'name': label,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': stacks,
+                'weights': weights
+            })
+        # Ana iş parçacığı önce açılsın
+        profiles.sort(key=lambda profile: profile['name'] != 'ana iş parçacığı')
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'siparis.profil',
+            'activeProfileIndex': 0,
+            'shared': {'frames': self.frames},
+            'profiles': profiles
+        }
+
+
+class ProfileCapture:
+    """Bir çalıştırmayı profilleyen bağlam yöneticisi - aşama süreleri ve girdi boyutlarıyla"""
+
+    def __init__(self, label, mode='pstats', interval=DEFAULT_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Bilinmeyen profil modu: {mode} (seçenekler: {', '.join(PROFILE_MODES)})")
+        self.label = label
+        self.mode = mode
+        self.interval = interval
+        self.inputs = {}
+        self.stages = {}
+        self.started_at = None
+        self.duration = None
+        self._profiler = None
+        self._start = None
+
+    def add_input(self, name, value):
+        self.inputs[name] = describe_input(value)
+
+    def run(self, stage, func, *args, **kwargs):
+        """Aşamayı çalıştır ve süresini kaydet"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.stages[stage] = time.perf_counter() - start
+
+    def __enter__(self):
+        self.started_at = datetime.datetime.now()
+        if self.mode == 'pstats':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = _Sampler(threading.get_ident(), self.interval)
+            self._profiler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        if self.mode == 'pstats':
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        return False
+
+    @property
+    def filename(self):
+        return f"profil_{self.label}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.zip"
+
+    def info(self):
+        """bilgi.json içeriği"""
+        import numpy
+        import pandas
+
+        return {
+            'etiket': self.label,
+            'mod': self.mode,
+            'başlangıç': self.started_at.isoformat(timespec='seconds'),
+            'toplam_sn': self.duration,
+            'aşamalar_sn': self.stages,
+            'girdiler': self.inputs,
+            'ortam': {
+                'python': sys.version.split()[0],
+                'pandas': pandas.__version__,
+                'numpy': numpy.__version__,
+                'platform': platform.platform(),
+                'cpu': os.cpu_count()
+            }
+        }
+
+    def profile_file(self):
+        """(dosya adı, içerik)"""
+        if self.mode == 'pstats':
+            import pstats
+
+            fd, path = tempfile.mkstemp(suffix='.pstats')
+            os.close(fd)
+            try:
+                pstats.Stats(self._profiler).dump_stats(path)
+                with open(path, 'rb') as f:
+                    return f"{self.label}.pstats", f.read()
+            finally:
+                os.remove(path)
+        content = json.dumps(self._profiler.speedscope(self.label))
+        return f"{self.label}.speedscope.json", content.encode('utf-8')
+
+    def summary(self, limit=15):
+        """En çok süre alan fonksiyonlar (metin) - yalnızca pstats modunda"""
+        if self.mode != 'pstats':
+            return ''
+        import pstats
+
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def to_zip(self):
+        """Profil dosyası + bilgi.json"""
+        name, content = self.profile_file()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(name, content)
+            archive.writestr('bilgi.json', json.dumps(self.info(), ensure_ascii=False, indent=2, default=str))
+            if self.mode == 'pstats':
+                archive.writestr('ozet.txt', self.summary(40))
+        return buffer.getvalue()
+
+
+def _profile_siparis(root, files, capture):
+    """Sipariş sayfası: okuma -> dönüşüm -> inbound -> marka eşleştirme (önbelleksiz gövdeler)"""
+    import runpy
+
+    page = runpy.run_path(str(root / 'pages' / 'SiparişOluşturma.py'), run_name='profil')
+    uploaded = {key: files.get(key) for key in ['inbound_excel'] + [f'excel{i}' for i in range(1, 9)]}
+    for key, path in [('main_file', files['main_file'])] + list(uploaded.items()):
+        capture.add_input(key, path)
+    with capture:
+        df = capture.run('okuma', page['read_uploaded'], files['main_file'], 'ana')
+        df = capture.run('dönüşüm', page['transform_frame'], df)
+        df = capture.run('inbound', page['process_inbound_frame'], df, uploaded['inbound_excel'])
+        df = capture.run('eşleştirme', page['match_brands_frame'], df, uploaded)
+    capture.add_input('sonuç', df)
+
+def _profile_bosch(root, files, capture):
+    """BOSCH sayfası: process_bosch_three_excel"""
+    import runpy
+
+    page = runpy.run_path(str(root / 'pages' / 'bosch_islemleri.py'), run_name='profil')
+    process = page['process_bosch_three_excel']
+    process.__globals__.update(
+        bakiye_raporu=files['excel8'], inbound_excel=files['inbound_excel'],
+        siparis_kalemleri=files['siparis_kalemleri']
+    )
+    for key in ('excel8', 'inbound_excel', 'siparis_kalemleri'):
+        capture.add_input(key, files[key])
+    with capture:
+        result = capture.run('bosch', process)
+    capture.add_input('sonuç', result)
+
+
+def main(argv=None):
+    """Girdi paketiyle bir çalıştırmayı profille ve zip olarak kaydet"""
+    import argparse
+    import logging
+    import warnings
+    from pathlib import Path
+
+    from siparis.karsilastirma import PROJECT_ROOT, bundle_files
+
+    parser = argparse.ArgumentParser(description="Bir işlem çalıştırmasının profil kaydı")
+    parser.add_argument('paket', help="Girdi paketi klasörü (karsilastirma.PAKET_DOSYALARI adlarıyla)")
+    parser.add_argument('--sayfa', choices=['siparis', 'bosch'], default='siparis', help="Profillenecek sayfa")
+    parser.add_argument('--mod', choices=list(PROFILE_MODES), default='pstats', help="Profil modu")
+    parser.add_argument('--aralik', type=float, default=DEFAULT_INTERVAL, help="Örnekleme aralığı (sn)")
+    parser.add_argument('--cikti', default=None, help="Zip dosya yolu (varsayılan: profil_<sayfa>_<zaman>.zip)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    logging.disable(logging.CRITICAL)
+    files = bundle_files(args.paket)
+    required = ['main_file'] if args.sayfa == 'siparis' else ['excel8', 'inbound_excel', 'siparis_kalemleri']
+    missing = [key for key in required if not files.get(key)]
+    if missing:
+        parser.error(f"Pakette eksik dosyalar: {missing}")
+
+    capture = ProfileCapture(args.sayfa, args.mod, args.aralik)
+    root = Path(PROJECT_ROOT)
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    if args.sayfa == 'siparis':
+        _profile_siparis(root, files, capture)
+    else:
+        _profile_bosch(root, files, capture)
+
+    output = Path(args.cikti or capture.filename)
+    output.write_bytes(capture.to_zip())
+    stages = ', '.join(f"{stage} {seconds:.2f} sn" for stage, seconds in capture.stages.items())
+    print(f"{capture.duration:.2f} sn ({stages}) -> {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Ana Excel başlığından kolon planı çıkarma
+
+Depo kolonlarının keşfi (kaynak -> hedef isimler, İKİTELLİ alternatifleri) ve çıktı tablosundaki
+sayısal/formül kolonları yalnızca başlığa bağlıdır. Plan başlık tuple'ı anahtarıyla saklanır;
+aynı düzende gelen dosyalar ve parçalı moddaki her blok keşif yapmadan aynı planı kullanır.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+ESSENTIAL_COLUMNS = [
+    'URUNKODU', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD',
+    'TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)'
+] + [f'CAT{i}' for i in range(1, 8)]
+
+DEPO_PREFIXES = ['02-', '04-', 'D01-', 'A01-', 'TD-E01-', 'E01-']
+
+# Kaynak önek -> hedef depo adı (sıra önemli: E01- TD-E01- sonrası gelir ve onu ezer)
+DEPO_PREFIX_MAPPING = {
+    '02-': 'MASLAK',
+    'D01-': 'İMES',
+    'TD-E01-': 'İKİTELLİ',
+    'E01-': 'İKİTELLİ',
+    '04-': 'BOLU',
+    'A01-': 'ANKARA'
+}
+
+# (kaynak tip, hedef tip)
+DEPO_COLUMN_TYPES = [('DEVIR', 'DEVIR'), ('ALIS', 'ALIŞ'), ('SATIS', 'SATIS'), ('STOK', 'STOK')]
+
+IKITELLI_KEYWORDS = ['İKİTELLİ', 'IKITELLI', 'TD-E01', 'E01', 'IKI']
+
+IKITELLI_ALTERNATIVE_PATTERNS = [
+    'IKITELLI', 'IKI', 'IKIT', 'IKITELLI', 'IKITELLİ',
+    'TD-E01', 'E01', 'TD-E', 'E-', 'TD-', 'E-01'
+]
+
+# Çıktıda "-"/boş temizliği yapılıp sayıya çevrilen kolonlar
+NUMERIC_KEYWORDS = ['DEVIR', 'ALIŞ', 'SATIS', 'STOK', 'Depo Bakiye', 'Tedarikçi Bakiye']
+
+TOTAL_DEPO_COLUMN = 'Toplam Depo Bakiye'
+TEXT_COLUMNS = ['Düzenlenmiş Ürün Kodu']
+
+# Sütunsal çıktılarda tipi bloktan bağımsız kolonlar: kodlar ve metinler her zaman metin, fiyat
+# ve oranlar ondalık - sayıya çevrilemeyen metin içeriyorsa metin (diğer sayısal kolonların tipi
+# ilk bloktan belirlenir)
+STRING_COLUMNS = (
+    ['URUNKODU', 'Düzenlenmiş Ürün Kodu', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD'] +
+    [f'CAT{i}' for i in range(1, 8)] +
+    ['DÖVIZ CINSI (S)', 'URUNKODU_3', 'Kampanya Tipi', 'not']
+)
+FLOAT_COLUMNS = ['SATıŞ FIYATı', 'İSK', 'PRİM', 'BÜTÇE', 'liste', 'TD SF', 'Toplam İsk', 'Net Fiyat Kampanyası']
+COLUMN_TYPES = {**{col: 'string' for col in STRING_COLUMNS}, **{col: 'float' for col in FLOAT_COLUMNS}}
+
+MONTH_NAMES = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
+               'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık']
+
+# Çıktı sıralaması: İmes, İkitelli, Ankara, Maslak, Bolu
+_OUTPUT_DEPOS = ['İmes', 'İkitelli', 'Ankara', 'Maslak', 'Bolu']
+_DEPO_BLOCKS = ['İMES', 'İKİTELLİ', 'ANKARA', 'MASLAK', 'BOLU']
+
+# Dönüşümde kaynağı olmayan, 0 ile başlatılan kolonlar
+ZERO_COLUMNS = (
+    ['not', 'İSK', 'PRİM', 'BÜTÇE', 'liste', 'TD SF', 'Net Fiyat Kampanyası', 'Kampanya Tipi', 'Toplam İsk'] +
+    [f"{depo} Depo Bakiye" for depo in _OUTPUT_DEPOS] + [TOTAL_DEPO_COLUMN] +
+    [f"{depo} Tedarikçi Bakiye" for depo in _OUTPUT_DEPOS] + ['Paket Adetleri'] +
+    [f"{depo} Sipariş" for depo in _OUTPUT_DEPOS]
+)
+
+
+@dataclass(frozen=True)
+class ColumnPlan:
+    """Ana dosya başlığı için giriş planı"""
+    source_columns: tuple      # Ana dosyadan okunacak kolonlar (sıralı)
+    depo_renames: tuple        # (hedef kolon, kaynak kolon veya None -> '0')
+    missing_ikitelli: tuple    # Bulunamayan İKİTELLİ kaynak kolonları
+    has_ikitelli_columns: bool
+    ikitelli_fallbacks: tuple  # (hedef kolon, alternatif kaynak kolon)
+
+
+@dataclass(frozen=True)
+class OutputPlan:
+    """Dönüştürülmüş tablo başlığı için çıktı planı"""
+    numeric_columns: tuple
+    depo_balance_columns: tuple
+    total_column: str
+    text_columns: tuple
+
+
+@dataclass(frozen=True)
+class OutputLayout:
+    """Dönüştürülmüş tablonun kolon düzeni"""
+    columns: tuple       # Nihai sıra - Kampanya Tipi, not ve Toplam İsk iki kez yer alır
+    zero_columns: tuple  # 0 ile başlatılan kolonlar (ay kolonları dahil)
+
+
+def next_month_names(month):
+    """Önümüzdeki iki ayın adı (month: 1-12)"""
+    return MONTH_NAMES[month % 12], MONTH_NAMES[(month + 1) % 12]
+
+def _ikitelli_target(column):
+    column_upper = str(column).upper()
+    if 'DEVIR' in column_upper or 'DEVİR' in column_upper:
+        return 'İKİTELLİ DEVIR'
+    if 'ALIS' in column_upper or 'ALIŞ' in column_upper:
+        return 'İKİTELLİ ALIŞ'
+    if 'SATIS' in column_upper or 'SATIŞ' in column_upper:
+        return 'İKİTELLİ SATIS'
+    if 'STOK' in column_upper:
+        return 'İKİTELLİ STOK'
+    return None
+
+@lru_cache(maxsize=32)
+def resolve_column_plan(header):
+    """Ana dosya başlığından (tuple) depo kolon planı"""
+    present = set(header)
+
+    depo_columns = [
+        f"{prefix}{col_type}"
+        for prefix in DEPO_PREFIXES
+        for col_type in ['DEVIR', 'ALIS', 'STOK', 'SATIS']
+        if f"{prefix}{col_type}" in present
+    ]
+    source_columns = [col for col in ESSENTIAL_COLUMNS + depo_columns if col in present]
+
+    # Aynı hedefe yazan son kaynak geçerlidir; kolon sırası ilk yazıldığı yerdir
+    renames = {}
+    missing_ikitelli = []
+    for old_prefix, new_name in DEPO_PREFIX_MAPPING.items():
+        for col_type, new_type in DEPO_COLUMN_TYPES:
+            old_col = f"{old_prefix}{col_type}"
+            if old_col in present:
+                renames[f"{new_name} {new_type}"] = old_col
+            else:
+                renames[f"{new_name} {new_type}"] = None
+                if new_name == 'İKİTELLİ':
+                    missing_ikitelli.append(old_col)
+
+    has_ikitelli_columns = any(
+        keyword in str(col).upper() for col in source_columns for keyword in IKITELLI_KEYWORDS
+    )
+
+    fallbacks = {}
+    for pattern in IKITELLI_ALTERNATIVE_PATTERNS:
+        for col in source_columns:
+            if pattern.upper() in str(col).upper():
+                target = _ikitelli_target(col)
+                if target:
+                    fallbacks[target] = col
+
+    return ColumnPlan(
+        source_columns=tuple(source_columns),
+        depo_renames=tuple(renames.items()),
+        missing_ikitelli=tuple(missing_ikitelli),
+        has_ikitelli_columns=has_ikitelli_columns,
+        ikitelli_fallbacks=tuple(fallbacks.items())
+    )
+
+@lru_cache(maxsize=32)
+def resolve_output_plan(header):
+    """Dönüştürülmüş tablo başlığından (tuple) sayısal ve formül kolonları"""
+    columns = [str(col) for col in header]
+    numeric_columns = [col for col in columns if any(keyword in col for keyword in NUMERIC_KEYWORDS)]
+    depo_balance_columns = [col for col in columns if 'Depo Bakiye' in col and col != TOTAL_DEPO_COLUMN]
+
+    return OutputPlan(
+        numeric_columns=tuple(numeric_columns),
+        depo_balance_columns=tuple(depo_balance_columns),
+        total_column=TOTAL_DEPO_COLUMN if TOTAL_DEPO_COLUMN in columns else None,
+        text_columns=tuple(col for col in TEXT_COLUMNS if col in columns)
+    )
+
+@lru_cache(maxsize=16)
+def resolve_output_layout(month_names):
+    """Önümüzdeki iki ayın adlarından (tuple) dönüştürülmüş tablonun kolon düzeni
+
+    Kaynakta bulunmayan isteğe bağlı kolonlar (ACIKLAMA, CAT5...) dönüşümde atlanır.
+    """
+    first, second = month_names
+    month_columns = [name for i in range(1, 6) for name in (f"{first}_{i}", f"{second}_{i}")]
+
+    columns = (
+        ['URUNKODU', 'Düzenlenmiş Ürün Kodu', 'ACIKLAMA', 'URETİCİKODU', 'ORJİNAL', 'ESKİKOD'] +
+        [f'CAT{i}' for i in range(1, 8)] +
+        [f"{depo} {col_type}" for depo in _DEPO_BLOCKS for col_type in ('DEVIR', 'ALIŞ', 'SATIS', 'STOK')] +
+        ['not'] +
+        [f"{depo} Depo Bakiye" for depo in _OUTPUT_DEPOS] +
+        ['Kampanya Tipi', 'Toplam İsk', TOTAL_DEPO_COLUMN] +
+        [f"{depo} Tedarikçi Bakiye" for depo in _OUTPUT_DEPOS] +
+        ['Paket Adetleri'] +
+        [f"{depo} Sipariş" for depo in _OUTPUT_DEPOS] +
+        month_columns +
+        ['TOPL.FAT.ADT', 'MÜŞT.SAY.', 'SATıŞ FIYATı', 'DÖVIZ CINSI (S)', 'URUNKODU_3'] +
+        # Son başlıklar - Kampanya Tipi, not ve Toplam İsk burada ikinci kez yer alır
+        ['Kampanya Tipi', 'not', 'İSK', 'PRİM', 'BÜTÇE', 'liste', 'TD SF', 'Toplam İsk', 'Net Fiyat Kampanyası']
+    )
+
+    return OutputLayout(
+        columns=tuple(columns),
+        zero_columns=tuple(ZERO_COLUMNS + month_columns)
+    )
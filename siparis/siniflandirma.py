@@ -0,0 +1,110 @@
+"""Tedarikçi dosyalarındaki sipariş/şube bilgisinden depo (şube) belirleme
+
+Kurallar sıralı bir tablo olarak tanımlanır: [(etiket, (alt metin, ...)), ...].
+Bir değer, alt metinlerinden birini içeren İLK kuralın etiketini alır; hiçbiri
+tutmazsa varsayılan etiket ('Diğer') döner.
+
+Sınıflandırma yalnızca farklı değerler üzerinde yapılır ve sonuçlar saklanır;
+PO kolonları çok tekrar ettiği için satırların büyük kısmı sözlükten gelir. Sınıflandırıcılar
+modül düzeyinde tektir ve marka iş parçacıklarınca paylaşılır; sözlük kilitle okunup yazılır.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BRANCH = 'Diğer'
+
+# Schaeffler PO Number(L), Valeo Müşteri P/O No.
+PO_BRANCH_RULES = [
+    ('İmes', ('IME', '285')),
+    ('Ankara', ('ANK', '321')),
+    ('Bolu', ('322',)),
+    ('Maslak', ('323',)),
+    ('İkitelli', ('IKI', '324'))
+]
+
+# ZF İthal Purchase order no., ZF Yerli Ship-to Name
+ZF_BRANCH_RULES = [
+    ('İmes', ('IME', '285', 'İST', 'IST')),
+    ('Ankara', ('ANK', '321')),
+    ('Bolu', ('322',)),
+    ('Maslak', ('323',)),
+    ('İkitelli', ('IKI', '324'))
+]
+
+# Delphi Şube
+DELPHI_BRANCH_RULES = [
+    ('Bolu', ('Teknik Dizel-Bolu',)),
+    ('İmes', ('Teknik Dizel-Ümraniye',)),
+    ('Maslak', ('Teknik Dizel-Maslak',)),
+    ('Ankara', ('Teknik Dizel-Ankara',)),
+    ('İkitelli', ('Teknik Dizel-İkitelli',))
+]
+
+# Mann/Filtron Müşteri SatınAlma No
+MANN_BRANCH_RULES = [
+    ('Ankara', ('AAS',)),
+    ('İmes', ('DAS',)),
+    ('Bolu', ('BAS',)),
+    ('Maslak', ('MAS',)),
+    ('İkitelli', ('EAS',))
+]
+
+
+class BranchClassifier:
+    """Sıralı alt metin kurallarıyla vektörel sınıflandırıcı (ilk eşleşen kural kazanır)"""
+
+    MAX_MEMO_SIZE = 200_000
+
+    def __init__(self, rules, default=DEFAULT_BRANCH):
+        self.rules = [(label, tuple(patterns)) for label, patterns in rules]
+        self.default = default
+        self._labels = [label for label, _ in self.rules]
+        # Her kural tek bir derlenmiş alternatif regex - kural sırası np.select ile korunur
+        self._patterns = [
+            re.compile('|'.join(re.escape(pattern) for pattern in patterns))
+            for _, patterns in self.rules
+        ]
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def classify_values(self, values):
+        """Farklı string değerleri sınıflandır (önbelleksiz)"""
+        values = pd.Series(values, dtype=object)
+        if len(values) == 0:
+            return np.array([], dtype=object)
+        conditions = [values.str.contains(pattern, regex=True).to_numpy(dtype=bool) for pattern in self._patterns]
+        return np.select(conditions, self._labels, default=self.default).astype(object)
+
+    def __call__(self, series):
+        """Seriyi sınıflandır - sonuç aynı index'e sahip bir Series"""
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+
+        # Karışık tipli object kolonlarda (1 ve '1' gibi) string karşılıklarına göre ayır
+        if series.dtype == object and not all(isinstance(value, str) for value in uniques):
+            codes, uniques = pd.factorize(series.map(str), use_na_sentinel=False)
+
+        unique_strings = [str(value) for value in uniques]
+        # Etiketler çağrıya ait sözlükten okunur - başka iş parçacığının temizlediği sözlükten değil
+        with self._lock:
+            known = {value: self._memo[value] for value in unique_strings if value in self._memo}
+        unknown = [value for value in unique_strings if value not in known]
+        if unknown:
+            known.update(zip(unknown, self.classify_values(unknown)))
+            with self._lock:
+                if len(self._memo) + len(unknown) > self.MAX_MEMO_SIZE:
+                    self._memo.clear()
+                    self._memo.update(known)
+                else:
+                    self._memo.update(zip(unknown, (known[value] for value in unknown)))
+
+        labels = np.array([known[value] for value in unique_strings], dtype=object)
+        return pd.Series(labels[codes], index=series.index, dtype=object)
+
+
+PO_BRANCHES = BranchClassifier(PO_BRANCH_RULES)
+ZF_BRANCHES = BranchClassifier(ZF_BRANCH_RULES)
+DELPHI_BRANCHES = BranchClassifier(DELPHI_BRANCH_RULES)
+MANN_BRANCHES = BranchClassifier(MANN_BRANCH_RULES)
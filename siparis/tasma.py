@@ -0,0 +1,112 @@
+"""Ara tabloların diske taşınması (spill)
+
+Dönüşüm, inbound ve marka eşleştirme aşamalarının çıktıları istenirse bellekte tutulmak yerine
+sıkıştırılmamış Arrow IPC dosyalarına yazılır. Sonraki aşama dosyayı bellek eşlemeli (mmap) açar:
+null içermeyen sayısal kolonlar kopyalanmadan doğrudan dosya sayfalarından okunur, hangi sayfaların
+bellekte kalacağına işletim sisteminin sayfa önbelleği karar verir.
+
+Önbellekte ve oturum durumunda tablo yerine yalnızca küçük bir SpilledFrame tutucusu saklanır.
+Tekrarlanan kolon adları dosyada '.1' ekiyle yazılır, okurken özgün adlar geri verilir.
+"""
+import json
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+SPILL_DIR = Path(os.environ.get('SIPARIS_SPILL_DIR', Path(tempfile.gettempdir()) / 'siparis_spill'))
+SPILL_TTL = 24 * 3600  # saniye
+
+_COLUMNS_KEY = b'siparis.columns'
+
+
+@dataclass(frozen=True)
+class SpilledFrame:
+    """Diske taşınmış tablonun tutucusu"""
+    path: str
+    stage: str
+    n_rows: int
+    n_columns: int
+
+    def __len__(self):
+        return self.n_rows
+
+
+def spill_frame(df, stage, directory=None):
+    """Tabloyu Arrow IPC dosyasına yaz (önce geçici dosyaya, sonra atomik yer değiştirme)"""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    from siparis.cikti import unique_column_names
+
+    directory = Path(directory or SPILL_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    prune_spill(directory=directory)
+
+    table = pa.Table.from_pandas(df.set_axis(unique_column_names(df.columns), axis=1))
+    metadata = dict(table.schema.metadata or {})
+    metadata[_COLUMNS_KEY] = json.dumps([str(col) for col in df.columns]).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    path = directory / f"{stage}-{uuid.uuid4().hex}.arrow"
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        # Sıkıştırma yok - mmap ile sıfır kopya okuma için tamponlar dosyada olduğu gibi durmalı
+        with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except Exception:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    return SpilledFrame(str(path), stage, len(df), len(df.columns))
+
+def load_frame(spilled):
+    """Taşınmış tabloyu bellek eşlemeli olarak aç"""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    if not Path(spilled.path).exists():
+        raise FileNotFoundError(
+            f"'{spilled.stage}' aşamasının ara dosyası bulunamadı ({spilled.path}) - cache temizleyip tekrar deneyin"
+        )
+
+    with pa.memory_map(spilled.path, 'r') as source:
+        table = ipc.open_file(source).read_all()
+
+    columns = json.loads(table.schema.metadata[_COLUMNS_KEY])
+    # split_blocks: kolonlar tek blokta birleştirilmez, sayısal kolonlar mmap tamponunu paylaşır
+    df = table.to_pandas(split_blocks=True)
+    # Yerinde ad değiştirme - set_axis copy-on-write kapalıyken her kolonu belleğe kopyalar
+    df.columns = columns
+    return df
+
+def as_frame(frame):
+    """SpilledFrame ise diskten aç, DataFrame ise olduğu gibi döndür"""
+    if isinstance(frame, SpilledFrame):
+        return load_frame(frame)
+    return frame
+
+def prune_spill(max_age=SPILL_TTL, directory=None):
+    """Süresi dolmuş ara dosyaları sil"""
+    directory = Path(directory or SPILL_DIR)
+    if not directory.exists():
+        return 0
+    removed = 0
+    now = time.time()
+    for path in directory.iterdir():
+        try:
+            if now - path.stat().st_mtime > max_age:
+                path.unlink()
+                removed += 1
+        except OSError:
+            # Windows'ta eşlenmiş dosya silinemez - sonraki temizlikte tekrar denenir
+            continue
+    return removed
+
+def clear_spill(directory=None):
+    """Tüm ara dosyaları sil"""
+    return prune_spill(max_age=-1, directory=directory)
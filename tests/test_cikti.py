@@ -0,0 +1,31 @@
+"""Sütunsal çıktı - fiyat kolonundaki metin değerler dışa aktarımı durdurmamalı"""
+import io
+
+import pandas as pd
+import pytest
+
+from siparis.cikti import ConversionWarning, write_table, write_table_stream
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'feather'])
+def test_text_in_price_column_is_written_as_text(fmt):
+    df = pd.DataFrame({'URUNKODU': ['A', 'B'], 'SATıŞ FIYATı': [12.5, '12,50']})
+    output = io.BytesIO()
+    write_table(df, output, fmt)
+
+    output.seek(0)
+    result = pd.read_parquet(output) if fmt == 'parquet' else pd.read_feather(output)
+    assert result['SATıŞ FIYATı'].tolist() == ['12.5', '12,50']
+
+def test_text_in_later_chunk_is_nulled_with_warning(tmp_path):
+    chunks = [
+        pd.DataFrame({'URUNKODU': ['A'], 'SATıŞ FIYATı': [12.5]}),
+        pd.DataFrame({'URUNKODU': ['B', 'C'], 'SATıŞ FIYATı': ['12,50', '-']}),
+    ]
+    path = tmp_path / 'cikti.parquet'
+    with pytest.warns(ConversionWarning, match='1 değer'):
+        assert write_table_stream(iter(chunks), path, 'parquet') == 3
+
+    result = pd.read_parquet(path)
+    assert result['SATıŞ FIYATı'].dtype == 'float64'
+    assert result['SATıŞ FIYATı'].isna().tolist() == [False, True, True]
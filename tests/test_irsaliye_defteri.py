@@ -0,0 +1,55 @@
+"""Inbound defteri - düzeltilen ve belgeden çıkarılan satırlar tam işlemeyle aynı sonucu vermeli"""
+import pandas as pd
+import pytest
+
+from siparis.bakiye import inbound_lines
+from siparis.irsaliye_defteri import InboundLedger
+
+PERIOD = '2026-10'
+
+
+def _inbound(rows, line_numbers=False):
+    df = pd.DataFrame(rows, columns=['Belge No 2', 'Ürün Kodu', 'Depo', 'İrsaliye Miktarı'])
+    if line_numbers:
+        df.insert(1, 'Satır No', range(1, len(df) + 1))
+    return df
+
+def _full(df):
+    """Tam işleme - dosyanın tüm satırlarının (key, depo) toplamları"""
+    lines = inbound_lines(df).dropna(subset=['depo'])
+    return lines.groupby(['key', 'depo'])['quantity'].sum().sort_index()
+
+def _ledger(ledger):
+    totals = ledger.contributions(PERIOD).set_index(['key', 'depo'])['quantity'].sort_index()
+    return totals[totals != 0]
+
+
+# Satır no yoksa düzeltilen satırın anahtarı da değişir: eski hali silinir, yeni hali eklenir
+@pytest.mark.parametrize('line_numbers, expected', [(False, (2, 2, 2)), (True, (2, 2, 1))])
+def test_edited_and_removed_lines_match_full_reprocess(tmp_path, line_numbers, expected):
+    first = _inbound([
+        ('B1', 'GE-100', 'TD-02', 5),
+        ('B1', 'GE-200', 'TD-04', 3),
+        ('B1', 'GE-300', 'TD-02', 7),
+        ('B2', 'GE-100', 'TD-A01', 2),
+    ], line_numbers)
+    # ERP dışa aktarımı yeniden: B1'de GE-200 miktarı düzeltildi, GE-300 satırı çıkarıldı, B3 eklendi
+    second = _inbound([
+        ('B1', 'GE-100', 'TD-02', 5),
+        ('B1', 'GE-200', 'TD-04', 1),
+        ('B2', 'GE-100', 'TD-A01', 2),
+        ('B3', 'GE-300', 'TD-D01', 4),
+    ], line_numbers)
+    if line_numbers:
+        # Satır numaraları belgede korunur - çıkarılan satırdan sonraki satır numarasını değiştirmez
+        second['Satır No'] = [1, 2, 4, 5]
+
+    ledger = InboundLedger(tmp_path / 'defter.sqlite')
+    try:
+        ledger.ingest(first, PERIOD)
+        processed, unchanged, removed = ledger.ingest(second, PERIOD)
+        pd.testing.assert_series_equal(_ledger(ledger), _full(second), check_names=False, check_dtype=False)
+    finally:
+        ledger.close()
+
+    assert (processed, unchanged, removed) == expected
@@ -0,0 +1,25 @@
+"""Diske taşınan tablolar - sayısal kolonlar okunduktan sonra da mmap tamponunda kalmalı"""
+import numpy as np
+import pandas as pd
+
+from siparis.tasma import load_frame, spill_frame
+
+
+def test_loaded_numeric_columns_stay_in_mapping(tmp_path):
+    df = pd.DataFrame({
+        'URUNKODU': ['A-1', 'B-2', 'C-3'],
+        'İmes Depo Bakiye': np.array([1, 2, 3], dtype=np.int64),
+        'SATıŞ FIYATı': [1.5, 2.5, 3.5],
+        'not': ['x', 'y', 'z'],
+    })
+    # Tekrarlanan kolon adı özgün haliyle geri gelmeli
+    df.insert(4, 'not', ['p', 'q', 'r'], allow_duplicates=True)
+
+    loaded = load_frame(spill_frame(df, 'test', directory=tmp_path))
+
+    assert list(loaded.columns) == list(df.columns)
+    pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+    for position in (1, 2):
+        values = loaded.iloc[:, position].to_numpy()
+        # Kopya yığında ve yazılabilir olur; dosya sayfalarından okunan tampon salt okunur
+        assert not values.flags.writeable